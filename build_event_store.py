@@ -0,0 +1,20 @@
+from utils.data_loader import load_companies, load_reports, load_news, load_social_media
+from utils.event_store import build_event_tables, save_event_tables
+from utils.config import EVENT_STORE_DIR
+
+print("🔄 Loading ESG data...")
+
+companies = load_companies()
+reports = load_reports()
+news = load_news()
+social = load_social_media()
+
+print("🧱 Flattening records into column tables...")
+tables = build_event_tables(companies, reports, news, social)
+
+print(f"💾 Saving Parquet tables to {EVENT_STORE_DIR}")
+save_event_tables(tables, EVENT_STORE_DIR)
+
+for name, df in tables.items():
+    print(f"   {name}: {len(df)} rows")
+print("✅ Done! The event store is ready for aggregations.")
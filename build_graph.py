@@ -1,19 +1,111 @@
-import json
-from utils.data_loader import load_companies, load_reports, load_news, load_social_media
-from utils.graph_utils import build_graph_from_data, save_graph_json
-from utils.config import MERGED_GRAPH_JSON
+import argparse
+import time
+from utils.data_loader import load_folder, iter_json_files
+from utils.graph_utils import build_graph_from_data, build_graph_from_files, save_graph_json, GraphFragmentCache
+from utils.incremental_graph import IncrementalGraphBuilder
+from utils.watcher import DataWatcher
+from utils.parse_cache import get_parse_cache
+from utils.config import MERGED_GRAPH_JSON, COMPANIES_DIR, REPORTS_DIR, NEWS_DIR, SOCIAL_DIR
+
+parser = argparse.ArgumentParser(description="Build merged_graph.json from the ESG data folders.")
+parser.add_argument("--stream", action="store_true",
+                    help="stream news/social files record by record instead of loading them whole")
+parser.add_argument("--workers", type=int, default=None, help="parser pool size (default: executor default)")
+parser.add_argument("--processes", action="store_true",
+                    help="parse on a process pool instead of threads (CPU-bound, large files)")
+parser.add_argument("--watch", action="store_true",
+                    help="keep running and rebuild only the fragments of files that change")
+parser.add_argument("--company-id", default=None,
+                    help="only load report/news/social files of this company (prunes company_id= partitions)")
+parser.add_argument("--year", default=None, help="only load files of this year (prunes year= partitions)")
+parser.add_argument("--incremental", action="store_true",
+                    help="re-process only files added, changed or deleted since the last incremental build "
+                         "(edges carry source file + fingerprint) and write the delta")
+args = parser.parse_args()
+if args.incremental and (args.company_id or args.year):
+    # files outside the filter would look deleted and be retracted from the saved graph
+    parser.error("--incremental maintains the whole graph and cannot be combined with --company-id/--year")
+filters = {"company_id": args.company_id, "year": args.year}
+
+def paths(folder, **kw):
+    return [p for _, p in iter_json_files(folder, **kw)]
+
+def load(folder, **kw):
+    data, report = load_folder(folder, max_workers=args.workers, use_processes=args.processes, **kw)
+    print(f"   {report.summary()}")
+    for err in report.errors:
+        print(f"   ⚠️  {err.file}: {err.error}")
+    return data
 
 print("🔄 Loading ESG data...")
 
-companies = load_companies()
-reports = load_reports()
-news = load_news()
-social = load_social_media()
+companies = load(COMPANIES_DIR)
+if args.company_id:
+    # flat-layout files carry the company name, not its id
+    filters["company_name"] = next((c.get("name") for c in companies.values()
+                                    if c.get("company_id") == args.company_id), None)
+files = {"companies": paths(COMPANIES_DIR),
+         "reports": paths(REPORTS_DIR, **filters),
+         "news": paths(NEWS_DIR, **filters),
+         "social": paths(SOCIAL_DIR, **filters)}
+if not args.incremental:
+    reports = load(REPORTS_DIR, **filters)
+if not args.stream and not args.incremental:
+    news = load(NEWS_DIR, **filters)
+    social = load(SOCIAL_DIR, **filters)
 
 print("📈 Building Knowledge Graph...")
-graph = build_graph_from_data(companies, reports, news, social)
+if args.incremental:
+    builder = IncrementalGraphBuilder()
+    delta = builder.update(files, companies, save=False)
+    graph = builder.graph
+    print(f"   {delta.summary()}")
+elif args.stream:
+    graph = build_graph_from_files(companies, reports,
+                                   paths(NEWS_DIR, **filters), paths(SOCIAL_DIR, **filters))
+else:
+    graph = build_graph_from_data(companies, reports, news, social)
 
 print(f"💾 Saving graph to {MERGED_GRAPH_JSON}")
-save_graph_json(graph, MERGED_GRAPH_JSON)
+if args.incremental:
+    if not delta.empty:
+        builder.save(delta)
+else:
+    save_graph_json(graph, MERGED_GRAPH_JSON)
+
+stats = get_parse_cache().stats()
+print(f"🗃  Parse cache: {stats['hits']} hits / {stats['misses']} misses, {stats['entries']} entries")
 
 print("✅ Done! Your merged_graph.json is ready for visualization.")
+
+if args.watch:
+    fragments = GraphFragmentCache()
+
+    def rebuild():
+        comps, _ = load_folder(COMPANIES_DIR)
+        current = {"companies": paths(COMPANIES_DIR),
+                   "reports": paths(REPORTS_DIR, **filters),
+                   "news": paths(NEWS_DIR, **filters),
+                   "social": paths(SOCIAL_DIR, **filters)}
+        g = fragments.build(current, comps)
+        save_graph_json(g, MERGED_GRAPH_JSON)
+        return g
+
+    def on_change(changes):
+        for ch in changes:
+            fragments.invalidate(ch.path)
+            print(f"   {ch.event}: {ch.path}")
+        g = rebuild()
+        print(f"💾 Rebuilt {len(changes)} file(s): {len(g['nodes'])} nodes, {len(g['edges'])} edges")
+
+    watcher = DataWatcher()
+    watcher.subscribe(on_change)
+    watcher.poll()
+    rebuild()
+    print(f"👀 Watching {watcher.root} every {watcher.interval}s (Ctrl+C to stop)...")
+    try:
+        while True:
+            time.sleep(watcher.interval)
+            watcher.poll()
+    except KeyboardInterrupt:
+        pass
@@ -1,64 +1,20 @@
 import streamlit as st
-import os
-import json
-import re
-from utils.data_loader import load_json
+import pandas as pd
+from utils.datastore import get_datastore
+from utils.charts import pie_sentiment_breakdown, bar_topics, sentiment_timeseries
 
 st.set_page_config(page_title="ESG Dashboard", layout="wide", page_icon="🌍")
 
-# ============================================================
-# 🔍 UNIVERSAL FILENAME NORMALIZATION
-# ============================================================
-
-def normalize(s):
-    """Normalize a string to match across company names, IDs, filenames."""
-    return re.sub(r'[^a-z0-9]', '', s.lower())
-
-
-def detect_files_for_company(company_name, company_id):
-    """
-    Auto-detect company files by matching either:
-    - company name (cleaned)
-    - company ID (cleaned)
-    - partial fragments of either
-    """
-    name_key = normalize(company_name)
-    id_key = normalize(company_id)
-
-    def match_file(fname):
-        f = normalize(fname)
-        return (name_key in f) or (id_key in f)
-
-    # news
-    news_files = [f for f in os.listdir("data/news") if match_file(f)]
-    # reports
-    report_files = [f for f in os.listdir("data/reports") if match_file(f)]
-    # social media
-    social_files = [f for f in os.listdir("data/social_media") if match_file(f)]
-
-    return {
-        "news": [f"data/news/{f}" for f in news_files],
-        "reports": [f"data/reports/{f}" for f in report_files],
-        "social": [f"data/social_media/{f}" for f in social_files]
-    }
-
-
-def load_json_file(path):
-    """Safely load JSON; returns None if fails."""
-    try:
-        with open(path) as f:
-            return json.load(f)
-    except:
-        return None
+store = get_datastore()
 
 # ============================================================
 # LOAD ALL CORE DATA
 # ============================================================
 
-companies = load_json("data/companies")
+companies = store.companies()
 
-# Map company name to its JSON file
-company_list = {data["name"]: file for file, data in companies.items()}
+# Map company name to its company_id
+company_list = {data["name"]: cid for cid, data in companies.items()}
 
 # ============================================================
 # SELECT COMPANY
@@ -67,31 +23,18 @@ company_list = {data["name"]: file for file, data in companies.items()}
 st.title("🌍 Company ESG Dashboard")
 
 selected_company = st.selectbox("Select a Company", list(company_list.keys()))
-company_file = company_list[selected_company]
+company_id = company_list[selected_company]
 
-company = companies[company_file]
+company = companies[company_id]
 company_name = company["name"]
-company_id = company["company_id"]
 
 # ============================================================
-# AUTO-DETECT report, news, social files
+# LOAD report, news, social files for this company only
 # ============================================================
 
-detected = detect_files_for_company(company_name, company_id)
-
-report_files = detected["reports"]
-news_files = detected["news"]
-social_files = detected["social"]
-
-# Load them all
-reports = [load_json_file(p) for p in report_files]
-news_data = [load_json_file(p) for p in news_files]
-social_data = [load_json_file(p) for p in social_files]
-
-# Filter out None
-reports = [r for r in reports if r]
-news_data = [n for n in news_data if n]
-social_data = [s for s in social_data if s]
+reports = store.reports_for(company_id)
+news_data = store.news_for(company_id)
+social_data = store.social_for(company_id)
 
 # ============================================================
 # SECTION 1 — COMPANY OVERVIEW
@@ -111,6 +54,40 @@ with col2:
     st.subheader("Identifiers")
     st.json(company["identifiers"])
 
+agg = store.aggregates(company_id)
+m1, m2 = st.columns(2)
+m1.metric("Avg. news sentiment", "N/A" if agg["news_sentiment"] is None else f"{agg['news_sentiment']:.2f}")
+m2.metric("Avg. social sentiment", "N/A" if agg["social_sentiment"] is None else f"{agg['social_sentiment']:.2f}")
+
+b = agg["breakdown"]
+if b["positive"] + b["neutral"] + b["negative"]:
+    c1, c2 = st.columns(2)
+    with c1:
+        st.plotly_chart(pie_sentiment_breakdown(b["positive"], b["neutral"], b["negative"]),
+                        use_container_width=True)
+    with c2:
+        st.plotly_chart(bar_topics(agg["top_topics"]), use_container_width=True)
+
+    st.write("### Sentiment by Source")
+    st.dataframe(pd.DataFrame([
+        {"channel": ch, "source": src, "items": s["count"], "mean": s["mean"], "std": s["std"],
+         "median": s["quantiles"].get(0.5), "positive": s["positive"], "neutral": s["neutral"],
+         "negative": s["negative"]}
+        for (ch, src), s in agg["by_source"].items()
+    ]), use_container_width=True)
+
+    st.write("### Sentiment Over Time")
+    level = st.radio("Granularity", ["day", "week", "month"], index=2, horizontal=True)
+    channel = st.radio("Channel", ["all", "news", "social"], horizontal=True)
+    series = store.rollup(company_id).series(level, company_id=company_id,
+                                             channel=None if channel == "all" else channel)
+    if series.empty:
+        st.info("No dated sentiment for this selection.")
+    else:
+        st.plotly_chart(sentiment_timeseries(series["date"].astype(str).tolist(), series["mean"].tolist(),
+                                             title=f"Average sentiment per {level}"),
+                        use_container_width=True)
+
 st.markdown("---")
 
 # ============================================================
@@ -1,9 +1,9 @@
 import streamlit as st
-from utils.data_loader import load_json, load_company
+from utils.datastore import get_datastore
 
 st.title("🏢 Company Overview")
 
-companies = load_json("data/companies")
+companies = get_datastore().companies()
 
 company_names = {v["name"]: v for k, v in companies.items()}
 
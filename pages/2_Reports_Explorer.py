@@ -1,21 +1,25 @@
 import streamlit as st
-from utils.data_loader import load_json
+from utils.datastore import get_datastore
 
 st.title("📄 Sustainability Reports Explorer")
 
-reports = load_json("data/reports")
+store = get_datastore()
 
-selected_report = st.selectbox("Choose report", list(reports.keys()))
-report = reports[selected_report]
+selected_report = st.selectbox("Choose report", store.files("reports"))
+report = store.record("reports", selected_report)
+if report is None:
+    st.error(f"{selected_report} could not be loaded or failed schema validation.")
+    st.stop()
 
-st.subheader(report["company"] + " — " + str(report["year"]))
-st.write(report["overall_summary"])
+st.subheader(report.company + " — " + str(report.year))
+st.write(report.overall_summary)
 
 st.write("### Metrics")
-st.json(report["metrics"])
+st.json(report.metrics)
 
 st.write("### ESG Topics")
-st.json(report["esg_topics"])
+st.json(report.esg_topics)
 
 st.write("### Claims Made in Report")
-st.json(report["claims"])
+st.json([{"claim_id": c.claim_id, "text": c.text, "section": c.section, "confidence": c.confidence}
+         for c in report.claims])
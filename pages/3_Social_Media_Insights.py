@@ -1,20 +1,53 @@
 import streamlit as st
-from utils.data_loader import load_json
+from utils.datastore import get_datastore
+from utils.running_aggregates import get_running_aggregates
 
 st.title("💬 Social Media Insights")
 
-data = load_json("data/social_media")
+store = get_datastore()
 
-report = st.selectbox("Select dataset", list(data.keys()))
-social = data[report]
+report = st.selectbox("Select dataset", store.files("social"))
+social = store.record("social", report)
+if social is None:
+    st.error(f"{report} could not be loaded or failed schema validation.")
+    st.stop()
 
 st.write("### Sentiment Summary")
-st.json(social["aggregated_analysis"]["platform_sentiments"])
+st.json(social.aggregated.get("platform_sentiments", {}))
 
 st.write("### Top ESG Topics")
-st.json(social["aggregated_analysis"]["top_esg_topics"])
+st.json(social.aggregated.get("top_esg_topics", []))
+
+running = get_running_aggregates()
+running.sync()
+
+st.write("### Top ESG Topics Across All Datasets")
+top_n = st.slider("Topics shown", min_value=5, max_value=50, value=10, step=5)
+# bounded sketch: at most RUNNING_TOPIC_CAPACITY topics per group are tracked
+topics = running.topics(social.company_id, "social")
+st.caption(f"{topics.total} mentions; counts may be high by at most {topics.error_bound:.1f} "
+           f"({topics.capacity} topics tracked).")
+st.json(dict(topics.most_common(top_n)))
+
+st.write("### Running Totals Across All Datasets")
+st.json({
+    platform: {"posts_and_comments": s.count, "mean": s.mean, "std": s.std,
+               "min": s.min if s.count else None, "max": s.max if s.count else None,
+               "positive": s.positive, "neutral": s.neutral, "negative": s.negative}
+    for (_, _, platform), s in sorted(running.groups(social.company_id, "social").items())
+})
 
 st.write("### Raw Posts By Platform")
-for platform in social["platforms"]:
-    st.write(f"## {platform['platform']}")
-    st.json(platform["posts"])
+for platform in social.platforms:
+    st.write(f"## {platform.platform}")
+    st.json([{
+        "post_id": p.post_id,
+        "author": p.author,
+        "timestamp": p.timestamp,
+        "content": p.content,
+        "sentiment": p.sentiment,
+        "esg_topics": list(p.esg_topics),
+        "risk_signals": [{"type": r.type, "severity": r.severity} for r in p.risk_signals],
+        "comments": [{"author": c.author, "content": c.content, "sentiment": c.sentiment}
+                     for c in p.comments],
+    } for p in platform.posts])
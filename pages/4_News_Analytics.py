@@ -1,17 +1,38 @@
 import streamlit as st
-from utils.data_loader import load_json
+from utils.datastore import get_datastore
+from utils.running_aggregates import get_running_aggregates
 
 st.title("📰 News ESG Analytics")
 
-news = load_json("data/news")
+store = get_datastore()
 
-selected = st.selectbox("Select a company news file", list(news.keys()))
-news_file = news[selected]
+selected = st.selectbox("Select a company news file", store.files("news"))
+news_file = store.record("news", selected)
+if news_file is None:
+    st.error(f"{selected} could not be loaded or failed schema validation.")
+    st.stop()
 
-for source in news_file["news_sources"]:
-    st.header(source["source_name"])
-    for article in source["articles"]:
-        st.subheader(article["title"])
-        st.write(article["published_date"])
-        st.write(article["content_cleaned"])
-        st.json(article["analysis"])
+st.write("### Top ESG Topics Across All News")
+running = get_running_aggregates()
+running.sync()
+top_n = st.slider("Topics shown", min_value=5, max_value=50, value=10, step=5)
+# bounded sketch: at most RUNNING_TOPIC_CAPACITY topics per group are tracked
+topics = running.topics(news_file.company_id, "news")
+st.caption(f"{topics.total} mentions; counts may be high by at most {topics.error_bound:.1f} "
+           f"({topics.capacity} topics tracked).")
+st.json(dict(topics.most_common(top_n)))
+
+for source in news_file.sources:
+    st.header(source.source_name)
+    for article in source.articles:
+        st.subheader(article.title)
+        st.write(article.published_date)
+        st.write(article.content)
+        st.json({
+            "sentiment": article.sentiment,
+            "stance": article.stance,
+            "summary": article.summary,
+            "esg_category": article.esg_category,
+            "esg_topics": list(article.esg_topics),
+            "risk_signals": [{"type": r.type, "severity": r.severity} for r in article.risk_signals],
+        })
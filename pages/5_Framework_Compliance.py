@@ -1,22 +1,49 @@
 import streamlit as st
-from utils.data_loader import load_json
+from utils.alignment import align_reports
+from utils.datastore import get_datastore
 
 st.title("📘 ESG Framework Compliance")
 
-reports = load_json("data/reports")
-company = st.selectbox("Select report", list(reports.keys()))
+store = get_datastore()
+company = st.selectbox("Select report", store.files("reports"))
 
-report = reports[company]
+report = store.record("reports", company)
+if report is None:
+    st.error(f"{company} could not be loaded or failed schema validation.")
+    st.stop()
 
 st.write("### GRI Alignment")
-st.json(report["framework_alignment"].get("GRI", {}))
+st.json(report.framework_alignment.get("GRI", {}))
 
 st.write("### UNSDG Alignment")
-st.json(report["framework_alignment"].get("UNSDG", {}))
+st.json(report.framework_alignment.get("UNSDG", {}))
 
 st.write("### SASB Alignment")
-st.json(report["framework_alignment"].get("SASB", {}))
+st.json(report.framework_alignment.get("SASB", {}))
 
-if "LOCAL_COMPLIANCE" in report["framework_alignment"]:
+if "LOCAL_COMPLIANCE" in report.framework_alignment:
     st.write("### Local ESG Compliance")
-    st.json(report["framework_alignment"]["LOCAL_COMPLIANCE"])
+    st.json(report.framework_alignment["LOCAL_COMPLIANCE"])
+
+st.markdown("---")
+st.header("Computed Alignment")
+
+# only reports or registries changed since the last run are re-aligned
+run = align_reports()
+if not run.registries:
+    st.info("No framework registries found in the frameworks folder.")
+    st.stop()
+st.caption(f"{run.computed} report/framework pairs aligned, {run.cached} from cache "
+           f"({run.seconds:.2f}s)")
+
+st.subheader("Corpus Coverage")
+st.dataframe(run.stats_frame(), use_container_width=True)
+
+framework = st.radio("Framework", list(run.registries), horizontal=True)
+c1, c2 = st.columns(2)
+with c1:
+    st.write(f"### Most Covered {framework} Items")
+    st.dataframe(run.item_frame(framework), use_container_width=True)
+with c2:
+    st.write(f"### {company}")
+    st.json(run.alignments.get(company, {}).get(framework, {}))
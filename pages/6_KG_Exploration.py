@@ -70,7 +70,9 @@ from datetime import datetime
 import random
 
 from utils.config import MERGED_GRAPH_JSON, KG_DIR
-from utils.graph_utils import load_graph_json, graph_json_to_networkx, save_graph_json, structural_summary
+from utils.graph_utils import structural_summary
+from utils.graph_store import GraphStore, journal_path
+from utils.entity_resolution import RESOLVED_TYPES, apply_merges, find_duplicates, read_resolution_log
 
 # -----------------------------
 # Page config
@@ -88,14 +90,21 @@ if not MERGED_GRAPH_JSON.exists():
     )
     st.stop()
 
-graph_data = load_graph_json(MERGED_GRAPH_JSON)
-if not graph_data or not graph_data.get("nodes") or not graph_data.get("edges"):
+@st.cache_resource(show_spinner="Indexing graph...")
+def load_graph_store(mtime_ns: int) -> GraphStore:
+    # one indexed store per version of the file; merges update it in place and go to its journal
+    return GraphStore.load(MERGED_GRAPH_JSON)
+
+@st.cache_resource(show_spinner=False)
+def store_networkx(_store: GraphStore, mtime_ns: int, version: int) -> nx.DiGraph:
+    # the whole graph as NetworkX, built only for the global view
+    return _store.to_networkx()
+
+store = load_graph_store(MERGED_GRAPH_JSON.stat().st_mtime_ns)
+if not store.nodes or not store.edge_count:
     st.warning("The merged_graph.json exists but appears empty (no nodes/edges). Run the graph builder.")
     st.stop()
 
-# Build NetworkX DiGraph
-G = graph_json_to_networkx(graph_data)
-
 # -----------------------------
 # Helper functions
 # -----------------------------
@@ -151,52 +160,6 @@ def log_merge(old_node: str, new_node: str, merge_log_path: Path = None):
     with open(merge_log_path, "a", encoding="utf-8") as log:
         log.write(f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')} | {old_node} -> {new_node}\n")
 
-def merge_nodes_in_graph_data(graph_data: dict, old_node: str, new_node: str) -> (dict, bool):
-    """
-    Merge old_node into new_node in the raw graph_data structure (nodes dict + edges list).
-    Returns (updated_graph_data, merged_flag)
-    """
-    nodes = graph_data.get("nodes", {})
-    edges = graph_data.get("edges", [])
-
-    if old_node not in nodes or new_node not in nodes:
-        return graph_data, False
-
-    # Merge properties and domain
-    old_props = nodes[old_node].get("properties", {})
-    new_props = nodes[new_node].get("properties", {})
-    merged_props = dict(new_props)  # copy
-    merged_props.update(old_props)
-    nodes[new_node]["properties"] = merged_props
-
-    if not nodes[new_node].get("domain") and nodes[old_node].get("domain"):
-        nodes[new_node]["domain"] = nodes[old_node].get("domain")
-
-    # Redirect edges
-    for e in edges:
-        if e.get("source") == old_node:
-            e["source"] = new_node
-        if e.get("target") == old_node:
-            e["target"] = new_node
-
-    # Remove old node
-    del nodes[old_node]
-
-    # Remove potential duplicate edges (optional: dedupe)
-    seen = set()
-    deduped = []
-    for e in edges:
-        key = (e.get("source"), e.get("target"), e.get("type"))
-        if key not in seen:
-            deduped.append(e)
-            seen.add(key)
-    graph_data["edges"] = deduped
-    graph_data["nodes"] = nodes
-
-    # log
-    log_merge(old_node, new_node)
-    return graph_data, True
-
 # -----------------------------
 # Sidebar: Filters & Controls
 # -----------------------------
@@ -204,13 +167,13 @@ st.sidebar.header("🔎 Search & Filters")
 
 search_query = st.sidebar.text_input("Search entity name or definition:")
 # domain choices from graph_data nodes
-domain_choices = sorted({props.get("domain", "Unknown") for props in graph_data["nodes"].values()})
+domain_choices = sorted({props.get("domain", "Unknown") for props in store.nodes.values()})
 selected_domain = st.sidebar.selectbox("Filter by domain", ["All"] + domain_choices)
 show_relations = st.sidebar.checkbox("Show relation labels", value=True)
 view_mode = st.sidebar.radio("View mode", ["Global Graph", "Company Subgraph", "Filtered Subgraph"])
 
 # company list extracted from Organization nodes
-org_nodes = [n for n, p in graph_data["nodes"].items() if p.get("type", "").lower() in ("organization", "company", "corporate")]
+org_nodes = [n for n, p in store.nodes.items() if p.get("type", "").lower() in ("organization", "company", "corporate")]
 org_nodes_sorted = sorted(org_nodes)
 
 selected_company = None
@@ -221,16 +184,15 @@ radius = st.sidebar.slider("Ego radius (company subgraph)", min_value=1, max_val
 
 st.sidebar.markdown("---")
 st.sidebar.subheader("🧠 Manual Merge QA")
-all_nodes_sorted = sorted(list(graph_data["nodes"].keys()))
+all_nodes_sorted = sorted(list(store.nodes.keys()))
 
 old_node = st.sidebar.selectbox("Merge this node (old/duplicate)", [""] + all_nodes_sorted, key="old_node")
 new_node = st.sidebar.selectbox("Into this node (canonical)", [""] + all_nodes_sorted, key="new_node")
 if st.sidebar.button("🔄 Merge Nodes"):
     if old_node and new_node and old_node != new_node:
-        graph_data, merged = merge_nodes_in_graph_data(graph_data, old_node, new_node)
-        if merged:
-            save_graph_json(graph_data, MERGED_GRAPH_JSON)
-            st.sidebar.success(f"Merged '{old_node}' → '{new_node}'. Saved to {MERGED_GRAPH_JSON}")
+        if store.merge_nodes(old_node, new_node):
+            log_merge(old_node, new_node)
+            st.sidebar.success(f"Merged '{old_node}' → '{new_node}'. Recorded in {store.journal}")
             st.experimental_rerun()
         else:
             st.sidebar.error("Merge failed — nodes not found.")
@@ -238,8 +200,55 @@ if st.sidebar.button("🔄 Merge Nodes"):
         st.sidebar.warning("Select two distinct nodes to merge.")
 
 if st.sidebar.button("🔁 Refresh Graph (reload file)"):
+    load_graph_store.clear()
     st.experimental_rerun()
 
+journal_file = journal_path(MERGED_GRAPH_JSON)
+if journal_file.exists():
+    st.sidebar.caption(f"Curation journal: {journal_file.stat().st_size / 1024:.1f} KB "
+                       "(folded into the graph automatically when it grows large)")
+    if st.sidebar.button("🗜 Compact journal into graph"):
+        store.compact(MERGED_GRAPH_JSON)
+        load_graph_store.clear()
+        st.sidebar.success("Journal folded into merged_graph.json.")
+        st.experimental_rerun()
+
+st.sidebar.markdown("---")
+st.sidebar.subheader("🧩 Entity Resolution")
+er_types = st.sidebar.multiselect("Node types", list(RESOLVED_TYPES), default=list(RESOLVED_TYPES))
+er_threshold = st.sidebar.slider("Similarity threshold", min_value=0.5, max_value=1.0, value=0.85, step=0.05)
+er_containment = st.sidebar.slider("Containment threshold", min_value=0.3, max_value=1.0, value=0.6, step=0.05,
+                                   help="Minimum similarity when one name is the other plus one word (Emissions / CO2 emissions)")
+if st.sidebar.button("🔍 Find duplicate nodes"):
+    with st.spinner("Resolving entities..."):
+        st.session_state["er_run"] = find_duplicates(store, types=er_types, threshold=er_threshold,
+                                                     containment_threshold=er_containment)
+
+# -----------------------------
+# Entity resolution review
+# -----------------------------
+er_run = st.session_state.get("er_run")
+if er_run is not None:
+    with st.expander(f"🧩 Proposed merges — {len(er_run.candidates)} in {len(er_run.clusters)} clusters", expanded=True):
+        st.caption(f"{er_run.nodes} nodes, {er_run.candidate_pairs} candidate pairs after blocking, "
+                   f"{er_run.accepted_pairs} accepted, {er_run.skipped_blocks} oversized buckets skipped "
+                   f"({er_run.seconds:.2f}s). Untick rows to keep those nodes apart.")
+        proposals = er_run.frame()
+        if proposals.empty:
+            st.info("No duplicates found at these thresholds.")
+        else:
+            proposals.insert(0, "apply", True)
+            reviewed = st.data_editor(proposals, hide_index=True, use_container_width=True,
+                                      disabled=[c for c in proposals.columns if c != "apply"], key="er_review")
+            if st.button("✅ Apply selected merges"):
+                applied = apply_merges(store, er_run, accepted=reviewed.loc[reviewed["apply"], "node"])
+                del st.session_state["er_run"]
+                st.success(f"Applied {applied} merges. Recorded in {store.journal}")
+                st.experimental_rerun()
+if st.session_state.get("er_run") is not None or st.sidebar.checkbox("Show entity resolution log"):
+    with st.expander("📜 Entity resolution log"):
+        st.dataframe(read_resolution_log(), use_container_width=True)
+
 # Flashcards block (if flashcards.json exists)
 st.sidebar.markdown("---")
 st.sidebar.subheader("🃏 Flashcard Review")
@@ -267,7 +276,7 @@ else:
 # Build subgraph H based on filters
 # -----------------------------
 filtered_nodes = []
-for node, props in G.nodes(data=True):
+for node, props in store.node_items():
     matches_search = True
     if search_query:
         sq = search_query.lower()
@@ -279,23 +288,23 @@ for node, props in G.nodes(data=True):
 
 # Handle view modes
 if view_mode == "Company Subgraph" and selected_company:
-    if selected_company not in G:
+    if selected_company not in store:
         st.warning(f"Selected company '{selected_company}' not present in graph.")
-        H = G.subgraph(filtered_nodes).copy() if filtered_nodes else nx.DiGraph()
+        H = store.to_networkx(filtered_nodes)
     else:
-        # ego_graph gives neighbours within radius
-        H = nx.ego_graph(G, selected_company, radius=radius, undirected=False, center=True).copy()
+        # neighbours within radius, read from the store's adjacency index
+        H = store.to_networkx(store.ego(selected_company, radius=radius))
         # allow search + domain filtering on H
         if search_query or selected_domain != "All":
             nodes_to_keep = [n for n, p in H.nodes(data=True)
                              if ((search_query.lower() in n.lower() or search_query.lower() in str(p.get("definition","")).lower()) if search_query else True)
                              and (selected_domain == "All" or p.get("domain","") == selected_domain)]
-            H = G.subgraph(nodes_to_keep).copy()
+            H = store.to_networkx(nodes_to_keep)
 elif view_mode == "Filtered Subgraph":
-    H = G.subgraph(filtered_nodes).copy()
+    H = store.to_networkx(filtered_nodes)
 else:
     # Global
-    H = G.copy()
+    H = store_networkx(store, MERGED_GRAPH_JSON.stat().st_mtime_ns, store.version)
 
 if H.number_of_nodes() == 0:
     st.warning("No nodes match your filters — try widening search or removing domain filter.")
@@ -337,7 +346,7 @@ st.subheader("📌 Node Details (select from displayed nodes)")
 displayed_nodes = sorted(list(H.nodes()))
 sel_node = st.selectbox("Choose a node to inspect", [""] + displayed_nodes)
 if sel_node:
-    props = G.nodes[sel_node]
+    props = store.nodes.get(sel_node, {})
     st.markdown(f"**Entity:** {sel_node}")
     st.markdown(f"**Type:** {props.get('type', 'N/A')}")
     st.markdown(f"**Domain:** {props.get('domain', 'N/A')}")
@@ -349,11 +358,9 @@ if sel_node:
 
     # show neighbors
     st.markdown("**Outgoing relations**")
-    outs = list(G.out_edges(sel_node, data=True))
-    st.write([{"target": t, "relation": d.get("type")} for _, t, d in outs][:50])
+    st.write([{"target": e.get("target"), "relation": e.get("type")} for e in store.out_edges(sel_node)[:50]])
 
     st.markdown("**Incoming relations**")
-    ins = list(G.in_edges(sel_node, data=True))
-    st.write([{"source": s, "relation": d.get("type")} for s, _, d in ins][:50])
+    st.write([{"source": e.get("source"), "relation": e.get("type")} for e in store.in_edges(sel_node)[:50]])
 
 st.caption("Tip: Use the sidebar to merge duplicate nodes or to drill down by company or domain.")
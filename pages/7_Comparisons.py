@@ -1,17 +1,55 @@
 import streamlit as st
-from utils.data_loader import load_json
+from utils.datastore import get_datastore
 
 st.title("📊 Cross-Company Comparison")
 
-reports = load_json("data/reports")
+store = get_datastore()
 
-companies = list(reports.keys())
-a = st.selectbox("Company A Report", companies)
-b = st.selectbox("Company B Report", companies)
+result = store.comparison()
+# reports that are missing or fail validation have no record and are left out of the matrix
+invalid = [f for f in store.files("reports") if store.record("reports", f) is None]
+if invalid:
+    st.error(f"{len(invalid)} report(s) could not be loaded and are not compared: {', '.join(invalid)}")
+if result.matrix.empty or not result.metrics:
+    st.warning("No report metrics found to compare.")
+    st.stop()
 
-report_a = reports[a]
-report_b = reports[b]
+group_by = st.radio("Peer group", ["sector", "industry"], horizontal=True)
 
-st.subheader("CO2 Emissions (Scope 1)")
-st.write(f"{report_a['company']}: {report_a['metrics'].get('co2_scope1_tonnes','N/A')}")
-st.write(f"{report_b['company']}: {report_b['metrics'].get('co2_scope1_tonnes','N/A')}")
+st.subheader("Metric Benchmark")
+metric = st.selectbox("Metric", result.metrics)
+st.dataframe(result.metric_table(metric, group_by), use_container_width=True)
+
+st.subheader(f"{group_by.title()} Statistics")
+stats = result.peer_stats[group_by].xs(metric, level="metric")
+st.dataframe(stats[stats["count"] > 0], use_container_width=True)
+
+st.subheader("Company Profile")
+names = result.profiles["name"].to_dict()
+company_id = st.selectbox("Company", list(names), format_func=lambda cid: names.get(cid) or cid)
+st.dataframe(result.company_profile(company_id, group_by), use_container_width=True)
+
+st.subheader("Full Metric Matrix")
+st.dataframe(result.matrix.rename(index=names), use_container_width=True)
+
+st.subheader("Portfolio Risk Signals")
+risk = store.risk_index()
+if not len(risk):
+    st.info("No risk signals found in news or social data.")
+else:
+    c1, c2, c3 = st.columns(3)
+    with c1:
+        risk_types = st.multiselect("Signal type", risk.labels["type"])
+    with c2:
+        min_severity = st.select_slider("Minimum severity", ["low", "medium", "high"], value="high")
+    with c3:
+        window = st.number_input("Last N days (0 = all)", min_value=0, value=30, step=1)
+    as_of = st.date_input("As of", value=risk.latest() or None)
+    filters = dict(type=risk_types or None, min_severity=min_severity)
+    if window:
+        filters.update(last_days=int(window), as_of=as_of)
+    signals = risk.query(**filters)
+    signals["company"] = signals["company_id"].map(names)
+    st.write(f"{len(signals)} signals")
+    st.dataframe(risk.counts(by=("company", "type", "severity"), **filters), use_container_width=True)
+    st.dataframe(signals, use_container_width=True)
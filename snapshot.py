@@ -0,0 +1,14 @@
+import argparse
+from pathlib import Path
+from utils.snapshot import build_snapshot
+from utils.config import SNAPSHOT_FILE
+
+parser = argparse.ArgumentParser(description="Compile the ESG corpus into a memory-mappable snapshot.")
+parser.add_argument("--output", type=Path, default=SNAPSHOT_FILE, help=f"snapshot path (default: {SNAPSHOT_FILE})")
+args = parser.parse_args()
+
+print("🔄 Compiling corpus snapshot...")
+stats = build_snapshot(args.output)
+for k, v in stats.items():
+    print(f"   {k}: {v}")
+print(f"✅ Done! Snapshot written to {args.output}")
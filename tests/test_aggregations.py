@@ -0,0 +1,154 @@
+import json
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from utils.aggregations import (aggregate_sentiment_from_news, aggregate_sentiment_from_social, collect_topic_counts,
+                                sentiment_columns, sentiment_columns_from_tables, sentiment_overview,
+                                summarize_sentiment, TopicSketch)
+from utils.data_loader import load_companies, load_news, load_reports, load_social_media
+from utils.event_store import build_event_tables
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    news, social = load_news(), load_social_media()
+    return news, social, build_event_tables(load_companies(), load_reports(), news, social)
+
+
+def test_table_path_matches_document_path(corpus):
+    news, social, tables = corpus
+    for doc in news.values():
+        assert aggregate_sentiment_from_news(tables=tables, company_id=doc["company_id"]) == \
+            pytest.approx(aggregate_sentiment_from_news(doc))
+    for doc in social.values():
+        assert aggregate_sentiment_from_social(tables=tables, company_id=doc["company_id"]) == \
+            pytest.approx(aggregate_sentiment_from_social(doc))
+
+
+def test_topic_counts_from_tables(corpus):
+    news, _, tables = corpus
+    doc = next(iter(news.values()))
+    from_docs = dict(collect_topic_counts([doc]))
+    from_tables = dict(collect_topic_counts(tables=tables, company_id=doc["company_id"], record_tables=["articles"]))
+    assert from_tables == from_docs
+
+
+def test_unknown_table_source_rejected(corpus):
+    from utils.aggregations import _sentiment_from_tables
+    with pytest.raises(ValueError):
+        _sentiment_from_tables(corpus[2], "reports", None)
+
+
+def _docs():
+    news = {"company_id": "CMPA", "news_sources": [
+        {"source_name": "Wire", "articles": [
+            {"article_id": "a1", "analysis": {"sentiment": 0.6, "esg_topics": ["Emissions", "Water"]}},
+            {"article_id": "a2", "analysis": {"sentiment": -0.4, "esg_topics": ["Emissions"]}},
+            {"article_id": "a3", "analysis": {"esg_topics": ["Water"]}}]},  # unscored
+        {"source_name": "Daily", "articles": [
+            {"article_id": "a4", "analysis": {"sentiment": 0.02, "esg_topics": ["Board"]}}]}]}
+    social = {"company_id": "CMPA", "platforms": [
+        {"platform": "Twitter", "posts": [
+            {"post_id": "p1", "analysis": {"sentiment": 0.2, "esg_topics": ["Water"]},
+             "comments": [{"analysis": {"sentiment": -0.8}}, {"analysis": {"sentiment": 1.0}}]}]}]}
+    return news, social
+
+
+def test_summarize_sentiment_matches_plain_statistics():
+    news, social = _docs()
+    cols = sentiment_columns([news], [social])
+    assert len(cols) == 7  # four articles, one post and its two comments
+    out = summarize_sentiment(cols, by=("channel", "source"), quantiles=(0.5,))
+    values = {("news", "Wire"): [0.6, -0.4], ("news", "Daily"): [0.02], ("social", "Twitter"): [0.2, -0.8, 1.0]}
+    assert set(out) == set(values)
+    for key, v in values.items():
+        g = out[key]
+        assert g["count"] == len(v)
+        assert g["mean"] == pytest.approx(np.mean(v)) and g["std"] == pytest.approx(np.std(v))
+        assert (g["min"], g["max"]) == (min(v), max(v))
+        assert g["quantiles"][0.5] == pytest.approx(np.median(v))
+        assert g["positive"] + g["neutral"] + g["negative"] == len(v)
+    assert (out[("news", "Daily")]["neutral"], out[("social", "Twitter")]["negative"]) == (1, 1)
+    # the unscored article is left out of the statistics but its topics still count
+    assert out[("news", "Wire")]["topics"] == [("Emissions", 2), ("Water", 2)]
+    assert out[("social", "Twitter")]["topics"] == [("Water", 1)]
+
+
+def test_summarize_sentiment_overall_and_top_topics():
+    news, social = _docs()
+    cols = sentiment_columns([news], [social])
+    overall = summarize_sentiment(cols, by=(), top_topics=1)[()]
+    assert overall["count"] == 6 and overall["topics"] == [("Water", 3)]
+    overview = sentiment_overview(cols)
+    assert overview["news_sentiment"] == pytest.approx((0.6 - 0.4 + 0.02) / 3)
+    assert overview["social_sentiment"] == pytest.approx((0.2 - 0.8 + 1.0) / 3)
+    assert overview["top_topics"] == [("Water", 3), ("Emissions", 2), ("Board", 1)]
+
+
+def test_columns_from_tables_match_documents(corpus):
+    news, social, tables = corpus
+    from_docs = summarize_sentiment(sentiment_columns(news.values(), social.values()))
+    from_tables = summarize_sentiment(sentiment_columns_from_tables(tables))
+    assert from_docs.keys() == from_tables.keys()
+    for key, stats in from_docs.items():
+        other = from_tables[key]
+        assert other["count"] == stats["count"] and other["mean"] == pytest.approx(stats["mean"])
+        assert dict(other["topics"]) == dict(stats["topics"])
+
+
+def _zipf_stream(n, topics, seed):
+    rnd = np.random.default_rng(seed)
+    weights = 1.0 / np.arange(1, topics + 1)
+    return [f"t{i}" for i in rnd.choice(topics, n, p=weights / weights.sum())]
+
+
+def _check_bounds(sketch, truth):
+    truth = Counter(truth)
+    for t, c in sketch.most_common():
+        assert truth[t] <= c <= truth[t] + sketch.error_bound
+        assert c - sketch.errors[t] <= truth[t]
+    # every topic above total / capacity is tracked
+    assert {t for t, c in truth.items() if c > sketch.error_bound} <= set(sketch.counts)
+
+
+def test_topic_sketch_is_exact_within_capacity():
+    stream = _zipf_stream(500, 20, seed=1)
+    sketch = TopicSketch(20)
+    sketch.update(stream)
+    assert dict(sketch.most_common()) == dict(Counter(stream))
+    assert sketch.error_bound == 25 and not any(sketch.errors.values())
+
+
+def test_topic_sketch_bounds_and_merge():
+    a_stream, b_stream = _zipf_stream(5000, 400, seed=2), _zipf_stream(3000, 400, seed=3)
+    a, b = TopicSketch(40), TopicSketch(40)
+    a.update(a_stream)
+    b.update(b_stream)
+    _check_bounds(a, a_stream)
+    _check_bounds(b, b_stream)
+    merged = TopicSketch.from_dict(a.to_dict()).merge(b)
+    assert merged.total == 8000 and len(merged.counts) <= 40
+    _check_bounds(merged, a_stream + b_stream)
+
+
+def test_topic_sketch_guaranteed_ranks_are_certain():
+    stream = _zipf_stream(5000, 400, seed=4)
+    sketch = TopicSketch(40)
+    sketch.update(stream)
+    truth = Counter(stream)
+    for n in (1, 3, 10):
+        sure = dict(sketch.guaranteed(n))
+        assert sure and len(sure) <= n
+        others = [c for t, c in truth.items() if t not in dict(sketch.most_common(n))]
+        assert all(truth[t] >= max(others) for t in sure)
+
+
+def test_topic_sketch_round_trip():
+    sketch = TopicSketch(10)
+    sketch.update(_zipf_stream(300, 50, seed=5))
+    back = TopicSketch.from_dict(json.loads(json.dumps(sketch.to_dict())))
+    assert back.most_common() == sketch.most_common() and back.errors == sketch.errors
+    back.add("new")
+    assert back.total == sketch.total + 1
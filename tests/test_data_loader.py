@@ -0,0 +1,20 @@
+from utils.data_loader import company_name_for, iter_json_files, load_news, load_reports, load_social_media
+from utils.config import REPORTS_DIR
+
+
+def test_company_name_for_shipped_companies():
+    assert company_name_for("CMPA") == "Company A"
+    assert company_name_for("NOPE") is None
+
+
+def test_flat_layout_filters_by_company_id():
+    # flat files are named after the company ("companyA_..."), not its id
+    assert list(load_reports(company_id="CMPA")) == ["companyA_2023_report.json"]
+    assert list(load_news(company_id="CMPA", year=2024)) == ["news_2024_companyA.json"]
+    assert list(load_social_media(company_id="CMPB")) == ["socialMedia_2024_companyB.json"]
+    assert load_reports(company_id="NOPE") == {}
+
+
+def test_explicit_company_name_wins():
+    keys = [k for k, _ in iter_json_files(REPORTS_DIR, company_id="CMPA", company_name="Company B")]
+    assert keys == ["companyB_2023_report.json"]
@@ -0,0 +1,127 @@
+import pytest
+
+import utils.datastore as datastore
+from utils.data_loader import corpus_version
+from utils.snapshot import CorpusSnapshot, build_snapshot
+
+
+@pytest.fixture(scope="module")
+def snapshot_path(tmp_path_factory):
+    path = tmp_path_factory.mktemp("snap") / "corpus.esgsnap"
+    build_snapshot(path)
+    return path
+
+
+def test_snapshot_records_corpus_version(snapshot_path):
+    assert CorpusSnapshot(snapshot_path).corpus_version == corpus_version()
+
+
+def test_snapshot_freshness_follows_corpus_version(snapshot_path, monkeypatch):
+    snap = CorpusSnapshot(snapshot_path)
+    monkeypatch.setattr(datastore, "load_snapshot", lambda: snap)
+    monkeypatch.setattr(datastore, "WATCH_INTERVAL_SECONDS", 0)
+    store = datastore.ESGDataStore()
+    assert store._snapshot() is snap
+
+    # a file rewritten in place changes the version but not any folder mtime
+    monkeypatch.setattr(datastore, "corpus_version", lambda: "changed")
+    assert store._snapshot() is None
+    assert store._snapshot_stale
+
+    # a rebuilt snapshot of the current files is used again
+    rebuilt = CorpusSnapshot(snapshot_path)
+    rebuilt.built_at_ns += 1
+    rebuilt.corpus_version = "changed"
+    monkeypatch.setattr(datastore, "load_snapshot", lambda: rebuilt)
+    assert store._snapshot() is rebuilt
+    assert not store._snapshot_stale
+
+
+def test_companies_reload_on_in_place_rewrite(monkeypatch):
+    monkeypatch.setattr(datastore, "load_snapshot", lambda: None)
+    monkeypatch.setattr(datastore, "WATCH_INTERVAL_SECONDS", 0)
+    versions = iter(["v1", "v1", "v2"])
+    monkeypatch.setattr(datastore, "corpus_version", lambda folders=None: next(versions))
+    loads = []
+    real = datastore.load_folder
+    monkeypatch.setattr(datastore, "load_folder", lambda folder: loads.append(folder) or real(folder))
+    store = datastore.ESGDataStore()
+    assert "CMPA" in store.companies()
+    store.companies()
+    assert len(loads) == 1
+    store.companies()
+    assert len(loads) == 2
+
+
+def test_companies_checked_at_most_every_interval(monkeypatch):
+    monkeypatch.setattr(datastore, "load_snapshot", lambda: None)
+    monkeypatch.setattr(datastore, "WATCH_INTERVAL_SECONDS", 3600)
+    calls = []
+    real = datastore.corpus_version
+    monkeypatch.setattr(datastore, "corpus_version", lambda folders=None: calls.append(folders) or real(folders))
+    store = datastore.ESGDataStore()
+    for cid in store.companies():
+        store.company(cid)
+    assert len(calls) == 1
+
+
+def test_clear_drops_comparison_and_risk_index(monkeypatch):
+    monkeypatch.setattr(datastore, "load_snapshot", lambda: None)
+    store = datastore.ESGDataStore()
+    first, risk = store.comparison(), store.risk_index()
+    store.clear()
+    assert store._comparison is None and store._risk is None
+    assert store.comparison() is not first and store.risk_index() is not risk
+
+
+def test_corpus_version_checked_at_most_every_interval(monkeypatch):
+    monkeypatch.setattr(datastore, "load_snapshot", lambda: None)
+    monkeypatch.setattr(datastore, "WATCH_INTERVAL_SECONDS", 3600)
+    calls = []
+    real = datastore.corpus_version
+    monkeypatch.setattr(datastore, "corpus_version",
+                        lambda *folders: calls.append(folders) or real(*folders))
+    store = datastore.ESGDataStore()
+    store.companies()
+    result, risk = store.comparison(), store.risk_index()
+    for _ in range(3):
+        assert store.comparison() is result and store.risk_index() is risk
+    assert calls.count(()) == 1
+
+    # the watcher's invalidation forces the next check
+    store.invalidate(store.files("news")[0])
+    store.comparison()
+    assert calls.count(()) == 2
+
+
+def test_risk_index_rebuild_reads_each_file_once(snapshot_path, monkeypatch):
+    monkeypatch.setattr(datastore, "load_snapshot", lambda: None)
+    store = datastore.ESGDataStore()
+    # a file naming several companies is matched to each of them
+    shared = {k: sorted({p for cid in store.companies() for p in store.files_for(cid)[k]})
+              for k in ("news", "social")}
+    monkeypatch.setattr(store, "files_for", lambda cid: shared)
+    reads = []
+    real = store._get
+    monkeypatch.setattr(store, "_get", lambda path, *a, **k: reads.append(path) or real(path, *a, **k))
+    index = store.risk_index()
+    assert reads and len(reads) == len(set(reads))
+    assert len(index) == len(CorpusSnapshot(snapshot_path).risk_index())
+
+
+def test_snapshot_aggregates_match_live(snapshot_path, monkeypatch):
+    monkeypatch.setattr(datastore, "load_snapshot", lambda: None)
+    store = datastore.ESGDataStore()
+    snap = CorpusSnapshot(snapshot_path)
+    for cid in store.companies():
+        live, mapped = store.aggregates(cid), snap.aggregates(cid)
+        assert mapped["news_sentiment"] == pytest.approx(live["news_sentiment"])
+        assert mapped["social_sentiment"] == pytest.approx(live["social_sentiment"])
+        assert mapped["breakdown"] == live["breakdown"]
+        assert dict(mapped["top_topics"]) == dict(live["top_topics"])
+        assert mapped["by_source"].keys() == live["by_source"].keys()
+        for key, stats in live["by_source"].items():
+            got = mapped["by_source"][key]
+            assert got["count"] == stats["count"] and got["mean"] == pytest.approx(stats["mean"])
+            assert dict(got["topics"]) == dict(stats["topics"])
+        assert any(stats["topics"] for stats in mapped["by_source"].values())
@@ -0,0 +1,75 @@
+from utils.entity_resolution import apply_merges, find_duplicates, normalize_name, read_resolution_log
+from utils.graph_store import GraphStore
+
+
+def _graph():
+    topics = ["Emissions", "emission", "CO2 emissions", "GHG Emissions", "Scope 1", "Scope 2",
+              "Scope 1 emissions", "Water usage", "Water Use", "Board diversity", "Biodiversity"]
+    orgs = ["Acme Corp", "Acme Corporation", "ACME", "Company A", "Company B", "Globex Holdings Ltd"]
+    nodes = {t: {"type": "ESG Topic"} for t in topics}
+    nodes.update({o: {"type": "Organization"} for o in orgs})
+    nodes["Metric A"] = {"type": "Metric"}
+    edges = [{"source": o, "target": t, "type": "discusses"} for o in ("Acme Corp", "Company A") for t in topics]
+    edges.append({"source": "ACME", "target": "Emissions", "type": "discusses"})
+    return {"nodes": nodes, "edges": edges}
+
+
+def _pairs(run):
+    return {(m.node, m.canonical) for m in run.candidates}
+
+
+def test_normalize_name():
+    assert normalize_name("The Emissions of CO2") == ("emission", "co2")
+    assert normalize_name("Injuries") == ("injury",)
+    assert normalize_name("Acme Holdings Ltd", "Organization") == ("acme",)
+    assert normalize_name("Acme Holdings Ltd", "ESG Topic") == ("acme", "holding", "ltd")
+    assert normalize_name("Group", "Organization") == ("group",)
+
+
+def test_duplicates_found_within_type():
+    run = find_duplicates(_graph())
+    pairs = _pairs(run)
+    assert ("emission", "Emissions") in pairs
+    assert ("Acme Corporation", "Acme Corp") in pairs and ("ACME", "Acme Corp") in pairs
+    assert all(m.type in ("ESG Topic", "Organization") for m in run.candidates)
+    assert all(m.node != "Metric A" and m.canonical != "Metric A" for m in run.candidates)
+    # canonical is the best-connected node of its cluster
+    store = GraphStore.from_json(_graph())
+    for cluster in run.clusters:
+        assert all(store.degree(cluster.canonical) >= store.degree(m.node) for m in cluster.members)
+    assert run.nodes == 17 and run.candidate_pairs >= run.accepted_pairs > 0
+
+
+def test_numbers_and_letters_keep_names_apart():
+    run = find_duplicates(_graph())
+    pairs = _pairs(run)
+    for a, b in (("Scope 1", "Scope 2"), ("Company A", "Company B"), ("Board diversity", "Biodiversity")):
+        assert (a, b) not in pairs and (b, a) not in pairs
+    # not even through a shared neighbour: "Scope 1 emissions" joins Scope 1 only
+    assert ("Scope 1 emissions", "Scope 1") in pairs
+    for cluster in run.clusters:
+        members = {cluster.canonical} | {m.node for m in cluster.members}
+        assert not {"Scope 1", "Scope 2"} <= members and not {"Company A", "Company B"} <= members
+
+
+def test_oversized_token_blocks_are_skipped():
+    nodes = {f"Water topic {i}": {"type": "ESG Topic"} for i in range(30)}
+    run = find_duplicates({"nodes": nodes, "edges": []}, max_block=10)
+    assert run.skipped_blocks >= 1
+    assert run.candidate_pairs < 30 * 29 // 2
+
+
+def test_apply_merges_logs_every_proposal(tmp_path):
+    store = GraphStore.from_json(_graph())
+    run = find_duplicates(store)
+    accepted = {m.node for m in run.candidates if m.type == "Organization"}
+    log = tmp_path / "resolution.jsonl"
+    applied = apply_merges(store, run, accepted=accepted, log_path=log)
+    assert applied == len(accepted) > 0
+    assert not accepted & set(store.nodes)
+    assert "emission" in store.nodes  # proposed but not accepted
+    # ACME's edge duplicated one of Acme Corp's and collapsed into it
+    assert store.degree("Acme Corp") == 11 and store.in_edges("Emissions")[-1]["source"] != "ACME"
+    frame = read_resolution_log(log)
+    assert len(frame) == len(run.candidates)
+    assert set(frame.loc[frame["applied"], "node"]) == accepted
@@ -0,0 +1,43 @@
+from utils.alignment import registry_items
+from utils.esg_mapping_utils import GRIMatcher, map_report_metrics_to_gri
+from utils.framework_registry import compile_registry
+
+GRI = {
+    "framework": "GRI", "version": "2021",
+    "standards": [
+        {"standard_id": "GRI 302", "title": "Energy",
+         "disclosures": [{"disclosure_id": "302-1", "title": "Energy consumption within the organization"}]},
+        {"standard_id": "GRI 306", "title": "Waste",
+         "disclosures": [{"disclosure_id": "306-3", "title": "Waste generated"}]},
+    ],
+}
+
+
+def test_gri_matcher_uses_top_level_standards_only():
+    for registry in (GRI, compile_registry(GRI)):
+        assert GRIMatcher(registry).ids == ["GRI 302", "GRI 306"]
+        assert registry_items("GRI", registry) == ["GRI 302", "GRI 306"]
+
+
+def test_gri_mapping_matches_standards():
+    report = {"metrics": {"energy_consumption_mwh": 10, "waste_generated_tonnes": 3}}
+    assert set(map_report_metrics_to_gri(report, GRI)) == {"GRI 302", "GRI 306"}
+
+
+def test_raw_registry_matchers_are_bounded():
+    import utils.esg_mapping_utils as mapping
+    from utils.esg_mapping_utils import unsdg_matcher
+    registries = [{"sdgs": [{"sdg_id": "SDG 13", "targets": [{"target_id": "13.1", "text": f"climate resilience {i}"}]}]}
+                  for i in range(mapping.MATCHER_CACHE_SIZE + 2)]
+    first = unsdg_matcher(registries[0])
+    assert unsdg_matcher(registries[0]) is first
+    for r in registries[1:]:
+        unsdg_matcher(r)
+    assert len(mapping._unsdg_matchers._items) == mapping.MATCHER_CACHE_SIZE
+    assert unsdg_matcher(registries[0]) is not first  # evicted and rebuilt
+
+
+def test_gri_matcher_cached_per_raw_registry():
+    from utils.esg_mapping_utils import gri_matcher
+    assert gri_matcher(GRI) is gri_matcher(GRI)
+    assert gri_matcher(dict(GRI)) is not gri_matcher(GRI)
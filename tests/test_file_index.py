@@ -0,0 +1,85 @@
+import json
+import sys
+import threading
+
+from utils.file_index import FileIndex, filename_keys
+
+
+def test_filename_keys_skip_generic_tokens():
+    assert filename_keys("news_2024_companyA.json") == {"companya"}
+    assert filename_keys("socialMedia_2024_companyB.json") == {"companyb"}
+    assert filename_keys("acme_corp_2023_report.json") == {"acme", "acmecorp", "corp"}
+
+
+def _index(tmp_path):
+    folders = {k: tmp_path / k for k in ("reports", "news", "social")}
+    for folder in folders.values():
+        folder.mkdir()
+    (folders["news"] / "news_2024_companyA.json").write_text("{}")
+    (folders["reports"] / "company_id=CMPB").mkdir()
+    (folders["reports"] / "company_id=CMPB" / "2023.json").write_text("{}")
+    return FileIndex(folders, tmp_path / "index.json"), folders
+
+
+def test_lookup_by_name_and_partition(tmp_path):
+    index, folders = _index(tmp_path)
+    assert index.files_for_company("Company A", "CMPA")["news"] == [str(folders["news"] / "news_2024_companyA.json")]
+    assert index.files_for_company("Company B", "CMPB")["reports"] == \
+        [str(folders["reports"] / "company_id=CMPB" / "2023.json")]
+    assert index.files_for_key("news") == {"reports": [], "news": [], "social": []}
+
+
+def test_batched_add_remove_saves_once(tmp_path):
+    index, folders = _index(tmp_path)
+    index.refresh()
+    before = (tmp_path / "index.json").stat().st_mtime_ns
+    added = folders["news"] / "news_2024_companyC.json"
+    added.write_text("{}")
+    index.add_file(added, save=False)
+    index.remove_file(folders["news"] / "news_2024_companyA.json", save=False)
+    assert (tmp_path / "index.json").stat().st_mtime_ns == before
+    index.save()
+    state = json.loads((tmp_path / "index.json").read_text())
+    assert state["kinds"]["news"]["dirs"][""]["files"] == ["news_2024_companyC.json"]
+    reloaded = FileIndex(index.folders, tmp_path / "index.json")
+    assert reloaded.files_for_key("Company C")["news"] == [str(added)]
+
+
+def test_lookups_refresh_at_most_every_interval(tmp_path):
+    index, folders = _index(tmp_path)
+    index.refresh_interval = 3600
+    assert len(index.files("news")) == 1
+    (folders["news"] / "news_2024_companyC.json").write_text("{}")
+    assert len(index.files("news")) == 1  # within the interval: no re-listing
+    index.refresh_interval = 0
+    assert len(index.files("news")) == 2
+
+
+def test_lookups_while_watcher_updates(tmp_path):
+    index, folders = _index(tmp_path)
+    index.refresh_interval = 3600
+    for i in range(2000):  # long enough that a lookup is preempted mid-walk
+        index.add_file(folders["news"] / f"company_id=B{i}" / "2024.json", save=False)
+    stop = threading.Event()
+
+    def watcher():
+        # new partition directories keep resizing the dicts the lookups walk
+        i = 0
+        while not stop.is_set():
+            i += 1
+            path = folders["news"] / f"company_id=C{i}" / "2024.json"
+            index.add_file(path, save=False)
+
+    t = threading.Thread(target=watcher)
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # switch threads mid-iteration
+    t.start()
+    try:
+        for _ in range(500):
+            index.files_for_company("Company A", "CMPA")
+            index.files_for_key("companya")
+            index.files("news")
+    finally:
+        stop.set()
+        t.join()
+        sys.setswitchinterval(interval)
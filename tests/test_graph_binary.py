@@ -0,0 +1,65 @@
+import json
+import random
+
+import networkx as nx
+import pytest
+
+from utils.config import MERGED_GRAPH_JSON
+from utils.graph_binary import MappedGraph, binary_path, load_graph_binary, write_graph_binary
+from utils.graph_store import GraphStore
+from utils.graph_utils import graph_json_to_networkx, load_graph_json, save_graph_json
+from utils.snapshot import CorpusSnapshot, build_snapshot
+
+
+def _synthetic(n=60, m=300, seed=3):
+    rnd = random.Random(seed)
+    g = {"nodes": {f"n{i}": {"type": rnd.choice(["ESG Topic", "Metric"]), "v": i} for i in range(n)},
+         "edges": []}
+    for _ in range(m):
+        # some endpoints have no node entry, some edges no type, some extra attributes
+        e = {"source": f"n{rnd.randrange(n + 5)}", "target": f"n{rnd.randrange(n + 5)}"}
+        r = rnd.random()
+        if r < 0.8:
+            e["type"] = rnd.choice("abc")
+        if r > 0.9:
+            e["source_file"] = "news/x.json"
+        g["edges"].append(e)
+    return g
+
+
+def _graphs():
+    yield {"nodes": {}, "edges": []}
+    yield _synthetic()
+    if MERGED_GRAPH_JSON.exists():
+        yield json.loads(MERGED_GRAPH_JSON.read_text(encoding="utf-8"))
+
+
+@pytest.mark.parametrize("graph", list(_graphs()))
+def test_round_trip_and_lookups(graph, tmp_path):
+    write_graph_binary(graph, tmp_path / "g.esggraph")
+    mapped = MappedGraph.open(tmp_path / "g.esggraph")
+    assert mapped.to_json() == graph
+    G, H = graph_json_to_networkx(graph), mapped.to_networkx()
+    assert set(G.edges) == set(H.edges) and dict(G.nodes(data=True)) == dict(H.nodes(data=True))
+    store = GraphStore.from_json(graph)
+    for n in G.nodes:
+        assert mapped.ego(n, 2) == set(nx.ego_graph(G, n, radius=2))
+        assert mapped.degree(n) == sum((e["source"] == n) + (e["target"] == n) for e in graph["edges"])
+        if store.edge_count == len(graph["edges"]):  # no duplicates the store would collapse
+            assert mapped.out_edges(n) == store.out_edges(n) and mapped.in_edges(n) == store.in_edges(n)
+
+
+def test_binary_rebuilt_when_journal_changes(tmp_path):
+    path = tmp_path / "merged_graph.json"
+    save_graph_json(_synthetic(), path)
+    assert binary_path(path).exists()
+    first = load_graph_binary(path)
+    assert "n1" in first
+    GraphStore.load(path).merge_nodes("n1", "n2")
+    second = load_graph_binary(path)
+    assert second is not first and "n1" not in second
+
+
+def test_snapshot_graph_matches_merged_graph(tmp_path):
+    build_snapshot(tmp_path / "corpus.esgsnap")
+    assert CorpusSnapshot(tmp_path / "corpus.esgsnap").graph_json() == load_graph_json()
@@ -0,0 +1,63 @@
+import json
+
+import utils.graph_store as graph_store
+from utils.graph_store import GraphStore, curation_path, journal_path, restore_curation
+from utils.graph_utils import load_graph_json, save_graph_json
+
+
+def _graph():
+    return {"nodes": {"Acme": {"type": "Organization"}, "CO2 emissions": {"type": "ESG Topic"},
+                      "Emissions": {"type": "ESG Topic", "domain": "E"}, "Water": {"type": "ESG Topic"}},
+            "edges": [{"source": "Acme", "target": "CO2 emissions", "type": "discusses"},
+                      {"source": "Acme", "target": "Emissions", "type": "discusses"},
+                      {"source": "Acme", "target": "Water", "type": "discusses"},
+                      {"source": "CO2 emissions", "target": "Water", "type": "related_to"}]}
+
+
+def _check_indexes(store: GraphStore):
+    assert set(store._keys.values()) == set(store.edges)
+    for i, e in store.edges.items():
+        assert store._keys[graph_store.edge_key(e)] == i
+        assert i in store._out[e["source"]] and i in store._in[e["target"]]
+    assert sum(map(len, store._out.values())) == sum(map(len, store._in.values())) == len(store.edges)
+
+
+def test_merge_nodes_keeps_indexes_consistent():
+    store = GraphStore.from_json(_graph())
+    assert store.merge_nodes("CO2 emissions", "Emissions")
+    _check_indexes(store)
+    assert "CO2 emissions" not in store
+    # the redirected duplicate collapses into the earlier edge
+    assert [(e["source"], e["target"]) for e in store.edges.values()] == \
+        [("Acme", "Emissions"), ("Acme", "Water"), ("Emissions", "Water")]
+    assert store.out_edges("Emissions") == [{"source": "Emissions", "target": "Water", "type": "related_to"}]
+    assert not store.merge_nodes("CO2 emissions", "Emissions")
+
+
+def test_journal_replay_and_compaction_survive_rebuild(tmp_path):
+    path = tmp_path / "merged_graph.json"
+    save_graph_json(_graph(), path)
+    store = GraphStore.load(path)
+    store.merge_nodes("CO2 emissions", "Emissions")
+    assert "CO2 emissions" not in load_graph_json(path)["nodes"]
+    assert "CO2 emissions" in load_graph_json(path, journal=False)["nodes"]
+
+    store.compact(path)
+    assert not journal_path(path).exists() and curation_path(path).exists()
+    assert "CO2 emissions" not in load_graph_json(path, journal=False)["nodes"]
+
+    # a builder rewrites the graph from the data: the folded curation is re-applied
+    save_graph_json(_graph(), path)
+    assert not curation_path(path).exists()
+    assert "CO2 emissions" not in load_graph_json(path)["nodes"]
+    assert not restore_curation(path)
+
+
+def test_journal_compacts_past_threshold(tmp_path, monkeypatch):
+    monkeypatch.setattr(graph_store, "GRAPH_JOURNAL_COMPACT_BYTES", 0)
+    path = tmp_path / "merged_graph.json"
+    path.write_text(json.dumps(_graph()))
+    store = GraphStore.load(path)
+    store.merge_nodes("CO2 emissions", "Emissions")
+    assert not journal_path(path).exists()
+    assert "CO2 emissions" not in json.loads(path.read_text())["nodes"]
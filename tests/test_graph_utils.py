@@ -0,0 +1,37 @@
+from utils.graph_utils import CompanyMentionDetector, company_mention_detector
+
+COMPANIES = {
+    "CMPA": {"company_id": "CMPA", "name": "Company A", "aliases": ["CoA"], "identifiers": {"ticker": "ON"}},
+    "CMPAB": {"company_id": "CMPAB", "name": "Company AB"},
+    "NORD": {"company_id": "NORD", "name": "Nordvärme Öy", "identifiers": {"ticker": "X"}},
+    "NONAME": {"company_id": "NONAME"},
+}
+
+
+def test_names_and_aliases_on_word_boundaries():
+    detector = CompanyMentionDetector(COMPANIES)
+    assert detector.find("Company AB expands; company a responds.") == ["Company AB", "Company A"]
+    assert detector.find("Shares of CompanyA and Company ABC fell") == []
+    assert detector.find("CoA's new plant") == ["Company A"]
+    assert detector.find("nordvärme öy opens a site") == ["Nordvärme Öy"]
+
+
+def test_tickers_match_only_in_their_case():
+    detector = CompanyMentionDetector(COMPANIES)
+    assert detector.find("Turn it on, ON rallied") == ["Company A"]
+    assert detector.find("Turn it on") == []
+    assert detector.find("Company X and X") == []  # one-letter tickers are not matched
+
+
+def test_mentions_do_not_span_texts():
+    detector = CompanyMentionDetector(COMPANIES)
+    assert detector.find("A report by Company", "A later statement") == []
+    assert detector.find(None, "", "Company A") == ["Company A"]
+
+
+def test_detector_reused_until_companies_change():
+    first = company_mention_detector(COMPANIES)
+    assert company_mention_detector(dict(COMPANIES)) is first
+    renamed = dict(COMPANIES, CMPAB={"company_id": "CMPAB", "name": "Company B"})
+    second = company_mention_detector(renamed)
+    assert second is not first and second.find("Company B") == ["Company B"]
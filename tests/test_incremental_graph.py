@@ -0,0 +1,85 @@
+import json
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from utils.config import COMPANIES_DIR, NEWS_DIR, REPORTS_DIR, SOCIAL_DIR
+from utils.data_loader import iter_json_files, load_folder
+from utils.graph_utils import build_graph_from_data
+from utils.incremental_graph import IncrementalGraphBuilder
+
+
+def _edge_keys(graph):
+    return {(e["source"], e["target"], e.get("type")) for e in graph["edges"]}
+
+
+def _full(companies, files):
+    docs = {kind: {p.name: json.loads(p.read_text(encoding="utf-8")) for p in files[kind]}
+            for kind in ("reports", "news", "social")}
+    return build_graph_from_data(companies, docs["reports"], docs["news"], docs["social"])
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    """The shipped data, with the news files copied so the tests can change them."""
+    news = tmp_path / "news"
+    shutil.copytree(NEWS_DIR, news)
+    files = {"companies": [p for _, p in iter_json_files(COMPANIES_DIR)],
+             "reports": [p for _, p in iter_json_files(REPORTS_DIR)],
+             "news": sorted(news.glob("*.json")),
+             "social": [p for _, p in iter_json_files(SOCIAL_DIR)]}
+    return load_folder(COMPANIES_DIR)[0], files, tmp_path
+
+
+def _builder(tmp_path):
+    return IncrementalGraphBuilder(tmp_path / "g.json", tmp_path / "state.json", tmp_path / "delta.json")
+
+
+def test_matches_full_build_and_is_idempotent(corpus):
+    companies, files, tmp_path = corpus
+    delta = _builder(tmp_path).update(files, companies)
+    assert len(delta.files_added) == sum(map(len, files.values()))
+    builder = _builder(tmp_path)
+    full = _full(companies, files)
+    assert builder.graph["nodes"] == full["nodes"]
+    assert _edge_keys(builder.graph) == _edge_keys(full)
+    assert builder.update(files, companies).empty
+
+
+def test_changed_and_deleted_files(corpus):
+    companies, files, tmp_path = corpus
+    _builder(tmp_path).update(files, companies)
+
+    changed, deleted = files["news"][0], files["news"][1]
+    doc = json.loads(changed.read_text(encoding="utf-8"))
+    doc["news_sources"][0]["articles"] = doc["news_sources"][0]["articles"][:1]
+    changed.write_text(json.dumps(doc), encoding="utf-8")
+    deleted.unlink()
+    files = dict(files, news=[p for p in files["news"] if p != deleted])
+
+    builder = _builder(tmp_path)
+    delta = builder.update(files, companies)
+    assert len(delta.files_changed) == 1 and len(delta.files_deleted) == 1
+    full = _full(companies, files)
+    assert builder.graph["nodes"] == full["nodes"]
+    assert _edge_keys(builder.graph) == _edge_keys(full)
+    assert all(e["source_file"] for e in builder.graph["edges"])
+
+
+def test_external_rewrite_starts_over(corpus):
+    companies, files, tmp_path = corpus
+    _builder(tmp_path).update(files, companies)
+    (tmp_path / "g.json").write_text(json.dumps({"nodes": {}, "edges": []}), encoding="utf-8")
+    delta = _builder(tmp_path).update(files, companies)
+    assert len(delta.files_added) == sum(map(len, files.values()))
+
+
+def test_cli_rejects_filters_with_incremental():
+    # files outside the filter would look deleted and be retracted from the graph
+    for flags in (["--company-id", "CMPA"], ["--year", "2024"]):
+        result = subprocess.run([sys.executable, "build_graph.py", "--incremental", *flags],
+                                cwd=Path(__file__).resolve().parents[1], capture_output=True, text=True)
+        assert result.returncode == 2 and "--incremental" in result.stderr
@@ -0,0 +1,83 @@
+import json
+import os
+
+from utils.parse_cache import ParseCache
+
+
+def _write(path, doc):
+    path.write_text(json.dumps(doc), encoding="utf-8")
+
+
+def test_hit_miss_and_reparse_on_change(tmp_path):
+    cache = ParseCache(tmp_path / "cache.sqlite")
+    f = tmp_path / "a.json"
+    _write(f, {"v": 1})
+    calls = []
+
+    def parse(data):
+        calls.append(1)
+        return json.loads(data)
+
+    assert cache.load(f, parse=parse) == {"v": 1}
+    assert cache.load(f, parse=parse) == {"v": 1}
+    assert len(calls) == 1
+    _write(f, {"v": 22})
+    assert cache.load(f, parse=parse) == {"v": 22}
+    assert len(calls) == 2
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 2)
+
+
+def test_namespaces_do_not_collide(tmp_path):
+    cache = ParseCache(tmp_path / "cache.sqlite")
+    f = tmp_path / "a.json"
+    _write(f, {"v": 1})
+    assert cache.load(f) == {"v": 1}
+    assert cache.load(f, parse=lambda data: "derived", namespace="x") == "derived"
+    assert cache.load(f) == {"v": 1}
+
+
+def test_hits_are_written_in_batches(tmp_path, monkeypatch):
+    import utils.parse_cache as parse_cache
+    monkeypatch.setattr(parse_cache, "PARSE_CACHE_FLUSH_SECONDS", 3600)
+    cache = ParseCache(tmp_path / "cache.sqlite")
+    f = tmp_path / "a.json"
+    _write(f, {"v": 1})
+    cache.load(f)
+    before = cache._conn().total_changes
+    for _ in range(10):
+        cache.load(f)
+    assert cache._conn().total_changes == before  # hits did not write
+    assert cache.stats()["hits"] == 10  # stats() flushes
+
+
+def test_prune_missing_drops_vanished_files(tmp_path):
+    cache = ParseCache(tmp_path / "cache.sqlite")
+    keep, gone = tmp_path / "keep.json", tmp_path / "gone.json"
+    _write(keep, {})
+    _write(gone, {})
+    cache.load(keep)
+    cache.load(gone)
+    os.remove(gone)
+    assert cache.prune_missing() == 1
+    paths = [p for (p,) in cache._conn().execute("SELECT path FROM files")]
+    assert paths == [str(keep)]
+
+
+def test_write_during_read_is_not_recorded(tmp_path, monkeypatch):
+    import utils.parse_cache as parse_cache
+    cache = ParseCache(tmp_path / "cache.sqlite")
+    f = tmp_path / "a.json"
+    _write(f, {"v": 1})
+    real = parse_cache.hash_bytes
+
+    def hash_then_rewrite(data):
+        # the file is rewritten after its old bytes were read
+        _write(f, {"v": 22})
+        return real(data)
+
+    monkeypatch.setattr(parse_cache, "hash_bytes", hash_then_rewrite)
+    assert cache.load(f) == {"v": 1}
+    assert cache._conn().execute("SELECT COUNT(*) FROM files").fetchone() == (0,)
+    monkeypatch.setattr(parse_cache, "hash_bytes", real)
+    assert cache.load(f) == {"v": 22}
@@ -0,0 +1,91 @@
+import datetime as dt
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.event_store import SEVERITY_LEVELS
+from utils.risk_index import RiskIndex, build_risk_index
+from utils.snapshot import MappedContainer, write_container
+
+TYPES = ["regulatory_investigation", "greenwashing", "labor_dispute"]
+
+
+@pytest.fixture(scope="module")
+def rows():
+    rnd = np.random.default_rng(11)
+    n = 3000
+    days = rnd.integers(0, 400, n)
+    stamps = [None if d < 10 else str(dt.date(2024, 1, 1) + dt.timedelta(days=int(d))) for d in days]
+    return {"company": rnd.choice(["CMPA", "CMPB", "CMPC"], n).tolist(),
+            "channel": rnd.choice(["news", "social"], n).tolist(),
+            "source": rnd.choice(["Reuters", "Twitter"], n).tolist(),
+            "type": rnd.choice(TYPES, n).tolist(),
+            "severity": rnd.choice(SEVERITY_LEVELS, n, p=[0.5, 0.3, 0.2]).tolist(),
+            "record_id": [f"r{i}" for i in range(n)],
+            "timestamp": stamps}
+
+
+@pytest.fixture(scope="module")
+def frame(rows):
+    df = pd.DataFrame(rows).rename(columns={"company": "company_id"})
+    df["date"] = pd.to_datetime(df["timestamp"])
+    return df
+
+
+def _ids(df):
+    return sorted(df["record_id"])
+
+
+@pytest.mark.parametrize("filters", [
+    {},
+    {"company_id": "CMPA"},
+    {"type": "greenwashing", "severity": "high"},
+    {"company_id": ["CMPA", "CMPC"], "type": ["greenwashing", "labor_dispute"]},
+    {"min_severity": "medium"},
+    {"min_severity": "high", "severity": ["low", "high"]},
+    {"start": "2024-03-01", "end": "2024-06-30", "company_id": "CMPB"},
+    {"last_days": 30, "as_of": dt.date(2024, 12, 31), "type": "regulatory_investigation"},
+    {"company_id": "nobody"},
+])
+def test_query_matches_scan(rows, frame, filters):
+    index = RiskIndex.from_rows(rows)
+    want = frame
+    for dim in ("company_id", "type", "severity"):
+        if dim in filters:
+            values = filters[dim]
+            want = want[want[dim].isin([values] if isinstance(values, str) else values)]
+    if "min_severity" in filters:
+        want = want[want["severity"].isin(SEVERITY_LEVELS[SEVERITY_LEVELS.index(filters["min_severity"]):])]
+    if "last_days" in filters:
+        end = pd.Timestamp(filters["as_of"])
+        want = want[(want["date"] > end - pd.Timedelta(days=filters["last_days"])) & (want["date"] <= end)]
+    if "start" in filters:
+        want = want[(want["date"] >= filters["start"]) & (want["date"] <= filters["end"])]
+    got = index.query(**filters)
+    assert _ids(got) == _ids(want)
+    assert list(got.columns) == ["date", "company_id", "channel", "source", "type", "severity", "record_id"]
+
+
+def test_rows_sorted_by_day_and_undated_first(rows):
+    index = RiskIndex.from_rows(rows)
+    assert len(index) == len(rows["record_id"])
+    assert np.all(np.diff(index.day) >= 0) and index.day[0] == -1
+    assert index.latest() == max(dt.date.fromisoformat(s) for s in rows["timestamp"] if s)
+    dated = index.query(start="2024-01-01")
+    assert dated["date"].notna().all() and len(dated) == sum(s is not None for s in rows["timestamp"])
+
+
+def test_counts_group_the_filtered_rows(rows, frame):
+    index = RiskIndex.from_rows(rows)
+    got = index.counts(by=("company", "severity"), type="greenwashing")
+    want = frame[frame["type"] == "greenwashing"].groupby(["company_id", "severity"]).size()
+    assert {(r.company, r.severity): r.signals for r in got.itertuples()} == want.to_dict()
+    assert index.counts(company_id="nobody").empty
+
+
+def test_mapped_index_matches_in_memory(rows, tmp_path):
+    write_container(tmp_path / "risk.bin", *build_risk_index(rows))
+    mapped, memory = RiskIndex(MappedContainer(tmp_path / "risk.bin")), RiskIndex.from_rows(rows)
+    filters = {"company_id": "CMPC", "min_severity": "medium", "start": "2024-02-01"}
+    pd.testing.assert_frame_equal(mapped.query(**filters), memory.query(**filters))
@@ -0,0 +1,90 @@
+import datetime as dt
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.aggregations import SentimentColumns
+from utils.rollup import RollupCube, build_rollup, month_start, to_day, week_start
+from utils.snapshot import MappedContainer, write_container
+
+
+@pytest.fixture(scope="module")
+def cols():
+    rnd = np.random.default_rng(7)
+    n = 2000
+    day = rnd.integers(to_day("2023-01-01"), to_day("2024-12-31"), n).astype(np.int32)
+    day[rnd.random(n) < 0.05] = -1  # undated
+    sentiment = rnd.uniform(-1, 1, n)
+    sentiment[rnd.random(n) < 0.1] = np.nan  # unscored
+    topic_rows = rnd.integers(0, n, 3000)
+    return SentimentColumns(
+        rnd.choice(["CMPA", "CMPB"], n).astype(object), rnd.choice(["news", "social"], n).astype(object),
+        rnd.choice(["Reuters", "Twitter", ""], n).astype(object), sentiment,
+        topic_rows, rnd.integers(0, 4, topic_rows.size), ["Emissions", "Water", "Board", "Safety"],
+        day, rnd.choice(["E", "S", "G"], n).astype(object))
+
+
+def _frame(cols):
+    return pd.DataFrame({"company": cols.company_id, "channel": cols.channel, "source": cols.source,
+                         "category": cols.category, "day": cols.day, "sentiment": cols.sentiment})
+
+
+def _expected(df, level, start=None, end=None, **filters):
+    """Per-period count/mean/std by pandas; ranges cover whole periods, like the cube's."""
+    for dim, value in filters.items():
+        df = df[df[dim] == value]
+    df = df[(df["day"] >= 0) & df["sentiment"].notna()]
+    to_period = {"day": np.asarray, "week": week_start, "month": month_start}[level]
+    df = df.assign(period=to_period(df["day"].to_numpy()))
+    if start is not None:
+        df = df[df["period"] >= to_period(np.asarray([to_day(start)]))[0]]
+    if end is not None:
+        df = df[df["period"] <= to_period(np.asarray([to_day(end)]))[0]]
+    return df.groupby("period")["sentiment"].agg(["count", "mean", lambda s: s.std(ddof=0)])
+
+
+@pytest.mark.parametrize("level", ["day", "week", "month"])
+@pytest.mark.parametrize("query", [{}, {"company": "CMPA"}, {"company": "CMPB", "channel": "social", "source": "Twitter"},
+                                   {"start": "2023-03-15", "end": "2024-02-10", "category": "E"}])
+def test_series_matches_group_by(cols, level, query):
+    cube = RollupCube.from_columns(cols)
+    filters = {k: v for k, v in query.items() if k not in ("start", "end")}
+    got = cube.series(level, query.get("start"), query.get("end"), company_id=filters.get("company"),
+                      channel=filters.get("channel"), source=filters.get("source"),
+                      category=filters.get("category"))
+    want = _expected(_frame(cols), level, query.get("start"), query.get("end"), **filters)
+    assert got["date"].to_numpy().astype("datetime64[D]").astype(np.int64).tolist() == want.index.tolist()
+    assert got["count"].tolist() == want["count"].tolist()
+    assert np.allclose(got["mean"], want["mean"]) and np.allclose(got["std"], want.iloc[:, 2])
+
+
+def test_undated_rows_kept_in_totals(cols):
+    cube = RollupCube.from_columns(cols)
+    scored = int((~np.isnan(cols.sentiment)).sum())
+    for level in ("day", "week", "month"):
+        series = cube.series(level, include_undated=True)
+        assert series["count"].sum() == scored
+        assert (series["date"] < np.datetime64("1970-01-02")).any()
+        assert cube.series(level)["count"].sum() < scored
+
+
+def test_topics_over_a_range(cols):
+    cube = RollupCube.from_columns(cols)
+    names = np.asarray(cols.topic_names)
+    assert dict(cube.topics("day")) == dict(pd.Series(names[cols.topic_ids]).value_counts())
+    in_range = (cols.day[cols.topic_rows] >= to_day("2024-01-01")) & (cols.company_id[cols.topic_rows] == "CMPA")
+    want = pd.Series(names[cols.topic_ids[in_range]]).value_counts()
+    got = cube.topics("month", start=dt.date(2024, 1, 1), company_id="CMPA")
+    assert dict(got) == dict(want) and [c for _, c in got] == sorted(want, reverse=True)
+    assert cube.topics("month", company_id="nobody") == []
+
+
+def test_mapped_cube_matches_in_memory(cols, tmp_path):
+    arrays, strings = build_rollup(cols)
+    write_container(tmp_path / "cube.bin", arrays, strings)
+    mapped, memory = RollupCube(MappedContainer(tmp_path / "cube.bin")), RollupCube.from_columns(cols)
+    pd.testing.assert_frame_equal(mapped.series("week", company_id="CMPB"), memory.series("week", company_id="CMPB"))
+    assert mapped.topics("day", top_n=2) == memory.topics("day", top_n=2)
+    with pytest.raises(ValueError):
+        memory.series("year")
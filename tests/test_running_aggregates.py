@@ -0,0 +1,91 @@
+import json
+
+from utils.running_aggregates import RunningAggregates
+
+
+def test_merge_then_sync_does_not_double_count(tmp_path):
+    built = RunningAggregates(tmp_path / "built.json")
+    built.sync()
+    count = built.stats().count
+    assert count > 0
+
+    fresh = RunningAggregates(tmp_path / "fresh.json")
+    fresh.merge(built)
+    assert fresh.stats().count == count
+    assert fresh.sync() == 0
+    assert fresh.stats().count == count
+    assert {n: sh.fingerprint for n, sh in fresh.shards.items()} == \
+        {n: sh.fingerprint for n, sh in built.shards.items()}
+
+
+def test_merge_keeps_newer_file_shard(tmp_path):
+    built = RunningAggregates(tmp_path / "built.json")
+    built.sync()
+    other = RunningAggregates(tmp_path / "other.json")
+    other.sync()
+    built.merge(other)
+    assert built.stats().count == other.stats().count
+
+
+def test_merge_sums_stream_shards(tmp_path):
+    a = RunningAggregates(tmp_path / "a.json")
+    b = RunningAggregates(tmp_path / "b.json")
+    recs = [{"analysis": {"sentiment": 0.5, "esg_topics": ["Emissions"]}}]
+    a.append("feed", "CMPA", "news", "wire", recs)
+    b.append("feed", "CMPA", "news", "wire", recs)
+    a.merge(b)
+    assert a.stats(company_id="CMPA").count == 2
+    assert a.topics().most_common(1)[0][0] == "Emissions"
+
+
+def _news(tmp_path, monkeypatch, articles):
+    import utils.running_aggregates as ra
+    folder = tmp_path / "news"
+    folder.mkdir(exist_ok=True)
+    scanned = []
+
+    def scan(text, pos=0, resume=None):
+        scanned.append(len(text))
+        return ra.scan_news_articles(text, pos, resume)
+
+    monkeypatch.setitem(ra.FILE_KINDS, "news", (folder, scan, "source_name", False))
+    path = folder / "news_2024_companyA.json"
+    _write_news(path, articles)
+    return path, scanned
+
+
+def _write_news(path, articles):
+    doc = {"company": "Company A", "company_id": "CMPA", "year": 2024,
+           "news_sources": [{"source_name": "Reuters", "articles": articles}]}
+    path.write_text(json.dumps(doc, indent=2), encoding="utf-8")
+
+
+def _article(i, sentiment):
+    return {"article_id": f"a{i}", "analysis": {"sentiment": sentiment, "esg_topics": ["Emissions"]}}
+
+
+def test_append_parses_only_the_new_records(tmp_path, monkeypatch):
+    articles = [_article(i, 0.5) for i in range(50)]
+    path, scanned = _news(tmp_path, monkeypatch, articles)
+    agg = RunningAggregates(tmp_path / "agg.json")
+    assert agg.update_file(path) == 50
+    agg = RunningAggregates(tmp_path / "agg.json")  # the resume point is persisted
+    _write_news(path, articles + [_article(50, -0.5)])
+    assert agg.update_file(path) == 1
+    assert scanned[1] < scanned[0] / 10  # only the tail was parsed
+    stats = agg.stats(company_id="CMPA")
+    assert (stats.count, stats.negative) == (51, 1)
+
+
+def test_edit_in_place_rebuilds_the_shard(tmp_path, monkeypatch):
+    articles = [_article(i, 0.5) for i in range(3)]
+    path, _ = _news(tmp_path, monkeypatch, articles)
+    agg = RunningAggregates(tmp_path / "agg.json")
+    agg.update_file(path)
+    # same records, same ids, same count: only a consumed record's score changed
+    articles[0] = _article(0, -0.9)
+    _write_news(path, articles)
+    agg.update_file(path)
+    stats = agg.stats(company_id="CMPA")
+    assert (stats.count, stats.positive, stats.negative) == (3, 2, 1)
+    assert stats.min == -0.9
@@ -1,60 +1,479 @@
 # utils/aggregations.py
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional, Iterable, Sequence
 from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+import heapq
 import math
+import numpy as np
+import pandas as pd
+
+from .stream_loader import iter_news_articles, iter_social_posts
 
 def sentiment_aggregate(values: List[float]) -> Optional[float]:
     if not values:
         return None
     return sum(values) / len(values)
 
-def collect_topic_counts(sources: List[dict]) -> List[Tuple[str,int]]:
+def collect_topic_counts(sources: List[dict] = (), capacity: Optional[int] = None,
+                         tables: Optional[Dict[str, "pd.DataFrame"]] = None,
+                         company_id: Optional[str] = None,
+                         record_tables: Optional[List[str]] = None) -> List[Tuple[str,int]]:
     """
     Given a list of sources (each with 'analysis' or top-level 'platforms' etc.),
     return top topic counts as list of tuples (topic, count).
     Example input: news articles where article['analysis']['esg_topics'] exists.
+    With capacity set, counts are approximate (see TopicSketch) and memory is bounded.
+    With tables (see utils.event_store.build_event_tables) the exact counts are read
+    from the topic_mentions table instead, optionally restricted to company_id and
+    to record_tables such as ["articles"] or ["posts"].
     """
-    counter = Counter()
+    if tables is not None:
+        return _topic_counts_from_tables(tables, company_id, record_tables)
+    counter = Counter() if capacity is None else TopicSketch(capacity)
     for s in sources:
         # news-style
         for src in s.get("news_sources", []):
             for article in src.get("articles", []):
-                for t in article.get("analysis", {}).get("esg_topics", []):
-                    counter[t] += 1
+                counter.update(article.get("analysis", {}).get("esg_topics", []))
         # social-style
         for platform in s.get("platforms", []):
             for post in platform.get("posts", []):
-                for t in post.get("analysis", {}).get("esg_topics", []):
-                    counter[t] += 1
+                counter.update(post.get("analysis", {}).get("esg_topics", []))
         # reports-style
         for rpt in s.get("reports", []) if isinstance(s.get("reports", []), list) else []:
             for cat, topics in rpt.get("esg_topics", {}).items():
-                for t in topics:
-                    counter[t] += 1
+                counter.update(topics)
     return counter.most_common()
 
-def aggregate_sentiment_from_news(news_json: dict) -> Optional[float]:
-    """Compute average sentiment across news json structure."""
-    sentiments = []
-    for src in news_json.get("news_sources", []):
-        for article in src.get("articles", []):
-            s = article.get("analysis", {}).get("sentiment")
-            if isinstance(s, (int, float)):
-                sentiments.append(s)
-    return sentiment_aggregate(sentiments)
-
-def aggregate_sentiment_from_social(social_json: dict) -> Optional[float]:
-    sentiments = []
-    for platform in social_json.get("platforms", []):
-        for post in platform.get("posts", []):
-            s = post.get("analysis", {}).get("sentiment")
-            if isinstance(s, (int, float)):
-                sentiments.append(s)
-            for c in post.get("comments", []):
+def aggregate_sentiment_from_news(news_json: dict = None, tables: Optional[Dict[str, "pd.DataFrame"]] = None,
+                                  company_id: Optional[str] = None) -> Optional[float]:
+    """Compute average sentiment across news json structure (or the event store's articles table)."""
+    if tables is not None:
+        return _sentiment_from_tables(tables, "news", company_id)
+    return sentiment_mean_stream(article for _, article in iter_news_articles(news_json))
+
+def aggregate_sentiment_from_social(social_json: dict = None, tables: Optional[Dict[str, "pd.DataFrame"]] = None,
+                                    company_id: Optional[str] = None) -> Optional[float]:
+    """Average post + comment sentiment of a social json structure (or the event store's posts/comments)."""
+    if tables is not None:
+        return _sentiment_from_tables(tables, "social", company_id)
+    return sentiment_mean_stream((post for _, post in iter_social_posts(social_json)),
+                                 include_comments=True)
+
+# -------------------------
+# Streaming (generator) aggregations
+# -------------------------
+def sentiment_mean_stream(records: Iterable[dict], include_comments: bool = False) -> Optional[float]:
+    """
+    Running mean of record['analysis']['sentiment'] over an iterable of articles/posts.
+    Only a running sum and count are kept, so memory does not grow with the input.
+    """
+    total, count = 0.0, 0
+    for rec in records:
+        s = rec.get("analysis", {}).get("sentiment")
+        if isinstance(s, (int, float)):
+            total += s
+            count += 1
+        if include_comments:
+            for c in rec.get("comments", []):
                 cs = c.get("analysis", {}).get("sentiment")
                 if isinstance(cs, (int, float)):
-                    sentiments.append(cs)
-    return sentiment_aggregate(sentiments)
+                    total += cs
+                    count += 1
+    if count == 0:
+        return None
+    return total / count
+
+def collect_topic_counts_stream(records: Iterable[dict], capacity: Optional[int] = None) -> List[Tuple[str,int]]:
+    """
+    Topic counts over an iterable of articles/posts (record['analysis']['esg_topics']).
+    With capacity set, a TopicSketch keeps memory flat however long the stream is.
+    """
+    counter = Counter() if capacity is None else TopicSketch(capacity)
+    for rec in records:
+        counter.update(rec.get("analysis", {}).get("esg_topics", []))
+    return counter.most_common()
+
+def aggregate_sentiment_from_news_files(paths: Iterable) -> Optional[float]:
+    """Average article sentiment across news files, streamed one article at a time."""
+    return sentiment_mean_stream(article for p in paths for _, article in iter_news_articles(p))
+
+def aggregate_sentiment_from_social_files(paths: Iterable) -> Optional[float]:
+    """Average post + comment sentiment across social files, streamed one post at a time."""
+    return sentiment_mean_stream((post for p in paths for _, post in iter_social_posts(p)),
+                                 include_comments=True)
+
+def collect_topic_counts_from_files(news_paths: Iterable = (), social_paths: Iterable = (),
+                                    capacity: Optional[int] = None) -> List[Tuple[str,int]]:
+    """Streaming equivalent of collect_topic_counts for news/social files on disk."""
+    def records():
+        for p in news_paths:
+            for _, article in iter_news_articles(p):
+                yield article
+        for p in social_paths:
+            for _, post in iter_social_posts(p):
+                yield post
+    return collect_topic_counts_stream(records(), capacity=capacity)
+
+# -------------------------
+# Bounded-memory heavy hitters
+# -------------------------
+class TopicSketch:
+    """
+    Space-Saving heavy-hitters summary over at most `capacity` distinct topics.
+
+    Every reported count overestimates the true count by at most error(topic) <=
+    total / capacity, so any topic occurring more than total / capacity times is
+    guaranteed to be tracked. Sketches merge (Agarwal et al., "Mergeable
+    summaries") with the same bound over the combined stream, so per-company or
+    per-shard sketches can be combined without revisiting the data. Exposes the
+    Counter methods the topic collectors use (update, most_common).
+    """
+    __slots__ = ("capacity", "total", "counts", "errors", "_heap")
+
+    def __init__(self, capacity: int = 1000):
+        if capacity < 1:
+            raise ValueError("capacity must be >= 1")
+        self.capacity = capacity
+        self.total = 0
+        self.counts: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        # lazy min-heap of (count, topic); stale entries are skipped on pop
+        self._heap: List[Tuple[int, str]] = []
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def _push(self, topic: str):
+        heapq.heappush(self._heap, (self.counts[topic], topic))
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(c, t) for t, c in self.counts.items()]
+            heapq.heapify(self._heap)
+
+    def _pop_min(self) -> Tuple[str, int]:
+        while True:
+            c, t = heapq.heappop(self._heap)
+            if self.counts.get(t) == c:
+                return t, c
+
+    def add(self, topic: str, count: int = 1) -> None:
+        self.total += count
+        if topic in self.counts:
+            self.counts[topic] += count
+        elif len(self.counts) < self.capacity:
+            self.counts[topic] = count
+            self.errors[topic] = 0
+        else:
+            # replace the minimum: the newcomer inherits its count as error
+            victim, floor = self._pop_min()
+            del self.counts[victim], self.errors[victim]
+            self.counts[topic] = floor + count
+            self.errors[topic] = floor
+        self._push(topic)
+
+    def update(self, topics: Iterable[str]) -> None:
+        for t in topics:
+            self.add(t)
+
+    def _floor(self) -> int:
+        """Count an untracked topic may have had: the minimum, once the sketch is full."""
+        return min(self.counts.values()) if len(self.counts) >= self.capacity else 0
+
+    def merge(self, other: "TopicSketch") -> "TopicSketch":
+        """Fold other into this sketch (keeping this sketch's capacity)."""
+        mine, theirs = self._floor(), other._floor()
+        counts, errors = {}, {}
+        for t in self.counts.keys() | other.counts.keys():
+            counts[t] = self.counts.get(t, mine) + other.counts.get(t, theirs)
+            errors[t] = self.errors.get(t, mine) + other.errors.get(t, theirs)
+        keep = heapq.nlargest(self.capacity, counts, key=counts.get)
+        self.counts = {t: counts[t] for t in keep}
+        self.errors = {t: errors[t] for t in keep}
+        self.total += other.total
+        self._heap = [(c, t) for t, c in self.counts.items()]
+        heapq.heapify(self._heap)
+        return self
+
+    @property
+    def error_bound(self) -> float:
+        """Upper bound on the overestimate of any reported count."""
+        return self.total / self.capacity
+
+    def most_common(self, n: Optional[int] = None) -> List[Tuple[str, int]]:
+        ranked = sorted(self.counts.items(), key=lambda kv: -kv[1])
+        return ranked[:n] if n is not None else ranked
+
+    def guaranteed(self, n: int) -> List[Tuple[str, int]]:
+        """Topics of the top n whose rank is certain: their lower bound beats the (n+1)th count."""
+        ranked = self.most_common(n + 1)
+        cutoff = ranked[n][1] if len(ranked) > n else 0
+        return [(t, c) for t, c in ranked[:n] if c - self.errors[t] >= cutoff]
+
+    def to_dict(self) -> dict:
+        return {"capacity": self.capacity, "total": self.total,
+                "items": [[t, c, self.errors[t]] for t, c in self.counts.items()]}
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "TopicSketch":
+        sk = cls(d["capacity"])
+        sk.total = d.get("total", 0)
+        for t, c, e in d.get("items", []):
+            sk.counts[t], sk.errors[t] = c, e
+        sk._heap = [(c, t) for t, c in sk.counts.items()]
+        heapq.heapify(sk._heap)
+        return sk
+
+# -------------------------
+# Columnar (event store) aggregations
+# -------------------------
+def _filter_company(df, company_id: Optional[str]):
+    if company_id is None:
+        return df
+    return df[df["company_id"] == company_id]
+
+# event store tables holding the scored records of each channel
+SENTIMENT_TABLES = {"news": ("articles",), "social": ("posts", "comments")}
+
+def _topic_counts_from_tables(tables: Dict[str, "pd.DataFrame"], company_id: Optional[str],
+                              record_tables: Optional[List[str]]) -> List[Tuple[str,int]]:
+    mentions = _filter_company(tables["topic_mentions"], company_id)
+    if record_tables is not None:
+        mentions = mentions[mentions["record_table"].isin(record_tables)]
+    if mentions.empty:
+        return []
+    counts = mentions["topic_id"].value_counts()
+    names = tables["topics"].set_index("topic_id")["topic"]
+    return [(str(names[tid]), int(n)) for tid, n in counts.items()]
+
+def _sentiment_from_tables(tables: Dict[str, "pd.DataFrame"], source: str,
+                           company_id: Optional[str]) -> Optional[float]:
+    if source not in SENTIMENT_TABLES:
+        raise ValueError(f"source must be one of {sorted(SENTIMENT_TABLES)}, got {source!r}")
+    total, count = 0.0, 0
+    for name in SENTIMENT_TABLES[source]:
+        s = _filter_company(tables[name], company_id)["sentiment"].dropna()
+        total += float(s.sum())
+        count += int(s.size)
+    if count == 0:
+        return None
+    return total / count
+
+# -------------------------
+# Vectorized sentiment engine
+# -------------------------
+# |sentiment| <= NEUTRAL_BAND counts as neutral in the positive/neutral/negative buckets
+NEUTRAL_BAND = 0.05
+DEFAULT_QUANTILES = (0.25, 0.5, 0.75)
+GROUP_COLUMNS = ("company_id", "channel", "source")
+
+@dataclass
+class SentimentColumns:
+    """
+    Scored records flattened column-wise: one row per article, post or comment.
+    channel is "news" or "social"; source is the news source name or the social
+    platform. Topic mentions are (row, topic id) pairs into topic_names. day (days
+    since 1970-01-01, -1 when unknown) and category (esg_category; comments take
+    their post's) are filled where the source provides them.
+    """
+    company_id: np.ndarray
+    channel: np.ndarray
+    source: np.ndarray
+    sentiment: np.ndarray
+    topic_rows: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+    topic_ids: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+    topic_names: List[str] = field(default_factory=list)
+    day: Optional[np.ndarray] = None
+    category: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return int(self.sentiment.size)
+
+def _score(v) -> float:
+    return float(v) if isinstance(v, (int, float)) and not isinstance(v, bool) else math.nan
+
+def day_numbers(timestamps) -> np.ndarray:
+    """ISO dates/timestamps (or datetimes) -> int32 days since 1970-01-01 (UTC), -1 when missing."""
+    ts = pd.to_datetime(pd.Series(list(timestamps), dtype=object), utc=True, errors="coerce",
+                        format="ISO8601")
+    days = ts.dt.floor("D").to_numpy(dtype="datetime64[D]", na_value=np.datetime64("NaT"))
+    out = days.astype("int64")
+    out[np.isnat(days)] = -1
+    return out.astype(np.int32)
+
+def sentiment_columns(news_docs: Iterable = (), social_docs: Iterable = (),
+                      include_comments: bool = True) -> SentimentColumns:
+    """
+    Flatten news/social documents (dicts or paths, see utils.stream_loader) into
+    SentimentColumns in a single traversal.
+    """
+    company, channel, source, sentiment, stamps, category = [], [], [], [], [], []
+    topic_rows, topic_ids, topic_index = [], [], {}
+
+    def add(meta, ch, src, analysis, stamp, cat):
+        company.append(str(meta.get("company_id") or meta.get("company") or ""))
+        channel.append(ch)
+        source.append(str(src or ""))
+        sentiment.append(_score(analysis.get("sentiment")))
+        stamps.append(stamp)
+        category.append(str(cat or ""))
+
+    def add_topics(analysis):
+        row = len(sentiment) - 1
+        for t in analysis.get("esg_topics") or []:
+            topic_rows.append(row)
+            topic_ids.append(topic_index.setdefault(t, len(topic_index)))
+
+    for doc in news_docs:
+        for meta, art in iter_news_articles(doc):
+            an = art.get("analysis") or {}
+            add(meta, "news", meta.get("source_name"), an, art.get("published_date"), an.get("esg_category"))
+            add_topics(an)
+    for doc in social_docs:
+        for meta, post in iter_social_posts(doc):
+            an = post.get("analysis") or {}
+            cat = an.get("esg_category")
+            add(meta, "social", meta.get("platform"), an, post.get("timestamp"), cat)
+            add_topics(an)
+            if include_comments:
+                for c in post.get("comments") or []:
+                    add(meta, "social", meta.get("platform"), c.get("analysis") or {}, c.get("timestamp"), cat)
+    return SentimentColumns(
+        np.asarray(company, dtype=object), np.asarray(channel, dtype=object),
+        np.asarray(source, dtype=object), np.asarray(sentiment, dtype=np.float64),
+        np.asarray(topic_rows, dtype=np.int64), np.asarray(topic_ids, dtype=np.int64),
+        list(topic_index), day_numbers(stamps), np.asarray(category, dtype=object))
+
+def sentiment_columns_from_tables(tables: Dict[str, "pd.DataFrame"],
+                                  company_id: Optional[str] = None) -> SentimentColumns:
+    """SentimentColumns from the event store's articles/posts/comments and topic tables."""
+    parts, offsets, n = [], {}, 0
+    post_category = tables["posts"].set_index("post_id")["esg_category"].astype(object)
+    post_category = post_category[~post_category.index.duplicated()]
+    for name, ch, src_col in (("articles", "news", "source_name"), ("posts", "social", "platform"),
+                              ("comments", "social", "platform")):
+        df = _filter_company(tables[name], company_id)
+        offsets[name] = (n, df)
+        n += len(df)
+        cat = df["post_id"].map(post_category) if name == "comments" else df["esg_category"].astype(object)
+        parts.append((df["company_id"].astype(object).fillna("").to_numpy(dtype=object),
+                      np.full(len(df), ch, dtype=object),
+                      df[src_col].astype(object).fillna("").to_numpy(dtype=object),
+                      df["sentiment"].to_numpy(dtype=np.float64, na_value=np.nan),
+                      day_numbers(df["timestamp"]),
+                      cat.fillna("").to_numpy(dtype=object)))
+    rows, ids = [], []
+    mentions = _filter_company(tables["topic_mentions"], company_id)
+    for name, id_col in (("articles", "article_id"), ("posts", "post_id")):
+        start, df = offsets[name]
+        pos = {rid: start + i for i, rid in enumerate(df[id_col].astype(object))}
+        m = mentions[mentions["record_table"] == name]
+        hit = m["record_id"].astype(object).map(pos)
+        keep = hit.notna().to_numpy()
+        rows.append(hit.to_numpy()[keep].astype(np.int64))
+        ids.append(m["topic_id"].to_numpy()[keep].astype(np.int64))
+    names = tables["topics"].sort_values("topic_id")["topic"].astype(str).tolist()
+    company, channel, source, sentiment, day, category = (np.concatenate([p[i] for p in parts])
+                                                          for i in range(6))
+    return SentimentColumns(company, channel, source, sentiment, np.concatenate(rows),
+                            np.concatenate(ids), names, day, category)
+
+def _group_codes(cols: SentimentColumns, by: Sequence[str]) -> Tuple[np.ndarray, List[tuple]]:
+    """Dense group id per row and the key tuple of each group."""
+    n = len(cols)
+    if not by:
+        return np.zeros(n, dtype=np.int64), [()]
+    uniques, codes = [], []
+    for name in by:
+        u, inv = np.unique(getattr(cols, name), return_inverse=True)
+        uniques.append(u)
+        codes.append(inv.reshape(-1))
+    combined = np.ravel_multi_index(codes, [max(len(u), 1) for u in uniques]) if n else np.empty(0, np.int64)
+    present, groups = np.unique(combined, return_inverse=True)
+    keys = [tuple(u[i] for u, i in zip(uniques, idx))
+            for idx in zip(*np.unravel_index(present, [len(u) for u in uniques]))]
+    return groups.reshape(-1).astype(np.int64), keys
+
+def summarize_sentiment(cols: SentimentColumns, by: Sequence[str] = GROUP_COLUMNS,
+                        quantiles: Sequence[float] = DEFAULT_QUANTILES,
+                        top_topics: Optional[int] = None) -> Dict[tuple, dict]:
+    """
+    All sentiment statistics per group in one vectorized pass over the columns.
+    Groups are keyed by the tuple of their `by` values (() for a single overall
+    group) and map to {count, mean, std, min, max, quantiles {q: value}, positive,
+    neutral, negative, topics [(topic, mentions), ...]}. Unscored rows are left out
+    of the statistics but their topic mentions are counted.
+    """
+    groups, keys = _group_codes(cols, by)
+    k = len(keys)
+    scored = ~np.isnan(cols.sentiment)
+    g, v = groups[scored], cols.sentiment[scored]
+
+    count = np.bincount(g, minlength=k)
+    total = np.bincount(g, weights=v, minlength=k)
+    sumsq = np.bincount(g, weights=v * v, minlength=k)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = total / count
+        std = np.sqrt(np.maximum(sumsq / count - mean * mean, 0.0))
+    bucket = np.where(v > NEUTRAL_BAND, 0, np.where(v < -NEUTRAL_BAND, 2, 1))
+    buckets = np.bincount(g * 3 + bucket, minlength=3 * k).reshape(k, 3)
+
+    # order statistics: sort once by (group, value), then index each group's run
+    order = np.lexsort((v, g))
+    sv = v[order]
+    starts = np.concatenate(([0], np.cumsum(count)[:-1])) if k else count
+    last = starts + np.maximum(count - 1, 0)
+    qvals = {}
+    for q in quantiles:
+        pos = starts + q * np.maximum(count - 1, 0)
+        lo = np.floor(pos).astype(np.int64)
+        hi = np.ceil(pos).astype(np.int64)
+        if sv.size:
+            lo_v, hi_v = sv[np.minimum(lo, sv.size - 1)], sv[np.minimum(hi, sv.size - 1)]
+            qvals[q] = lo_v + (hi_v - lo_v) * (pos - lo)
+        else:
+            qvals[q] = np.full(k, np.nan)
+
+    topics: Dict[int, List[Tuple[str, int]]] = defaultdict(list)
+    if cols.topic_rows.size:
+        nt = max(len(cols.topic_names), 1)
+        pairs, mentions = np.unique(groups[cols.topic_rows] * nt + cols.topic_ids, return_counts=True)
+        tg, tid = pairs // nt, pairs % nt
+        # most mentions first; ties keep first-seen topic order (like Counter.most_common)
+        for i in np.lexsort((tid, -mentions, tg)):
+            topics[int(tg[i])].append((cols.topic_names[tid[i]], int(mentions[i])))
+
+    out = {}
+    for i, key in enumerate(keys):
+        n = int(count[i])
+        out[key] = {
+            "count": n,
+            "mean": float(mean[i]) if n else None,
+            "std": float(std[i]) if n else None,
+            "min": float(sv[starts[i]]) if n else None,
+            "max": float(sv[last[i]]) if n else None,
+            "quantiles": {q: (float(qvals[q][i]) if n else None) for q in quantiles},
+            "positive": int(buckets[i, 0]),
+            "neutral": int(buckets[i, 1]),
+            "negative": int(buckets[i, 2]),
+            "topics": topics[i][:top_topics] if top_topics else topics[i],
+        }
+    return out
+
+def sentiment_overview(cols: SentimentColumns, top_n: int = 10) -> dict:
+    """
+    Dashboard aggregates for one company's columns: {news_sentiment, social_sentiment,
+    breakdown {positive, neutral, negative}, by_source {(channel, source): stats},
+    top_topics}.
+    """
+    by_channel = summarize_sentiment(cols, by=("channel",))
+    overall = summarize_sentiment(cols, by=(), top_topics=top_n)[()]
+    return {
+        "news_sentiment": by_channel.get(("news",), {}).get("mean"),
+        "social_sentiment": by_channel.get(("social",), {}).get("mean"),
+        "breakdown": {b: overall[b] for b in ("positive", "neutral", "negative")},
+        "by_source": summarize_sentiment(cols, by=("channel", "source"), top_topics=top_n),
+        "top_topics": overall["topics"],
+    }
 
 def safe_ratio(a: int, b: int) -> float:
     if b == 0:
@@ -0,0 +1,235 @@
+# utils/alignment.py
+"""
+Batch framework alignment over the report corpus.
+
+align_reports runs build_framework_alignments over every report, on a process pool
+when there is enough work, and keeps each result in a SQLite cache keyed by
+
+    (report content hash, framework, registry name@version)
+
+one row per framework. The content hash is the parse cache's fingerprint, so an
+unchanged report is not even re-read. Editing a report re-aligns only that report,
+and publishing a new version of one registry re-aligns every report against that
+framework only; the other frameworks' rows are reused. Rows left behind by older
+registry versions are pruned as the new version is computed.
+"""
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+from .config import ALIGNMENT_CACHE_DB, REPORTS_DIR
+from .data_loader import iter_json_files
+from .esg_mapping_utils import Registry, build_framework_alignments, gri_standards
+from .framework_registry import CompiledRegistry, as_compiled, load_compiled_registry
+from .parse_cache import get_parse_cache
+
+# registries aligned by default: framework key -> registry file stem
+DEFAULT_REGISTRIES = {"GRI": "GRI_v2021", "UNSDG": "UNSDG_schema"}
+# reports per worker task, and below how many pending reports the pool is not worth starting
+CHUNK_SIZE = 256
+MIN_PARALLEL = 64
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS alignments (
+    report_digest TEXT, framework TEXT, registry TEXT, payload TEXT, created REAL,
+    PRIMARY KEY (report_digest, framework, registry)
+);
+"""
+
+def default_frameworks() -> Dict[str, CompiledRegistry]:
+    """The compiled DEFAULT_REGISTRIES that exist under FRAMEWORKS_DIR."""
+    out = {}
+    for key, stem in DEFAULT_REGISTRIES.items():
+        registry = load_compiled_registry(stem)
+        if registry is not None:
+            out[key] = registry
+    return out
+
+def registry_key(framework: str, registry: Registry) -> str:
+    """'<name>@<version>' of a registry; a content hash stands in for a missing version."""
+    if isinstance(registry, CompiledRegistry):
+        registry = registry.raw
+    version = registry.get("version")
+    if version is None:
+        raw = json.dumps(registry, sort_keys=True, ensure_ascii=False).encode("utf-8")
+        version = hashlib.blake2b(raw, digest_size=8).hexdigest()
+    return f"{registry.get('framework') or framework}@{version}"
+
+def registry_items(framework: str, registry: Registry) -> List[str]:
+    """Alignable item ids of a registry: GRI standards, UNSDG targets."""
+    if framework == "UNSDG":
+        return [it.id for it in as_compiled(registry).items_of("target_id")]
+    return [gid for gid, _ in gri_standards(registry)]
+
+def covered_items(framework: str, alignment: dict) -> List[str]:
+    """Item ids marked covered in one report's alignment for framework."""
+    if framework == "UNSDG":
+        return [tid for targets in alignment.values() for tid, m in targets.items() if m.get("covered")]
+    return [iid for iid, m in alignment.items() if isinstance(m, dict) and m.get("covered")]
+
+def _confidences(framework: str, alignment: dict) -> List[float]:
+    matches = ([m for targets in alignment.values() for m in targets.values()]
+               if framework == "UNSDG" else list(alignment.values()))
+    return [m["confidence"] for m in matches if isinstance(m, dict) and m.get("confidence") is not None]
+
+class AlignmentCache:
+    def __init__(self, db_path: Path = None):
+        self.db_path = Path(db_path or ALIGNMENT_CACHE_DB)
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def get_many(self, digests: Iterable[str], framework: str, registry: str) -> Dict[str, dict]:
+        """digest -> cached alignment for the digests that have one."""
+        wanted = set(digests)
+        rows = self._conn().execute(
+            "SELECT report_digest, payload FROM alignments WHERE framework = ? AND registry = ?",
+            (framework, registry)).fetchall()
+        return {d: json.loads(p) for d, p in rows if d in wanted}
+
+    def put_many(self, framework: str, registry: str, results: Dict[str, dict]) -> None:
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN")
+        conn.executemany("INSERT OR REPLACE INTO alignments VALUES (?, ?, ?, ?, ?)",
+                         [(d, framework, registry, json.dumps(a, ensure_ascii=False), now)
+                          for d, a in results.items()])
+        conn.execute("COMMIT")
+
+    def prune(self, framework: str, registry: str) -> int:
+        """Drop rows of framework computed against any other registry version."""
+        cur = self._conn().execute("DELETE FROM alignments WHERE framework = ? AND registry != ?",
+                                   (framework, registry))
+        return cur.rowcount
+
+    def clear(self) -> None:
+        self._conn().execute("DELETE FROM alignments")
+
+    def stats(self) -> Dict[str, int]:
+        rows = self._conn().execute(
+            "SELECT registry, COUNT(*) FROM alignments GROUP BY registry").fetchall()
+        return dict(rows)
+
+_default_cache: Optional[AlignmentCache] = None
+
+def get_alignment_cache() -> AlignmentCache:
+    """Process-wide cache instance backed by config.ALIGNMENT_CACHE_DB."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = AlignmentCache()
+    return _default_cache
+
+def _align_chunk(framework: str, registry: Registry, reports: List[dict]) -> List[dict]:
+    return [a[framework] for a in build_framework_alignments(reports, {framework: registry})]
+
+@dataclass
+class AlignmentRun:
+    alignments: Dict[str, Dict[str, dict]]                   # report key -> framework -> alignment
+    registries: Dict[str, str]                                # framework -> name@version
+    item_counts: Dict[str, Counter] = field(default_factory=dict)  # framework -> item -> reports
+    stats: Dict[str, dict] = field(default_factory=dict)     # framework -> coverage stats
+    computed: int = 0                                         # (report, framework) pairs aligned now
+    cached: int = 0                                           # pairs served from the cache
+    seconds: float = 0.0
+
+    def stats_frame(self) -> pd.DataFrame:
+        return pd.DataFrame.from_dict(self.stats, orient="index")
+
+    def item_frame(self, framework: str) -> pd.DataFrame:
+        """Reports covering each item of framework, most covered first."""
+        counts = self.item_counts.get(framework, Counter())
+        return pd.DataFrame(counts.most_common(), columns=["item", "reports"])
+
+def _coverage(run: AlignmentRun, frameworks: Dict[str, Registry]) -> None:
+    n = len(run.alignments)
+    for fw, registry in frameworks.items():
+        total = len(set(registry_items(fw, registry)))
+        counts, per_report, confidences, matched = Counter(), [], [], 0
+        for alignment in run.alignments.values():
+            items = set(covered_items(fw, alignment.get(fw) or {}))
+            counts.update(items)
+            matched += bool(items)
+            per_report.append(len(items) / total if total else 0.0)
+            confidences.extend(_confidences(fw, alignment.get(fw) or {}))
+        run.item_counts[fw] = counts
+        run.stats[fw] = {
+            "registry": run.registries[fw],
+            "reports": n,
+            "reports_with_matches": matched,
+            "items": total,
+            "items_covered": len(counts),
+            "corpus_coverage": len(counts) / total if total else 0.0,
+            "mean_report_coverage": sum(per_report) / n if n else 0.0,
+            "mean_confidence": sum(confidences) / len(confidences) if confidences else None,
+        }
+
+def align_reports(paths: Optional[Sequence[Tuple[str, Path]]] = None, frameworks: Dict[str, Registry] = None,
+                  max_workers: int = None, use_processes: bool = True,
+                  cache: AlignmentCache = None) -> AlignmentRun:
+    """
+    Framework alignment of every report. paths are (key, path) pairs, by default every
+    report under REPORTS_DIR (see data_loader.iter_json_files); frameworks defaults to
+    default_frameworks(). Only (report, framework) pairs missing from the cache are
+    aligned, in chunks on a process pool once there are MIN_PARALLEL of them.
+    """
+    start = time.perf_counter()
+    paths = list(iter_json_files(REPORTS_DIR) if paths is None else paths)
+    frameworks = default_frameworks() if frameworks is None else frameworks
+    cache = cache or get_alignment_cache()
+    parse_cache = get_parse_cache()
+    digests = {key: parse_cache.fingerprint(p).digest for key, p in paths}
+    run = AlignmentRun(alignments={key: {} for key, _ in paths},
+                       registries={fw: registry_key(fw, reg) for fw, reg in frameworks.items()})
+
+    pending: Dict[str, List[str]] = {}  # framework -> digests to align
+    found: Dict[str, Dict[str, dict]] = {}
+    for fw in frameworks:
+        found[fw] = cache.get_many(digests.values(), fw, run.registries[fw])
+        pending[fw] = sorted({d for d in digests.values() if d not in found[fw]})
+        run.cached += sum(1 for d in digests.values() if d in found[fw])
+
+    if any(pending.values()):
+        by_digest = {digests[key]: p for key, p in paths}
+        docs = {d: parse_cache.load(by_digest[d]) for d in set().union(*pending.values())}
+        tasks = [(fw, ds[i:i + CHUNK_SIZE]) for fw, ds in pending.items() for i in range(0, len(ds), CHUNK_SIZE)]
+        if use_processes and sum(len(ds) for ds in pending.values()) >= MIN_PARALLEL:
+            with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                futures = [(fw, ds, pool.submit(_align_chunk, fw, frameworks[fw], [docs[d] for d in ds]))
+                           for fw, ds in tasks]
+                results = [(fw, ds, f.result()) for fw, ds, f in futures]
+        else:
+            results = [(fw, ds, _align_chunk(fw, frameworks[fw], [docs[d] for d in ds])) for fw, ds in tasks]
+        computed: Dict[str, Dict[str, dict]] = {fw: {} for fw in frameworks}
+        for fw, ds, alignments in results:
+            computed[fw].update(zip(ds, alignments))
+        for fw, rows in computed.items():
+            if rows:
+                cache.put_many(fw, run.registries[fw], rows)
+                cache.prune(fw, run.registries[fw])
+                found[fw].update(rows)
+                run.computed += sum(1 for d in digests.values() if d in rows)
+
+    for key, d in digests.items():
+        for fw in frameworks:
+            run.alignments[key][fw] = found[fw][d]
+    _coverage(run, frameworks)
+    run.seconds = time.perf_counter() - start
+    return run
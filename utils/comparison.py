@@ -0,0 +1,126 @@
+# utils/comparison.py
+"""
+Peer comparison across the whole company universe.
+
+build_metric_matrix turns every report's `metrics` dict (latest year per company and
+metric) plus per-company sentiment aggregates into one company x metric matrix.
+compare_companies then derives, column-wise and in one vectorized pass each:
+universe percentile ranks and z-scores, the same within each sector / industry peer
+group, and per-group summary statistics. Missing values stay missing and are left
+out of every statistic.
+"""
+from typing import Dict, Iterable, List, Optional
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+PEER_GROUPS = ("sector", "industry")
+SENTIMENT_COLUMNS = ("news_sentiment", "social_sentiment")
+
+def _report_rows(reports: Iterable, name_to_id: Dict[str, str]) -> List[tuple]:
+    """(company_id, year, metric, value) for every numeric metric of every report."""
+    rows = []
+    for r in reports:
+        if r is None:
+            continue
+        get = r.get if isinstance(r, dict) else (lambda k, default=None, r=r: getattr(r, k, default))
+        cid = get("company_id") or name_to_id.get(get("company"))
+        if not cid:
+            continue
+        year = get("year") or -1
+        for metric, value in (get("metrics") or {}).items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                rows.append((cid, year, metric, float(value)))
+    return rows
+
+def build_metric_matrix(companies: Dict[str, dict], reports: Iterable,
+                        aggregates: Optional[Dict[str, dict]] = None) -> pd.DataFrame:
+    """
+    company_id x metric matrix (float, NaN where a company does not report a metric).
+    reports may be raw report dicts or utils.records.Report records; when a company
+    has several reports the latest year's value of each metric wins. aggregates
+    (company_id -> ESGDataStore.aggregates output) adds the sentiment columns.
+    """
+    name_to_id = {c.get("name"): cid for cid, c in companies.items()}
+    long = pd.DataFrame(_report_rows(reports, name_to_id),
+                        columns=["company_id", "year", "metric", "value"])
+    latest = long.sort_values("year").drop_duplicates(["company_id", "metric"], keep="last")
+    matrix = latest.pivot(index="company_id", columns="metric", values="value")
+    matrix = matrix.reindex(index=sorted(companies), columns=sorted(matrix.columns))
+    if aggregates:
+        for col in SENTIMENT_COLUMNS:
+            matrix[col] = pd.Series({cid: (a or {}).get(col) for cid, a in aggregates.items()}, dtype=float)
+    matrix.index.name, matrix.columns.name = "company_id", "metric"
+    return matrix.astype(float)
+
+def _zscores(frame: pd.DataFrame) -> pd.DataFrame:
+    std = frame.std(ddof=0).replace(0.0, np.nan)
+    return (frame - frame.mean()) / std
+
+@dataclass
+class ComparisonResult:
+    matrix: pd.DataFrame              # company_id x metric values
+    profiles: pd.DataFrame            # company_id -> name, sector, industry
+    percentiles: pd.DataFrame         # universe percentile rank, 0-100
+    zscores: pd.DataFrame             # universe z-score
+    peer_percentiles: Dict[str, pd.DataFrame] = field(default_factory=dict)  # group -> frame
+    peer_zscores: Dict[str, pd.DataFrame] = field(default_factory=dict)
+    peer_stats: Dict[str, pd.DataFrame] = field(default_factory=dict)        # (group value, metric) rows
+    version: Optional[str] = None
+
+    @property
+    def metrics(self) -> List[str]:
+        return list(self.matrix.columns)
+
+    def metric_table(self, metric: str, group_by: str = "sector") -> pd.DataFrame:
+        """One row per company for a metric: value, universe and peer-group standing."""
+        grp = self.profiles[group_by]
+        stats = self.peer_stats[group_by].xs(metric, level="metric")
+        out = pd.DataFrame({
+            "name": self.profiles["name"],
+            group_by: grp,
+            "value": self.matrix[metric],
+            "percentile": self.percentiles[metric],
+            "z_score": self.zscores[metric],
+            "peer_percentile": self.peer_percentiles[group_by][metric],
+            "peer_z_score": self.peer_zscores[group_by][metric],
+            "peer_mean": grp.map(stats["mean"]),
+            "peer_count": grp.map(stats["count"]),
+        })
+        return out.sort_values("value", ascending=False, na_position="last")
+
+    def company_profile(self, company_id: str, group_by: str = "sector") -> pd.DataFrame:
+        """One row per metric for a company."""
+        return pd.DataFrame({
+            "value": self.matrix.loc[company_id],
+            "percentile": self.percentiles.loc[company_id],
+            "z_score": self.zscores.loc[company_id],
+            "peer_percentile": self.peer_percentiles[group_by].loc[company_id],
+            "peer_z_score": self.peer_zscores[group_by].loc[company_id],
+        }).dropna(subset=["value"])
+
+def compare_companies(companies: Dict[str, dict], matrix: pd.DataFrame,
+                      peer_groups=PEER_GROUPS, version: str = None) -> ComparisonResult:
+    """Universe and peer-group rankings and statistics for a company x metric matrix."""
+    profiles = pd.DataFrame({
+        "name": {cid: c.get("name") for cid, c in companies.items()},
+        **{g: {cid: c.get(g) or "Unknown" for cid, c in companies.items()} for g in peer_groups},
+    }).reindex(matrix.index)
+    result = ComparisonResult(
+        matrix=matrix, profiles=profiles,
+        percentiles=matrix.rank(pct=True) * 100,
+        zscores=_zscores(matrix),
+        version=version,
+    )
+    for g in peer_groups:
+        grouped = matrix.groupby(profiles[g])
+        result.peer_percentiles[g] = grouped.rank(pct=True) * 100
+        mean = grouped.transform("mean")
+        std = grouped.transform("std", ddof=0).replace(0.0, np.nan)
+        result.peer_zscores[g] = (matrix - mean) / std
+        stats = grouped.agg(["count", "mean", "std", "median", "min", "max"])
+        stats = stats.stack(level=0, future_stack=True)
+        stats.index.names = [g, "metric"]
+        result.peer_stats[g] = stats
+    return result
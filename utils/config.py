@@ -20,9 +20,48 @@ NEWS_DIR = DATA_DIR / "news"
 SOCIAL_DIR = DATA_DIR / "social_media"
 FRAMEWORKS_DIR = DATA_DIR / "frameworks"
 KG_DIR = DATA_DIR / "kg_exports"
+EVENT_STORE_DIR = DATA_DIR / "event_store"
+CACHE_DIR = DATA_DIR / ".cache"
 
 # Default graph file
 MERGED_GRAPH_JSON = KG_DIR / "merged_graph.json"
+# Incremental builds (see utils/incremental_graph.py): per-file state and the last run's delta
+GRAPH_BUILD_STATE_JSON = CACHE_DIR / "graph_build_state.json"
+GRAPH_DELTA_JSON = KG_DIR / "graph_delta.json"
+# Review log of batch entity resolution runs (see utils/entity_resolution.py)
+ENTITY_RESOLUTION_LOG = KG_DIR / "entity_resolution_log.jsonl"
+# a graph store folds its curation journal into the graph once the journal passes this size
+GRAPH_JOURNAL_COMPACT_BYTES = 1024 * 1024
+
+# Parsed-document cache shared by all processes (see utils/parse_cache.py)
+PARSE_CACHE_DB = CACHE_DIR / "parse_cache.sqlite"
+PARSE_CACHE_MAX_BYTES = 512 * 1024 * 1024
+# cache hits update LRU times and counters in memory, written out at most this often
+PARSE_CACHE_FLUSH_SECONDS = 5.0
+
+# Company -> data file index (see utils/file_index.py)
+FILE_INDEX_JSON = CACHE_DIR / "file_index.json"
+
+# Persistent running sentiment/topic aggregates (see utils/running_aggregates.py)
+RUNNING_AGGREGATES_JSON = CACHE_DIR / "running_aggregates.json"
+# Distinct topics tracked per (company, channel, source) group; counts beyond it are approximate
+RUNNING_TOPIC_CAPACITY = 500
+
+# Framework alignment results per (report hash, registry version) (see utils/alignment.py)
+ALIGNMENT_CACHE_DB = CACHE_DIR / "alignment_cache.sqlite"
+
+# Compiled framework registries, reloaded when their JSON changes (see utils/framework_registry.py)
+REGISTRY_CACHE_DIR = CACHE_DIR / "registries"
+
+# Estimated memory the shared ESGDataStore may hold in parsed documents
+DATASTORE_MEMORY_BUDGET = 512 * 1024 * 1024
+
+# Memory-mapped corpus snapshot built by snapshot.py (see utils/snapshot.py)
+SNAPSHOT_FILE = CACHE_DIR / "corpus.esgsnap"
+
+# Background polling of DATA_DIR for added/changed/removed files (see utils/watcher.py)
+WATCH_DATA = True
+WATCH_INTERVAL_SECONDS = 5.0
 
 # Small helpers
 def ensure_dirs():
@@ -1,60 +1,213 @@
-# import json
-# import os
-
-def load_json(folder_path):
-    data = {}
-    for filename in os.listdir(folder_path):
-        if filename.endswith(".json"):
-            with open(os.path.join(folder_path, filename), "r") as f:
-                data[filename] = json.load(f)
-    return data
-
-def load_company(company_id):
-    path = f"data/companies/{company_id}.json"
-    with open(path) as f: return json.load(f)
-
 # utils/data_loader.py
+import hashlib
 import json
 import os
-import re
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
-from functools import lru_cache
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
+import re
+
+try:
+    import orjson
+except ImportError:  # stdlib json is used instead
+    orjson = None
 
 from .config import COMPANIES_DIR, REPORTS_DIR, NEWS_DIR, SOCIAL_DIR, FRAMEWORKS_DIR
+from .parse_cache import get_parse_cache
+from .file_index import normalize, filename_keys, get_file_index
+from .partitions import discover_partitions, normalize_filters
+from .records import ingest_document, RecordValidationError
 
 # -------------------------
 # Helpers
 # -------------------------
-def normalize(name: str) -> str:
-    """Normalize strings for filename matching."""
-    return re.sub(r'[^a-z0-9]', '', name.lower())
-
-def list_json_files(folder: Path) -> List[str]:
-    return [f.name for f in folder.glob("*.json")]
+def _name_matches(fname: str, wanted: Dict[str, str], company_name: str = None) -> bool:
+    """Flat-layout fallback: filter a file on its name tokens (company id or name, year)."""
+    keys = filename_keys(fname)
+    tokens = {t.lower() for t in re.split(r'[^A-Za-z0-9]+', Path(fname).stem) if t}
+    for key, value in wanted.items():
+        if key == "company_id":
+            names = {normalize(value), normalize(company_name or "")} - {""}
+            if not names & keys:
+                return False
+        elif value.lower() not in tokens and normalize(value) not in keys:
+            return False
+    return True
+
+def company_name_for(company_id: str) -> Optional[str]:
+    """Name of the company with this company_id, from the company files (None if unknown)."""
+    for _, p in iter_json_files(COMPANIES_DIR):
+        doc = load_json_file(str(p)) or {}
+        if doc.get("company_id") == company_id:
+            return doc.get("name")
+    return None
+
+def iter_json_files(folder: Path, company_id: str = None, year=None,
+                    company_name: str = None) -> Iterator[Tuple[str, Path]]:
+    """
+    (key, path) for the *.json files of a data folder, optionally restricted to one
+    company and/or year. key is the path relative to folder, so flat files keep
+    their plain filename and partitioned ones read "company_id=CMPA/year=2024/x.json".
+    Partition directories that cannot match are pruned without being listed; files
+    in the flat root (or in partitions that do not encode a filtered key) are matched
+    on their filename tokens instead; flat files are named after the company
+    ("companyA_2023_report.json"), so company_name defaults to the name the company
+    files give for company_id.
+    """
+    folder = Path(folder)
+    wanted = normalize_filters({"company_id": company_id, "year": year})
+    if "company_id" in wanted and company_name is None and folder != COMPANIES_DIR:
+        company_name = company_name_for(wanted["company_id"])
+    for f in sorted(folder.glob("*.json")):
+        if not wanted or _name_matches(f.name, wanted, company_name):
+            yield f.name, f
+    for part in discover_partitions(folder, **wanted):
+        missing = {k: v for k, v in wanted.items() if k not in part.spec}
+        for f in sorted(part.path.glob("*.json")):
+            if not missing or _name_matches(f.name, missing, company_name):
+                yield f.relative_to(folder).as_posix(), f
+
+def list_json_files(folder: Path, **filters) -> List[str]:
+    return [key for key, _ in iter_json_files(folder, **filters)]
+
+def corpus_version(folders=(COMPANIES_DIR, REPORTS_DIR, NEWS_DIR, SOCIAL_DIR)) -> str:
+    """
+    Digest of the (path, size, mtime) of every data file: changes whenever a file is
+    added, removed or rewritten. Costs one stat per file, no reads.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    for folder in folders:
+        for key, p in iter_json_files(folder):
+            try:
+                st = os.stat(p)
+            except FileNotFoundError:
+                continue
+            h.update(f"{folder}/{key}\0{st.st_size}\0{st.st_mtime_ns}\n".encode("utf-8"))
+    return h.hexdigest()
 
 # -------------------------
 # Load utilities
 # -------------------------
-@lru_cache(maxsize=32)
+def parse_json_bytes(data: bytes):
+    """Decode JSON with orjson when it is installed, else the stdlib parser."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data.decode("utf-8"))
+
+def _cached_parse(p: Path) -> dict:
+    """Parse through the shared parse cache; parse directly if the cache DB is unusable."""
+    try:
+        return get_parse_cache().load(p, parse=parse_json_bytes)
+    except sqlite3.Error:
+        return parse_json_bytes(p.read_bytes())
+
 def load_json_file(path: str) -> Optional[dict]:
+    """Parse a JSON file through the shared on-disk parse cache."""
     p = Path(path)
     if not p.exists():
         return None
     try:
-        return json.loads(p.read_text(encoding="utf-8"))
+        return _cached_parse(p)
     except Exception:
         return None
 
-def load_all_from_folder(folder: Path) -> Dict[str, dict]:
-    """Return a dict filename -> parsed json for all json files in folder."""
-    out = {}
-    for f in folder.glob("*.json"):
+def _parse_record(kind: str):
+    def parse(data: bytes):
+        return ingest_document(kind, parse_json_bytes(data))
+    return parse
+
+def load_record(kind: str, path: str):
+    """
+    Validated, normalized record for a file (see utils.records), cached across
+    processes under its own parse-cache namespace. Returns None if the file is
+    missing or fails validation.
+    """
+    p = Path(path)
+    if not p.exists():
+        return None
+    try:
+        return get_parse_cache().load(p, parse=_parse_record(kind), namespace=f"record-{kind}")
+    except RecordValidationError:
+        return None
+    except sqlite3.Error:
         try:
-            out[f.name] = json.loads(f.read_text(encoding="utf-8"))
-        except Exception:
-            out[f.name] = None
-    return out
+            return ingest_document(kind, parse_json_bytes(p.read_bytes()))
+        except RecordValidationError:
+            return None
+
+@dataclass
+class LoadError:
+    file: str
+    error: str
+
+@dataclass
+class LoadReport:
+    """What a bulk folder load did: counts, throughput and per-file failures."""
+    folder: str
+    files: int = 0
+    loaded: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+    errors: List[LoadError] = field(default_factory=list)
+
+    @property
+    def files_per_sec(self) -> float:
+        return self.files / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def mb_per_sec(self) -> float:
+        return self.bytes / 1e6 / self.seconds if self.seconds > 0 else 0.0
+
+    def summary(self) -> str:
+        return (f"{Path(self.folder).name}: {self.loaded}/{self.files} files, "
+                f"{self.bytes / 1e6:.2f} MB in {self.seconds:.2f}s "
+                f"({self.files_per_sec:.1f} files/s, {self.mb_per_sec:.2f} MB/s), "
+                f"{len(self.errors)} errors")
+
+def _load_one(key: str, path: str) -> Tuple[str, Optional[dict], int, Optional[str]]:
+    """Worker: (key, parsed doc or None, size in bytes, error message or None)."""
+    p = Path(path)
+    try:
+        size = p.stat().st_size
+        return key, _cached_parse(p), size, None
+    except Exception as e:
+        return key, None, 0, f"{type(e).__name__}: {e}"
+
+def load_folder(folder: Path, max_workers: int = None, use_processes: bool = False,
+                company_id: str = None, year=None,
+                company_name: str = None) -> Tuple[Dict[str, dict], LoadReport]:
+    """
+    Parse the *.json files of folder on a thread pool (or a process pool when parsing
+    is CPU-bound and the documents are large). company_id/year restrict the load to
+    matching partitions (see iter_json_files). Returns (key -> doc, LoadReport);
+    files that fail to read or parse are listed in the report instead of the data.
+    """
+    files = list(iter_json_files(folder, company_id=company_id, year=year,
+                                 company_name=company_name))
+    report = LoadReport(folder=str(folder), files=len(files))
+    out = {}
+    start = time.perf_counter()
+    if files:
+        keys = [k for k, _ in files]
+        paths = [str(p) for _, p in files]
+        pool_cls = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        with pool_cls(max_workers=max_workers) as pool:
+            for name, doc, size, err in pool.map(_load_one, keys, paths):
+                report.bytes += size
+                if err is None:
+                    out[name] = doc
+                else:
+                    report.errors.append(LoadError(file=name, error=err))
+    report.loaded = len(out)
+    report.seconds = time.perf_counter() - start
+    return out, report
+
+def load_all_from_folder(folder: Path, **filters) -> Dict[str, dict]:
+    """Return a dict key -> parsed json for the (matching) json files in folder."""
+    return load_folder(folder, **filters)[0]
 
 # -------------------------
 # Public loaders
@@ -62,35 +215,32 @@ def load_all_from_folder(folder: Path) -> Dict[str, dict]:
 def load_companies() -> Dict[str, dict]:
     return load_all_from_folder(COMPANIES_DIR)
 
-def load_reports() -> Dict[str, dict]:
-    return load_all_from_folder(REPORTS_DIR)
+def load_reports(company_id: str = None, year=None) -> Dict[str, dict]:
+    return load_all_from_folder(REPORTS_DIR, company_id=company_id, year=year)
 
-def load_news() -> Dict[str, dict]:
-    return load_all_from_folder(NEWS_DIR)
+def load_news(company_id: str = None, year=None) -> Dict[str, dict]:
+    return load_all_from_folder(NEWS_DIR, company_id=company_id, year=year)
 
-def load_social_media() -> Dict[str, dict]:
-    return load_all_from_folder(SOCIAL_DIR)
+def load_social_media(company_id: str = None, year=None) -> Dict[str, dict]:
+    return load_all_from_folder(SOCIAL_DIR, company_id=company_id, year=year)
 
 def load_frameworks() -> Dict[str, dict]:
     return load_all_from_folder(FRAMEWORKS_DIR)
 
+def load_json(folder_path) -> Dict[str, dict]:
+    """Filename -> parsed json for a folder. Prefer utils.datastore in pages."""
+    return load_all_from_folder(Path(folder_path))
+
+def load_company(company_id: str) -> Optional[dict]:
+    return load_json_file(str(COMPANIES_DIR / f"{company_id}.json"))
+
 # -------------------------
 # Detection helpers
 # -------------------------
 def detect_files_for_company(company_name: str, company_id: str) -> dict:
     """
     Return lists of candidate file paths for reports, news, social for a company.
-    Matching uses normalized company name and company_id substrings.
+    Files are resolved through the persistent filename index: a file matches when one
+    of its filename tokens (or a run of them) equals the normalized name or id.
     """
-    name_key = normalize(company_name)
-    id_key = normalize(company_id)
-
-    def match(fname: str) -> bool:
-        nk = normalize(fname)
-        return (name_key in nk) or (id_key in nk)
-
-    reports = [str(REPORTS_DIR / f) for f in list_json_files(REPORTS_DIR) if match(f)]
-    news = [str(NEWS_DIR / f) for f in list_json_files(NEWS_DIR) if match(f)]
-    social = [str(SOCIAL_DIR / f) for f in list_json_files(SOCIAL_DIR) if match(f)]
-
-    return {"reports": reports, "news": news, "social": social}
+    return get_file_index().files_for_company(company_name, company_id)
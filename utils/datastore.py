@@ -0,0 +1,359 @@
+# utils/datastore.py
+"""
+Process-wide access point for the ESG data tree.
+
+One ESGDataStore is shared by every Streamlit session in the server process (see
+get_datastore). Company profiles are small and loaded together; reports, news and
+social documents are loaded lazily, per company or per file, through the parse
+cache and kept in an LRU bounded by a memory budget. Each access re-stats the file
+so a changed file is reloaded rather than served stale.
+
+When a corpus snapshot (snapshot.py) exists and was built from the current data
+files (its stored corpus version still matches, checked at most every
+WATCH_INTERVAL_SECONDS), the company list and per-company aggregates are answered
+from its memory-mapped columns without parsing any document.
+
+Documents handed out are shared between sessions: treat them as read-only.
+"""
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from collections import OrderedDict
+from itertools import chain
+from pathlib import Path
+import os
+import threading
+import time
+
+from .config import COMPANIES_DIR, DATASTORE_MEMORY_BUDGET, WATCH_DATA, WATCH_INTERVAL_SECONDS
+from .data_loader import load_folder, load_json_file, load_record, corpus_version
+from .file_index import get_file_index, filename_keys, normalize
+from .partitions import partition_values
+from .aggregations import sentiment_columns, sentiment_overview
+from .rollup import RollupCube
+from .comparison import ComparisonResult, build_metric_matrix, compare_companies
+from .risk_index import RiskIndex, risk_rows
+from .snapshot import load_snapshot
+
+# Parsed JSON takes several times its on-disk size as Python objects.
+PARSED_SIZE_FACTOR = 6
+
+KINDS = ("reports", "news", "social")
+
+class ESGDataStore:
+    def __init__(self, memory_budget: int = None):
+        self.memory_budget = DATASTORE_MEMORY_BUDGET if memory_budget is None else memory_budget
+        self._lock = threading.RLock()
+        # (tag, path) -> (size, mtime_ns, doc, estimated bytes)
+        self._docs: "OrderedDict[str, Tuple[int, int, Any, int]]" = OrderedDict()
+        self._used = 0
+        self._companies: Optional[Dict[str, dict]] = None
+        self._companies_version = None
+        self._companies_checked = 0.0  # monotonic time the company files were last stat'ed
+        self._version: Optional[Tuple[str, float]] = None  # (corpus_version(), monotonic time computed)
+        # company_id -> derived aggregates, dropped when one of the company's files changes
+        self._aggregates: Dict[str, dict] = {}
+        self._rollups: Dict[str, RollupCube] = {}
+        self._comparison: Optional[ComparisonResult] = None
+        self._risk: Optional[Tuple[str, RiskIndex]] = None  # (corpus version, index)
+        # snapshot answers are only used for companies whose files have not changed since
+        self._dirty_companies: set = set()
+        self._snapshot_stale = False
+        self._snapshot_seen: Optional[Tuple[int, float]] = None  # (built_at_ns, monotonic time of last check)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # -------------------------
+    # Companies (small, loaded together)
+    # -------------------------
+    def _snapshot(self, recheck: bool = False):
+        """
+        The mapped corpus snapshot, unless a data file was added, removed or rewritten
+        since it was built. recheck compares corpus versions even within the interval.
+        """
+        snap = load_snapshot()
+        if snap is None:
+            return None
+        with self._lock:
+            seen = self._snapshot_seen
+            if seen is None or seen[0] != snap.built_at_ns:
+                # a rebuilt snapshot covers the changes that made the previous one stale
+                self._snapshot_stale = False
+                self._dirty_companies.clear()
+            elif self._snapshot_stale:
+                return None
+            elif not recheck and time.monotonic() - seen[1] < WATCH_INTERVAL_SECONDS:
+                return snap
+            self._snapshot_seen = (snap.built_at_ns, time.monotonic())
+        if snap.corpus_version is None or snap.corpus_version != self._corpus_version(fresh=recheck):
+            self._snapshot_stale = True
+            return None
+        return snap
+
+    def _corpus_version(self, fresh: bool = False) -> str:
+        """corpus_version(), recomputed at most every WATCH_INTERVAL_SECONDS, after invalidate() or when fresh."""
+        with self._lock:
+            cached = self._version
+            if not fresh and cached is not None and time.monotonic() - cached[1] < WATCH_INTERVAL_SECONDS:
+                return cached[0]
+        version = corpus_version()
+        with self._lock:
+            self._version = (version, time.monotonic())
+        return version
+
+    def companies(self) -> Dict[str, dict]:
+        """company_id -> company profile, re-checked at most every WATCH_INTERVAL_SECONDS."""
+        with self._lock:
+            now = time.monotonic()
+            if self._companies is not None and now - self._companies_checked < WATCH_INTERVAL_SECONDS:
+                return self._companies
+            # (path, size, mtime) of every company file, so an in-place rewrite is seen too
+            version = corpus_version((COMPANIES_DIR,))
+            self._companies_checked = now
+            if self._companies is None or version != self._companies_version:
+                snap = self._snapshot(recheck=self._companies is not None)
+                if snap is not None:
+                    self._companies = snap.companies()
+                    self._companies_version = version
+                    return self._companies
+                data, _ = load_folder(COMPANIES_DIR)
+                self._companies = {c.get("company_id") or Path(f).stem: c
+                                   for f, c in sorted(data.items()) if c}
+                self._companies_version = version
+            return self._companies
+
+    def company(self, company_id: str) -> Optional[dict]:
+        return self.companies().get(company_id)
+
+    def company_by_name(self, name: str) -> Optional[dict]:
+        for c in self.companies().values():
+            if c.get("name") == name:
+                return c
+        return None
+
+    # -------------------------
+    # Lazy documents
+    # -------------------------
+    def _get(self, path: str, tag: str = "doc",
+             loader: Callable[[str], Any] = load_json_file) -> Optional[Any]:
+        """Cached loader(path); entries are keyed by (tag, path) and revalidated by size/mtime."""
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            self.invalidate(path)
+            return None
+        key = (tag, path)
+        with self._lock:
+            entry = self._docs.get(key)
+            if entry and entry[0] == st.st_size and entry[1] == st.st_mtime_ns:
+                self._docs.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+        doc = loader(path)
+        with self._lock:
+            self.misses += 1
+            self._drop(key)
+            if doc is not None:
+                est = st.st_size * PARSED_SIZE_FACTOR
+                self._docs[key] = (st.st_size, st.st_mtime_ns, doc, est)
+                self._used += est
+                self._evict()
+        return doc
+
+    def _drop(self, key: Tuple[str, str]):
+        entry = self._docs.pop(key, None)
+        if entry:
+            self._used -= entry[3]
+
+    def _evict(self):
+        # always keep the most recent entry, even if it alone exceeds the budget
+        while self._used > self.memory_budget and len(self._docs) > 1:
+            _, entry = self._docs.popitem(last=False)
+            self._used -= entry[3]
+            self.evictions += 1
+
+    def files(self, kind: str) -> List[str]:
+        """Filenames available for kind ("reports", "news" or "social"), without parsing them."""
+        return get_file_index().files(kind)
+
+    def document(self, kind: str, fname: str) -> Optional[dict]:
+        return self._get(str(get_file_index().folders[kind] / fname))
+
+    def record(self, kind: str, fname: str):
+        """
+        Validated, normalized record (see utils.records) for a file. Validation runs
+        once per file version: the result is cached in the shared parse cache and in
+        this store. Returns None for missing or invalid files.
+        """
+        return self._get(str(get_file_index().folders[kind] / fname), tag="record",
+                         loader=lambda p: load_record(kind, p))
+
+    def files_for(self, company_id: str) -> Dict[str, List[str]]:
+        comp = self.company(company_id) or {}
+        return get_file_index().files_for_company(comp.get("name", ""), company_id)
+
+    def _docs_for(self, company_id: str, kind: str) -> List[dict]:
+        docs = [self._get(p) for p in self.files_for(company_id)[kind]]
+        return [d for d in docs if d]
+
+    def reports_for(self, company_id: str) -> List[dict]:
+        return self._docs_for(company_id, "reports")
+
+    def news_for(self, company_id: str) -> List[dict]:
+        return self._docs_for(company_id, "news")
+
+    def social_for(self, company_id: str) -> List[dict]:
+        return self._docs_for(company_id, "social")
+
+    # -------------------------
+    # Per-company aggregates
+    # -------------------------
+    def aggregates(self, company_id: str) -> dict:
+        """
+        Sentiment overview of a company (see aggregations.sentiment_overview): average
+        news/social sentiment, positive/neutral/negative breakdown, per-source stats and
+        top topics. Memoized until the company's files change.
+        """
+        with self._lock:
+            cached = self._aggregates.get(company_id)
+        if cached is not None:
+            return cached
+        snap = self._snapshot()
+        if snap is not None and company_id not in self._dirty_companies:
+            agg = snap.aggregates(company_id)
+            if agg is not None:
+                with self._lock:
+                    self._aggregates[company_id] = agg
+                return agg
+        return self._compute_live(company_id)[0]
+
+    def rollup(self, company_id: str) -> RollupCube:
+        """
+        Time-bucketed sentiment cube (see utils.rollup) covering the company. Served from
+        the snapshot's corpus-wide cube while the company's files are unchanged, else
+        built from its documents and memoized like aggregates.
+        """
+        with self._lock:
+            cached = self._rollups.get(company_id)
+        if cached is not None:
+            return cached
+        snap = self._snapshot()
+        if snap is not None and company_id not in self._dirty_companies:
+            cube = snap.rollup()
+            if cube is not None:
+                return cube
+        return self._compute_live(company_id)[1]
+
+    def _compute_live(self, company_id: str) -> Tuple[dict, RollupCube]:
+        """Aggregates and rollup cube of a company from one pass over its documents."""
+        cols = sentiment_columns(self.news_for(company_id), self.social_for(company_id))
+        agg, cube = sentiment_overview(cols), RollupCube.from_columns(cols)
+        with self._lock:
+            self._aggregates[company_id] = agg
+            self._rollups[company_id] = cube
+        return agg, cube
+
+    # -------------------------
+    # Universe-wide comparison
+    # -------------------------
+    def comparison(self) -> ComparisonResult:
+        """Peer comparison of every company (see utils.comparison), recomputed only when the corpus version changes."""
+        version = self._corpus_version()
+        cached = self._comparison
+        if cached is not None and cached.version == version:
+            return cached
+        companies = self.companies()
+        reports = [self.record("reports", f) for f in self.files("reports")]
+        matrix = build_metric_matrix(companies, reports,
+                                     {cid: self.aggregates(cid) for cid in companies})
+        result = compare_companies(companies, matrix, version=version)
+        with self._lock:
+            self._comparison = result
+        return result
+
+    def risk_index(self) -> RiskIndex:
+        """
+        Portfolio-wide risk-signal index (see utils.risk_index). Mapped from the snapshot
+        while no company's files changed since it was built, else rebuilt from the news
+        and social documents; recomputed only when the corpus version changes.
+        """
+        version = self._corpus_version()
+        cached = self._risk
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        snap = self._snapshot()
+        index = snap.risk_index() if snap is not None and not self._dirty_companies else None
+        if index is None:
+            # every file once, under the first company it matches (as in the event store)
+            seen, parts = set(), [risk_rows()]
+
+            def unseen(paths: List[str]) -> List[dict]:
+                paths = [p for p in paths if p not in seen]
+                seen.update(paths)
+                return [d for d in map(self._get, paths) if d]
+
+            for cid in self.companies():
+                files = self.files_for(cid)
+                parts.append(risk_rows(unseen(files["news"]), unseen(files["social"]), company_id=cid))
+            index = RiskIndex.from_rows({k: list(chain.from_iterable(p[k] for p in parts))
+                                         for k in parts[0]})
+        with self._lock:
+            self._risk = (version, index)
+        return index
+
+    def _companies_for_file(self, path) -> List[str]:
+        keys = filename_keys(Path(path).name)
+        company_id = partition_values(path).get("company_id")
+        if company_id:
+            keys.add(normalize(company_id))
+        return [cid for cid, c in (self._companies or {}).items()
+                if normalize(cid) in keys or normalize(c.get("name") or "") in keys]
+
+    # -------------------------
+    # Maintenance
+    # -------------------------
+    def invalidate(self, path) -> None:
+        """Drop the cached document for path and the aggregates of the companies it belongs to."""
+        with self._lock:
+            for tag in ("doc", "record"):
+                self._drop((tag, str(path)))
+            self._version = None
+            if Path(path).parent == COMPANIES_DIR:
+                self._companies = None
+                self._aggregates.clear()
+                self._rollups.clear()
+                self._snapshot_stale = True
+                return
+            for cid in self._companies_for_file(path):
+                self._aggregates.pop(cid, None)
+                self._rollups.pop(cid, None)
+                self._dirty_companies.add(cid)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._docs.clear()
+            self._used = 0
+            self._companies = None
+            self._aggregates.clear()
+            self._rollups.clear()
+            self._comparison = None
+            self._risk = None
+            self._version = None
+
+    def stats(self) -> Dict[str, int]:
+        return {"documents": len(self._docs), "estimated_bytes": self._used,
+                "memory_budget": self.memory_budget, "hits": self.hits,
+                "misses": self.misses, "evictions": self.evictions}
+
+_store: Optional[ESGDataStore] = None
+_store_lock = threading.Lock()
+
+def get_datastore() -> ESGDataStore:
+    """The single ESGDataStore of this server process."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ESGDataStore()
+            if WATCH_DATA:
+                from .watcher import start_default_watcher
+                start_default_watcher()
+        return _store
@@ -0,0 +1,262 @@
+# utils/entity_resolution.py
+"""
+Batch entity resolution for duplicate knowledge-graph nodes.
+
+ESG Topic and Organization nodes are resolved within their type in three steps:
+
+  blocking    names are normalized (case, punctuation, plurals, filler words,
+              trailing legal suffixes for organizations) and dropped into buckets
+              by normalized key and by token. Only names sharing a bucket are
+              compared, and token buckets holding more than max_block names are
+              skipped, so the work is bounded by the bucket sizes rather than n².
+  scoring     a candidate pair scores the cosine of the names' character 3-gram
+              TF-IDF vectors. It is accepted when the normalized keys are equal,
+              when the score reaches threshold, or when one name's tokens contain
+              the other's plus at most one extra token and the score reaches
+              containment_threshold ("Emissions" / "CO2 emissions"). Pairs that
+              differ by a number or a single letter ("Scope 1" / "Scope 2",
+              "Company A" / "Company B") are never accepted.
+  clustering  accepted pairs are joined with union-find; each cluster keeps as
+              canonical its best-connected node, and members are kept only if
+              they would be accepted against the canonical itself, so a chain of
+              small steps cannot pull unrelated names together.
+
+Proposals are reviewed as a table (ResolutionRun.frame) and applied with
+apply_merges, which merges through the graph store's journal and appends every
+proposal and whether it was applied to ENTITY_RESOLUTION_LOG.
+"""
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from collections import defaultdict
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from pathlib import Path
+import json
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from .config import ENTITY_RESOLUTION_LOG
+from .graph_store import GraphStore
+from .text_match import tokenize
+
+RESOLVED_TYPES = ("ESG Topic", "Organization")
+FILLER_WORDS = {"and", "of", "the", "in", "for", "on", "to", "with", "by"}
+LEGAL_SUFFIXES = {"inc", "incorporated", "corp", "corporation", "co", "ltd", "limited", "llc",
+                  "plc", "sa", "ag", "nv", "gmbh", "group", "holding", "holdings"}
+PAIR_CHUNK = 100_000
+
+def _fold(tok: str) -> str:
+    """Light plural folding: 'emissions' -> 'emission', 'injuries' -> 'injury'."""
+    if len(tok) > 4 and tok.endswith("ies"):
+        return tok[:-3] + "y"
+    return tok[:-1] if len(tok) > 3 and tok.endswith("s") and not tok.endswith("ss") else tok
+
+def normalize_name(name: str, node_type: str = None) -> Tuple[str, ...]:
+    """Folded tokens of a node name, filler words (and organizations' trailing legal suffixes) dropped."""
+    tokens = [_fold(t) for t in tokenize(name) if t not in FILLER_WORDS]
+    if node_type == "Organization":
+        while len(tokens) > 1 and tokens[-1] in LEGAL_SUFFIXES:
+            tokens.pop()
+    return tuple(tokens)
+
+def _conflicting(a: Set[str], b: Set[str]) -> bool:
+    """Both names have tokens of their own and one of those is a number or a single letter."""
+    only_a, only_b = a - b, b - a
+    return bool(only_a and only_b) and any(len(t) == 1 or any(c.isdigit() for c in t)
+                                           for t in only_a | only_b)
+
+@dataclass
+class MergeCandidate:
+    node: str            # node to merge away
+    canonical: str       # node it is merged into
+    type: str
+    score: float         # character 3-gram cosine between the two names
+    reason: str          # "normalized", "similar" or "containment"
+
+@dataclass
+class MergeCluster:
+    canonical: str
+    type: str
+    members: List[MergeCandidate] = field(default_factory=list)
+
+@dataclass
+class ResolutionRun:
+    clusters: List[MergeCluster]
+    nodes: int = 0              # nodes considered
+    candidate_pairs: int = 0    # pairs produced by blocking
+    accepted_pairs: int = 0
+    skipped_blocks: int = 0     # buckets over max_block
+    seconds: float = 0.0
+    run_id: str = ""
+
+    @property
+    def candidates(self) -> List[MergeCandidate]:
+        return [m for c in self.clusters for m in c.members]
+
+    def frame(self) -> pd.DataFrame:
+        """One row per proposed merge: type, canonical, node, score, reason."""
+        return pd.DataFrame([asdict(m) for m in self.candidates],
+                            columns=["node", "canonical", "type", "score", "reason"]
+                            )[["type", "canonical", "node", "score", "reason"]]
+
+class _UnionFind:
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+
+    def find(self, i: int) -> int:
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, i: int, j: int) -> None:
+        ri, rj = self.find(i), self.find(j)
+        if ri != rj:
+            self.parent[max(ri, rj)] = min(ri, rj)
+
+def _blocks(keys: List[Tuple[str, ...]]) -> Dict[tuple, List[int]]:
+    buckets: Dict[tuple, List[int]] = defaultdict(list)
+    for i, key in enumerate(keys):
+        if not key:
+            continue
+        buckets[("key", key)].append(i)
+        for t in set(key):
+            buckets[("tok", t)].append(i)
+    return buckets
+
+def _candidate_pairs(keys: List[Tuple[str, ...]], max_block: int, run: ResolutionRun) -> Tuple[np.ndarray, np.ndarray]:
+    """(left, right) index arrays of the distinct pairs sharing a bucket, left < right."""
+    n, codes = len(keys), []
+    for (kind, _), members in _blocks(keys).items():
+        if len(members) < 2:
+            continue
+        if kind == "tok" and len(members) > max_block:
+            run.skipped_blocks += 1
+            continue
+        m = np.asarray(members, dtype=np.int64)
+        a, b = np.triu_indices(len(m), k=1)
+        codes.append(m[a] * n + m[b])
+    if not codes:
+        return np.empty(0, np.int64), np.empty(0, np.int64)
+    codes = np.concatenate(codes)
+    codes.sort()
+    codes = codes[np.concatenate(([True], codes[1:] != codes[:-1]))]
+    return codes // n, codes % n
+
+def _cosines(X, left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    """Row-wise dot products of L2-normalized rows, in chunks to bound memory."""
+    out = np.empty(len(left), dtype=np.float64)
+    for s in range(0, len(left), PAIR_CHUNK):
+        a, b = left[s:s + PAIR_CHUNK], right[s:s + PAIR_CHUNK]
+        out[s:s + PAIR_CHUNK] = np.asarray(X[a].multiply(X[b]).sum(axis=1)).ravel()
+    return out
+
+def _resolve_type(store: GraphStore, node_type: str, names: List[str], threshold: float,
+                  containment_threshold: float, max_block: int, run: ResolutionRun) -> List[MergeCluster]:
+    keys = [normalize_name(n, node_type) for n in names]
+    sets = [set(k) for k in keys]
+
+    def accept(i: int, j: int, score: float) -> Optional[str]:
+        if keys[i] == keys[j]:
+            return "normalized"
+        if _conflicting(sets[i], sets[j]):
+            return None
+        if score >= threshold:
+            return "similar"
+        small, large = (sets[i], sets[j]) if len(sets[i]) <= len(sets[j]) else (sets[j], sets[i])
+        if small and small <= large and len(large - small) <= 1 and score >= containment_threshold:
+            return "containment"
+        return None
+
+    left, right = _candidate_pairs(keys, max_block, run)
+    run.candidate_pairs += len(left)
+    if not len(left):
+        return []
+
+    vectorizer = TfidfVectorizer(analyzer="char_wb", ngram_range=(3, 3), sublinear_tf=True)
+    X = vectorizer.fit_transform([" ".join(k) for k in keys]).tocsr()
+    scores = _cosines(X, left, right)
+
+    # only pairs with equal keys or a score reaching the lower threshold can be accepted
+    key_ids = {}
+    kid = np.asarray([key_ids.setdefault(k, len(key_ids)) for k in keys], dtype=np.int64)
+    keep = (kid[left] == kid[right]) | (scores >= min(threshold, containment_threshold))
+    uf = _UnionFind(len(names))
+    for i, j, score in zip(left[keep].tolist(), right[keep].tolist(), scores[keep].tolist()):
+        if accept(i, j, score):
+            run.accepted_pairs += 1
+            uf.union(i, j)
+    groups: Dict[int, List[int]] = defaultdict(list)
+    for i in range(len(names)):
+        groups[uf.find(i)].append(i)
+
+    clusters = []
+    for members in groups.values():
+        if len(members) < 2:
+            continue
+        canon = min(members, key=lambda i: (-store.degree(names[i]), len(names[i]), names[i]))
+        others = np.asarray([i for i in members if i != canon], dtype=np.int64)
+        sims = _cosines(X, np.full(len(others), canon, dtype=np.int64), others)
+        cluster = MergeCluster(names[canon], node_type)
+        for i, score in zip(others.tolist(), sims.tolist()):
+            reason = accept(canon, i, score)
+            if reason:
+                cluster.members.append(MergeCandidate(names[i], names[canon], node_type, round(score, 4), reason))
+        if cluster.members:
+            cluster.members.sort(key=lambda m: (-m.score, m.node))
+            clusters.append(cluster)
+    return clusters
+
+def find_duplicates(graph, types: Sequence[str] = RESOLVED_TYPES, threshold: float = 0.85,
+                    containment_threshold: float = 0.6, max_block: int = 500) -> ResolutionRun:
+    """
+    Proposed merge clusters among the nodes of the given types. graph is a GraphStore
+    or a graph JSON dict; nothing is changed until apply_merges.
+    """
+    start = time.perf_counter()
+    store = graph if isinstance(graph, GraphStore) else GraphStore.from_json(graph)
+    run = ResolutionRun(clusters=[], run_id=datetime.now().strftime("%Y%m%dT%H%M%S"))
+    by_type: Dict[str, List[str]] = defaultdict(list)
+    for name, props in store.nodes.items():
+        if props.get("type") in types:
+            by_type[props["type"]].append(name)
+    for node_type in types:
+        names = sorted(by_type.get(node_type, []))
+        run.nodes += len(names)
+        run.clusters.extend(_resolve_type(store, node_type, names, threshold,
+                                          containment_threshold, max_block, run))
+    run.clusters.sort(key=lambda c: (c.type, c.canonical))
+    run.seconds = time.perf_counter() - start
+    return run
+
+def apply_merges(store: GraphStore, run: ResolutionRun, accepted: Iterable[str] = None,
+                 log_path: Path = None) -> int:
+    """
+    Merge the proposed nodes of run into their canonicals (only the node names in
+    accepted, when given) and log every proposal with its outcome. Returns the
+    number of merges applied.
+    """
+    accepted = None if accepted is None else set(accepted)
+    log_path = Path(log_path or ENTITY_RESOLUTION_LOG)
+    now = datetime.now().isoformat(timespec="seconds")
+    applied, lines = 0, []
+    for m in run.candidates:
+        ok = (accepted is None or m.node in accepted) and store.merge_nodes(m.node, m.canonical)
+        applied += ok
+        lines.append(json.dumps({"run": run.run_id, "at": now, **asdict(m), "applied": bool(ok)},
+                                ensure_ascii=False))
+    if lines:
+        log_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(log_path, "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+    return applied
+
+def read_resolution_log(log_path: Path = None) -> pd.DataFrame:
+    """The review log as a DataFrame, most recent first."""
+    log_path = Path(log_path or ENTITY_RESOLUTION_LOG)
+    if not log_path.exists():
+        return pd.DataFrame(columns=["run", "at", "type", "canonical", "node", "score", "reason", "applied"])
+    rows = [json.loads(line) for line in log_path.read_text(encoding="utf-8").splitlines() if line.strip()]
+    return pd.DataFrame(rows)[::-1].reset_index(drop=True)
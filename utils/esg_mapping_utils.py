@@ -1,8 +1,49 @@
 # utils/esg_mapping_utils.py
-from typing import Dict, Any, List, Optional
-from pathlib import Path
-import json
-from .config import FRAMEWORKS_DIR
+from typing import Callable, Dict, Any, Iterable, List, Optional, Sequence, Tuple, Union
+from collections import OrderedDict
+import math
+import threading
+
+import numpy as np
+from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS, TfidfVectorizer
+
+from .framework_registry import CompiledRegistry, as_compiled, load_compiled_registry
+from .text_match import TokenAutomaton, tokenize
+
+# a registry as parsed JSON or compiled (see utils/framework_registry.py)
+Registry = Union[dict, CompiledRegistry]
+
+# below this cosine similarity a topic is not taken as evidence for a target
+UNSDG_MIN_SCORE = 0.1
+# share of a metric key's (idf-weighted) terms a GRI title must cover to count as a match
+GRI_MIN_SCORE = 0.3
+# matchers kept for raw registry dicts (compiled registries keep their own, see CompiledRegistry.derived)
+MATCHER_CACHE_SIZE = 8
+
+class _MatcherCache:
+    """Matchers of the most recently used raw registry dicts, by object identity, LRU-bounded."""
+
+    def __init__(self, build: Callable[[dict], Any], size: int = MATCHER_CACHE_SIZE):
+        self.build = build
+        self.size = size
+        self._lock = threading.Lock()
+        # id(registry) -> (registry, matcher); holding the registry keeps its id from being reused
+        self._items: "OrderedDict[int, Tuple[dict, Any]]" = OrderedDict()
+
+    def get(self, registry: dict):
+        key = id(registry)
+        with self._lock:
+            hit = self._items.get(key)
+            if hit is not None and hit[0] is registry:
+                self._items.move_to_end(key)
+                return hit[1]
+        matcher = self.build(registry)
+        with self._lock:
+            self._items[key] = (registry, matcher)
+            self._items.move_to_end(key)
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+        return matcher
 
 # -------------------------
 # Load framework registries
@@ -10,76 +51,237 @@ from .config import FRAMEWORKS_DIR
 def load_framework_registry(name: str) -> Optional[dict]:
     """
     Load a framework JSON by file stem. Example names: 'GRI_v2021', 'UNSDG_schema'
+    The parsed JSON is shared by the whole process (see load_compiled_registry): treat
+    it as read-only.
     """
-    path = FRAMEWORKS_DIR / f"{name}.json"
-    if not path.exists():
-        # try any file that contains the name
-        for f in FRAMEWORKS_DIR.glob("*.json"):
-            if name.lower() in f.stem.lower():
-                path = f
-                break
-    if not path.exists():
-        return None
-    return json.loads(path.read_text(encoding="utf-8"))
+    reg = load_compiled_registry(name)
+    return None if reg is None else reg.raw
 
 # -------------------------
 # Simple mapping helpers
 # -------------------------
-def map_report_metrics_to_gri(report: dict, gri_registry: dict) -> Dict[str, dict]:
+# unit and quantity words of metric keys (water_usage_litres) that say nothing about the topic
+GRI_UNIT_TERMS = frozenset({"tonne", "kg", "litre", "liter", "percentage", "percent", "pct",
+                            "total", "number", "count", "ratio", "amount"})
+
+def _gri_term(tok: str) -> str:
+    """Light plural folding so 'emissions'/'emission' and 'injuries'/'injury' meet."""
+    if len(tok) > 4 and tok.endswith("ies"):
+        return tok[:-3] + "y"
+    return tok[:-1] if len(tok) > 4 and tok.endswith("s") and not tok.endswith("ss") else tok
+
+def _gri_terms(tokens: Iterable[str]) -> List[str]:
+    """Informative terms: stop words, unit words and one- or two-character tokens (m3, kg) dropped."""
+    terms = (_gri_term(t) for t in tokens if len(t) > 2 and t not in ENGLISH_STOP_WORDS)
+    return [t for t in terms if t not in GRI_UNIT_TERMS]
+
+def gri_standards(gri_registry: Registry) -> List[Tuple[Optional[str], str]]:
+    """(id, title) of the registry's top-level standards, the entries GRI metrics are matched against."""
+    return [(s.get("standard_id") or s.get("id") or s.get("code"), s.get("title") or "")
+            for s in gri_registry.get("standards", [])]
+
+def _metrics_of(report) -> dict:
+    metrics = report.get("metrics") if isinstance(report, dict) else getattr(report, "metrics", None)
+    return metrics or {}
+
+class GRIMatcher:
     """
-    Attempt to map report metrics (report['metrics']) to GRI metrics by
-    simple substring matching between metric keys and GRI titles/ids.
-    Returns dictionary of matches {gri_id: {covered: bool, extracted_metric: {...}}}
+    GRI standard titles and ids compiled once into a TokenAutomaton. Title terms are
+    weighted by inverse document frequency over the registry's titles. A metric key
+    matches a standard with score = idf weight of the key's terms found in the title
+    / idf weight of all its terms, or 1.0 when the key contains the standard id.
+    The distinct metric keys of a batch are scanned as one token stream.
     """
-    matches = {}
-    metrics = report.get("metrics", {})
-    for gri_item in gri_registry.get("standards", []):
-        gid = gri_item.get("standard_id") or gri_item.get("id") or gri_item.get("code")
-        title = (gri_item.get("title") or "").lower()
-        for mkey, mval in metrics.items():
-            if mkey.lower() in title or any(tok in title for tok in mkey.lower().split("_")):
-                matches[gid] = {
-                    "covered": True,
-                    "extracted_metric": {"value": mval, "unit": None},
-                    "confidence": 0.7,
-                    "match_on": mkey
-                }
-    return matches
-
-def map_report_to_unsdg(report: dict, unsdg_registry: dict) -> Dict[str, Any]:
+
+    SEPARATOR = "\x00"  # never produced by tokenize: resets the automaton between keys
+
+    def __init__(self, gri_registry: Registry):
+        standards = gri_standards(gri_registry)
+        self.ids = [gid for gid, _ in standards]
+        titles = [set(_gri_terms(tokenize(title))) for _, title in standards]
+        df: Dict[str, int] = {}
+        for terms in titles:
+            for t in terms:
+                df[t] = df.get(t, 0) + 1
+        self.default_idf = math.log(1 + len(standards))
+        self.idf = {t: math.log(1 + len(standards) / n) for t, n in df.items()}
+        self.automaton = TokenAutomaton()
+        for i, (gid, terms) in enumerate(zip(self.ids, titles)):
+            for t in terms:
+                self.automaton.add([t], (i, t))
+            if gid:
+                self.automaton.add(tokenize(str(gid)), (i, None))
+        self.automaton.build()
+
+    def score_keys(self, keys: Sequence[str], min_score: float = GRI_MIN_SCORE) -> List[List[Tuple[str, float]]]:
+        """[(gri_id, score), ...] at or above min_score for each metric key, in one scan of all keys."""
+        stream, owner = [], []  # owner[token position] = index of its key
+        for k, mkey in enumerate(keys):
+            # all tokens so multi-token ids (e.g. 305-1) still match; terms fold like titles
+            tokens = [_gri_term(t) for t in tokenize(mkey)] + [self.SEPARATOR]
+            stream.extend(tokens)
+            owner.extend([k] * len(tokens))
+        found: Dict[Tuple[int, int], set] = {}  # (key, standard) -> matched terms (None = id)
+        for begin, _, (std, term) in self.automaton.find(stream):
+            found.setdefault((owner[begin], std), set()).add(term)
+        weights = [None] * len(keys)
+        out: List[List[Tuple[str, float]]] = [[] for _ in keys]
+        for (k, std), terms in found.items():
+            if None in terms:
+                score = 1.0
+            else:
+                if weights[k] is None:
+                    own = set(_gri_terms(tokenize(keys[k])))
+                    weights[k] = (own, sum(self.idf.get(t, self.default_idf) for t in own))
+                own, total = weights[k]
+                score = sum(self.idf[t] for t in terms & own) / total if total else 0.0
+            if score >= min_score:
+                out[k].append((self.ids[std], score))
+        return out
+
+    def map_reports(self, reports: Sequence, min_score: float = GRI_MIN_SCORE) -> List[Dict[str, dict]]:
+        """
+        map_report_metrics_to_gri for many reports: each distinct metric key of the batch
+        is scored once; per report, standards best first with their best-scoring metric.
+        """
+        index: Dict[str, int] = {}
+        for report in reports:
+            for mkey in _metrics_of(report):
+                index.setdefault(mkey, len(index))
+        scored = self.score_keys(list(index), min_score)
+        outs = []
+        for report in reports:
+            metrics = _metrics_of(report)
+            best: Dict[str, Tuple[float, str]] = {}
+            for mkey in metrics:
+                for gid, score in scored[index[mkey]]:
+                    if score > best.get(gid, (0.0, None))[0]:
+                        best[gid] = (score, mkey)
+            outs.append({gid: {
+                "covered": True,
+                "extracted_metric": {"value": metrics[mkey], "unit": None},
+                "confidence": round(score, 4),
+                "match_on": mkey,
+            } for gid, (score, mkey) in sorted(best.items(), key=lambda kv: -kv[1][0])})
+        return outs
+
+_gri_matchers = _MatcherCache(GRIMatcher)
+
+def gri_matcher(gri_registry: Registry) -> GRIMatcher:
+    """The matcher for a registry: kept with a compiled registry, else in a small LRU of raw dicts."""
+    if isinstance(gri_registry, CompiledRegistry):
+        return gri_registry.derived("gri_matcher", GRIMatcher)
+    return _gri_matchers.get(gri_registry)
+
+def map_reports_metrics_to_gri(reports: Sequence, gri_registry: Registry,
+                               min_score: float = GRI_MIN_SCORE) -> List[Dict[str, dict]]:
+    """Batch map_report_metrics_to_gri: one result per report, in order."""
+    return gri_matcher(gri_registry).map_reports(reports, min_score)
+
+def map_report_metrics_to_gri(report: dict, gri_registry: Registry,
+                              min_score: float = GRI_MIN_SCORE) -> Dict[str, dict]:
     """
-    Very simple mapping: match report topics -> SDG targets by keyword overlap.
-    Returns structure {sdg_id: {target_id: {covered: bool, evidence: [...]}}}
+    Map report metrics (report['metrics']) to GRI standards by whole-term matches
+    between metric keys and GRI titles/ids (see GRIMatcher).
+    Returns dictionary of matches {gri_id: {covered: bool, extracted_metric: {...}, confidence, match_on}}
     """
-    out = {}
-    # compile list of reported topics (flat)
-    topics = []
-    for cat, tlist in report.get("esg_topics", {}).items():
-        topics.extend([t.lower() for t in tlist])
-    for sdg in unsdg_registry.get("sdgs", []):
-        sdg_id = sdg.get("sdg_id")
-        out[sdg_id] = {}
-        for target in sdg.get("targets", []):
-            tgt_id = target.get("target_id")
-            text = (target.get("text") or "").lower()
-            for tp in topics:
-                if tp in text or any(tok in text for tok in tp.split()):
-                    out[sdg_id][tgt_id] = {
-                        "covered": True,
-                        "evidence": [f"topic_match:{tp}"],
-                        "confidence": 0.5
-                    }
-    return out
+    return map_reports_metrics_to_gri([report], gri_registry, min_score)[0]
 
-def build_framework_alignment(report: dict, frameworks: Dict[str, dict]) -> Dict[str, dict]:
+def _report_topics(report) -> List[str]:
+    topics = report.get("esg_topics") if isinstance(report, dict) else getattr(report, "esg_topics", None)
+    return [t for tlist in (topics or {}).values() for t in tlist if t]
+
+class UNSDGMatcher:
     """
-    Convenience function to generate a lightweight framework_alignment for a report.
-    frameworks is a dict like {'GRI': <json>, 'UNSDG': <json>, 'SASB': <json>}
+    SDG targets compiled once into an L2-normalized TF-IDF term matrix (unigrams and
+    bigrams, English stop words dropped). Report topics are vectorized with the same
+    vocabulary and scored against every target by one sparse matrix product, so the
+    score of a (topic, target) pair is their cosine similarity.
+    """
+
+    def __init__(self, unsdg_registry: Registry):
+        reg = as_compiled(unsdg_registry)
+        self.sdg_ids: List[str] = [it.id for it in reg.items_of("sdg_id")]
+        targets = reg.items_of("target_id")
+        self.targets: List[Tuple[str, str]] = [(it.parent, it.id) for it in targets]  # per matrix row
+        texts = [it.text for it in targets]  # already lower-cased
+        self.vectorizer = TfidfVectorizer(stop_words="english", ngram_range=(1, 2), sublinear_tf=True,
+                                          lowercase=False)
+        self.matrix = self.vectorizer.fit_transform(texts) if any(t.strip() for t in texts) else None
+
+    def map_reports(self, reports: Sequence, min_score: float = UNSDG_MIN_SCORE) -> List[Dict[str, Any]]:
+        """
+        map_report_to_unsdg for many reports at once: every topic of every report is
+        scored against all targets in a single product. Per report, a target's
+        confidence is its best topic score; targets are listed best first within each
+        SDG and evidence topics best first within each target.
+        """
+        outs = [{sdg_id: {} for sdg_id in self.sdg_ids} for _ in reports]
+        owner, topics = [], []
+        for i, report in enumerate(reports):
+            for tp in _report_topics(report):
+                owner.append(i)
+                topics.append(tp.lower())
+        if not topics or self.matrix is None:
+            return outs
+        scores = (self.vectorizer.transform(topics) @ self.matrix.T).tocoo()
+        keep = scores.data >= min_score
+        row, col, val = scores.row[keep], scores.col[keep], scores.data[keep]
+        rep = np.asarray(owner, dtype=np.int64)[row]
+        # group by (report, target), best topic first; then order the groups by their best score
+        order = np.lexsort((-val, col, rep))
+        hits: Dict[Tuple[int, int], List[Tuple[str, float]]] = {}
+        for r, c, t, v in zip(rep[order].tolist(), col[order].tolist(), row[order].tolist(), val[order].tolist()):
+            hits.setdefault((r, c), []).append((topics[t], v))
+        for (r, c), evidence in sorted(hits.items(), key=lambda kv: -kv[1][0][1]):
+            sdg_id, tgt_id = self.targets[c]
+            outs[r][sdg_id][tgt_id] = {
+                "covered": True,
+                "evidence": [f"topic_match:{tp}" for tp, _ in evidence],
+                "confidence": round(evidence[0][1], 4),
+            }
+        return outs
+
+_unsdg_matchers = _MatcherCache(UNSDGMatcher)
+
+def unsdg_matcher(unsdg_registry: Registry) -> UNSDGMatcher:
+    """The matcher for a registry: kept with a compiled registry, else in a small LRU of raw dicts."""
+    if isinstance(unsdg_registry, CompiledRegistry):
+        return unsdg_registry.derived("unsdg_matcher", UNSDGMatcher)
+    return _unsdg_matchers.get(unsdg_registry)
+
+def map_reports_to_unsdg(reports: Sequence, unsdg_registry: Registry,
+                         min_score: float = UNSDG_MIN_SCORE) -> List[Dict[str, Any]]:
+    """Batch map_report_to_unsdg: one result per report, in order."""
+    return unsdg_matcher(unsdg_registry).map_reports(reports, min_score)
+
+def map_report_to_unsdg(report: dict, unsdg_registry: Registry,
+                        min_score: float = UNSDG_MIN_SCORE) -> Dict[str, Any]:
     """
-    alignment = {}
+    Match report topics -> SDG targets by TF-IDF cosine similarity (see UNSDGMatcher).
+    Returns structure {sdg_id: {target_id: {covered: bool, evidence: [...], confidence}}}
+    """
+    return map_reports_to_unsdg([report], unsdg_registry, min_score)[0]
+
+def build_framework_alignments(reports: Sequence, frameworks: Dict[str, Registry]) -> List[Dict[str, dict]]:
+    """
+    build_framework_alignment for many reports at once, using the batch mappers so each
+    registry is compiled once and scanned once per batch. One result per report, in order.
+    """
+    alignments = [{} for _ in reports]
     if "GRI" in frameworks:
-        alignment["GRI"] = map_report_metrics_to_gri(report, frameworks["GRI"])
+        for out, gri in zip(alignments, map_reports_metrics_to_gri(reports, frameworks["GRI"])):
+            out["GRI"] = gri
     if "UNSDG" in frameworks:
-        alignment["UNSDG"] = map_report_to_unsdg(report, frameworks["UNSDG"])
+        for out, sdg in zip(alignments, map_reports_to_unsdg(reports, frameworks["UNSDG"])):
+            out["UNSDG"] = sdg
     # SASB mapping can be added similarly if registry provided
-    return alignment
+    return alignments
+
+def build_framework_alignment(report: dict, frameworks: Dict[str, dict]) -> Dict[str, dict]:
+    """
+    Convenience function to generate a lightweight framework_alignment for a report.
+    frameworks is a dict like {'GRI': <json>, 'UNSDG': <json>, 'SASB': <json>}; compiled
+    registries (load_compiled_registry) may stand in for the JSON.
+    """
+    return build_framework_alignments([report], frameworks)[0]
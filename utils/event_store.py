@@ -0,0 +1,197 @@
+# utils/event_store.py
+from typing import Dict, List, Optional
+from pathlib import Path
+import pandas as pd
+
+from .config import EVENT_STORE_DIR
+
+# Tables produced by the ingest stage. Every record table carries company_id so
+# aggregations can group/filter without walking the nested source documents.
+TABLE_COLUMNS = {
+    "articles": ["company_id", "article_id", "source_name", "source_type", "timestamp",
+                 "sentiment", "esg_category", "stance", "title"],
+    "posts": ["company_id", "post_id", "platform", "timestamp", "sentiment",
+              "esg_category", "stance", "author"],
+    "comments": ["company_id", "comment_id", "post_id", "platform", "timestamp",
+                 "sentiment", "author"],
+    "claims": ["company_id", "report_id", "year", "claim_id", "section", "confidence", "text"],
+    "metrics": ["company_id", "report_id", "year", "metric", "value"],
+    "risk_signals": ["company_id", "record_table", "record_id", "timestamp", "type", "severity"],
+    "topic_mentions": ["company_id", "record_table", "record_id", "timestamp",
+                       "esg_category", "topic_id"],
+    "topics": ["topic_id", "topic"],
+}
+
+TIMESTAMP_COLUMNS = ("timestamp",)
+FLOAT_COLUMNS = ("sentiment", "confidence", "value")
+CATEGORY_COLUMNS = ("company_id", "source_name", "source_type", "platform", "esg_category",
+                    "stance", "record_table", "type", "severity", "section")
+
+SEVERITY_LEVELS = ["low", "medium", "high"]
+
+# -------------------------
+# Flattening
+# -------------------------
+def _number(v) -> Optional[float]:
+    return float(v) if isinstance(v, (int, float)) and not isinstance(v, bool) else None
+
+def _company_id(doc: dict, fname: str, name_to_id: Dict[str, str]) -> str:
+    cid = doc.get("company_id")
+    if cid:
+        return str(cid)
+    name = doc.get("company")
+    if name in name_to_id:
+        return name_to_id[name]
+    return fname.split("_")[0]
+
+class _TableBuilder:
+    """Accumulates rows column-wise and interns topic strings to integer ids."""
+
+    def __init__(self):
+        self.columns = {t: {c: [] for c in cols} for t, cols in TABLE_COLUMNS.items()}
+        self.topic_ids: Dict[str, int] = {}
+
+    def append(self, table: str, **row):
+        cols = self.columns[table]
+        for c in cols:
+            cols[c].append(row.get(c))
+
+    def topic_id(self, topic: str) -> int:
+        tid = self.topic_ids.get(topic)
+        if tid is None:
+            tid = len(self.topic_ids)
+            self.topic_ids[topic] = tid
+            self.append("topics", topic_id=tid, topic=topic)
+        return tid
+
+    def add_topics(self, topics, company_id, record_table, record_id, timestamp, esg_category):
+        for t in topics or []:
+            self.append("topic_mentions", company_id=company_id, record_table=record_table,
+                        record_id=record_id, timestamp=timestamp, esg_category=esg_category,
+                        topic_id=self.topic_id(t))
+
+    def add_risks(self, risks, company_id, record_table, record_id, timestamp):
+        for r in risks or []:
+            self.append("risk_signals", company_id=company_id, record_table=record_table,
+                        record_id=record_id, timestamp=timestamp,
+                        type=r.get("type"), severity=r.get("severity"))
+
+    def to_frames(self) -> Dict[str, pd.DataFrame]:
+        return {t: _typed_frame(t, cols) for t, cols in self.columns.items()}
+
+def _typed_frame(table: str, cols: Dict[str, list]) -> pd.DataFrame:
+    df = pd.DataFrame(cols, columns=TABLE_COLUMNS[table])
+    for c in df.columns:
+        if c in TIMESTAMP_COLUMNS:
+            df[c] = pd.to_datetime(df[c], utc=True, errors="coerce", format="ISO8601")
+        elif c in FLOAT_COLUMNS:
+            df[c] = pd.to_numeric(df[c], errors="coerce").astype("float64")
+        elif c == "severity":
+            df[c] = pd.Categorical(df[c], categories=SEVERITY_LEVELS, ordered=True)
+        elif c in CATEGORY_COLUMNS:
+            df[c] = df[c].astype("category")
+        elif c in ("topic_id", "year"):
+            df[c] = pd.to_numeric(df[c], errors="coerce").astype("Int64")
+        else:
+            df[c] = df[c].astype("string")
+    return df
+
+def build_event_tables(companies: Dict[str, dict],
+                       reports: Dict[str, dict],
+                       news: Dict[str, dict],
+                       social: Dict[str, dict]) -> Dict[str, pd.DataFrame]:
+    """
+    Flatten the nested company/report/news/social documents (as returned by
+    utils.data_loader) into typed column tables, one DataFrame per entry of TABLE_COLUMNS.
+    """
+    name_to_id = {c.get("name"): c.get("company_id") for c in companies.values() if c}
+    b = _TableBuilder()
+
+    for fname, rpt in reports.items():
+        if not rpt:
+            continue
+        cid = _company_id(rpt, fname, name_to_id)
+        rid = rpt.get("report_id") or fname
+        year = rpt.get("year")
+        if isinstance(rpt.get("esg_topics"), dict):
+            for cat, topics in rpt["esg_topics"].items():
+                b.add_topics(topics, cid, "reports", rid, None, cat)
+        for mkey, mval in rpt.get("metrics", {}).items():
+            b.append("metrics", company_id=cid, report_id=rid, year=year, metric=mkey,
+                     value=_number(mval))
+        for claim in rpt.get("claims", []):
+            b.append("claims", company_id=cid, report_id=rid, year=year,
+                     claim_id=claim.get("claim_id"), section=claim.get("section"),
+                     confidence=_number(claim.get("confidence")), text=claim.get("text"))
+
+    for fname, newsf in news.items():
+        if not newsf:
+            continue
+        cid = _company_id(newsf, fname, name_to_id)
+        for src in newsf.get("news_sources", []):
+            for art in src.get("articles", []):
+                an = art.get("analysis", {})
+                aid = art.get("article_id") or (art.get("title") or "")[:60]
+                ts = art.get("published_date")
+                b.append("articles", company_id=cid, article_id=aid,
+                         source_name=src.get("source_name"), source_type=src.get("source_type"),
+                         timestamp=ts, sentiment=_number(an.get("sentiment")),
+                         esg_category=an.get("esg_category"), stance=an.get("stance"),
+                         title=art.get("title"))
+                b.add_topics(an.get("esg_topics"), cid, "articles", aid, ts, an.get("esg_category"))
+                b.add_risks(an.get("risk_signals"), cid, "articles", aid, ts)
+
+    for fname, socialf in social.items():
+        if not socialf:
+            continue
+        cid = _company_id(socialf, fname, name_to_id)
+        for platform in socialf.get("platforms", []):
+            pname = platform.get("platform")
+            for post in platform.get("posts", []):
+                an = post.get("analysis", {})
+                pid = post.get("post_id") or (post.get("content_raw") or "")[:40]
+                ts = post.get("timestamp")
+                author = post.get("author", {})
+                if isinstance(author, dict):
+                    author = author.get("username") or author.get("name")
+                b.append("posts", company_id=cid, post_id=pid, platform=pname, timestamp=ts,
+                         sentiment=_number(an.get("sentiment")),
+                         esg_category=an.get("esg_category"), stance=an.get("stance"),
+                         author=author)
+                b.add_topics(an.get("esg_topics"), cid, "posts", pid, ts, an.get("esg_category"))
+                b.add_risks(an.get("risk_signals"), cid, "posts", pid, ts)
+                for c in post.get("comments", []):
+                    b.append("comments", company_id=cid, comment_id=c.get("comment_id"),
+                             post_id=pid, platform=pname, timestamp=c.get("timestamp"),
+                             sentiment=_number(c.get("analysis", {}).get("sentiment")),
+                             author=c.get("author"))
+
+    return b.to_frames()
+
+# -------------------------
+# Parquet persistence
+# -------------------------
+def save_event_tables(tables: Dict[str, pd.DataFrame], directory: Path = None) -> None:
+    if directory is None:
+        directory = EVENT_STORE_DIR
+    directory.mkdir(parents=True, exist_ok=True)
+    for name, df in tables.items():
+        df.to_parquet(directory / f"{name}.parquet", index=False)
+
+def load_event_tables(directory: Path = None, tables: List[str] = None) -> Dict[str, pd.DataFrame]:
+    """Load persisted tables (all of them, or only `tables`). Missing tables come back empty."""
+    if directory is None:
+        directory = EVENT_STORE_DIR
+    out = {}
+    for name in tables or TABLE_COLUMNS:
+        path = directory / f"{name}.parquet"
+        if path.exists():
+            out[name] = pd.read_parquet(path)
+        else:
+            out[name] = _typed_frame(name, {c: [] for c in TABLE_COLUMNS[name]})
+    return out
+
+def event_store_exists(directory: Path = None) -> bool:
+    if directory is None:
+        directory = EVENT_STORE_DIR
+    return all((directory / f"{t}.parquet").exists() for t in TABLE_COLUMNS)
@@ -0,0 +1,275 @@
+# utils/file_index.py
+"""
+Persistent index from normalized company keys (name or id) to data files.
+
+Filenames are split into tokens on non-alphanumeric separators; generic tokens
+(numbers such as years, and GENERIC_TOKENS such as "news" or "report") split the
+rest into name segments, and every run of up to MAX_KEY_TOKENS consecutive tokens
+within a segment is indexed under its normalized form, so
+`news_2024_companyA.json` is found by "Company A" (-> "companya") and
+`acme_corp_2023_report.json` by "Acme Corp" (-> "acmecorp"), while "news" or
+"2023" are not keys at all. Lookups are exact dict hits, not substring scans.
+
+Partitioned folders (`company_id=CMPA/year=2024/...`, see utils/partitions.py) are
+indexed too: files are named by their path relative to the kind's folder and are
+also indexed under their company_id partition value.
+
+The index is kept in sync incrementally: the mtime of every indexed directory (the
+folder and its partition directories) is recorded and a directory is only re-listed
+when its mtime changes (a file was added/removed), and only the difference is
+applied, so a refresh costs one stat per directory. add_file/remove_file let
+callers that already know about a change (e.g. a watcher) skip the listing entirely;
+with save=False a batch of them is written out by a single save(). Lookups refresh
+at most every refresh_interval seconds (WATCH_INTERVAL_SECONDS by default, the
+latency the data watcher already has), so a burst of lookups costs one pass.
+"""
+from typing import Dict, List, Optional, Set, Tuple
+from pathlib import Path
+import json
+import os
+import re
+import threading
+import time
+
+from .config import REPORTS_DIR, NEWS_DIR, SOCIAL_DIR, FILE_INDEX_JSON, WATCH_INTERVAL_SECONDS
+from .partitions import parse_partition, partition_values
+
+MAX_KEY_TOKENS = 4
+INDEX_FORMAT = 2
+# filename tokens that describe the kind of file rather than the company
+GENERIC_TOKENS = frozenset({"news", "report", "reports", "social", "media", "socialmedia", "post", "posts",
+                            "article", "articles", "esg", "sustainability", "annual", "data", "export",
+                            "final", "draft", "copy", "v1", "v2", "fy", "q1", "q2", "q3", "q4", "h1", "h2"})
+
+DEFAULT_FOLDERS = {"reports": REPORTS_DIR, "news": NEWS_DIR, "social": SOCIAL_DIR}
+
+def normalize(name: str) -> str:
+    """Normalize strings for filename matching."""
+    return re.sub(r'[^a-z0-9]', '', name.lower())
+
+def filename_keys(fname: str) -> Set[str]:
+    """All normalized keys a filename is indexed under (runs of non-generic tokens)."""
+    segments, seg = [], []
+    for t in re.split(r'[^A-Za-z0-9]+', Path(fname).stem):
+        t = normalize(t)
+        if t and not t.isdigit() and t not in GENERIC_TOKENS:
+            seg.append(t)
+        elif seg:
+            segments.append(seg)
+            seg = []
+    if seg:
+        segments.append(seg)
+    keys = set()
+    for tokens in segments:
+        for i in range(len(tokens)):
+            for j in range(i + 1, min(i + MAX_KEY_TOKENS, len(tokens)) + 1):
+                keys.add("".join(tokens[i:j]))
+    return keys
+
+def _join(reldir: str, name: str) -> str:
+    return f"{reldir}/{name}" if reldir else name
+
+def _empty_dir() -> dict:
+    return {"mtime_ns": None, "files": set(), "subdirs": set()}
+
+class FileIndex:
+    def __init__(self, folders: Dict[str, Path] = None, index_path: Path = None,
+                 refresh_interval: float = None):
+        self.folders = {k: Path(v) for k, v in (folders or DEFAULT_FOLDERS).items()}
+        self.index_path = Path(index_path or FILE_INDEX_JSON)
+        self.refresh_interval = WATCH_INTERVAL_SECONDS if refresh_interval is None else refresh_interval
+        self._refreshed_at: Optional[float] = None
+        self._lock = threading.Lock()
+        # kind -> relative dir ("" for the folder itself) -> {"mtime_ns", "files", "subdirs"}
+        self._dirs: Dict[str, Dict[str, dict]] = {k: {} for k in self.folders}
+        # key -> kind -> set(paths)
+        self._keys: Dict[str, Dict[str, Set[str]]] = {}
+        self._dirty = False
+        self._load()
+
+    # -------------------------
+    # Persistence
+    # -------------------------
+    def _load(self):
+        if not self.index_path.exists():
+            return
+        try:
+            state = json.loads(self.index_path.read_text(encoding="utf-8"))
+        except Exception:
+            return
+        if state.get("format") != INDEX_FORMAT:
+            return
+        for kind, k in state.get("kinds", {}).items():
+            if kind not in self.folders or k.get("folder") != str(self.folders[kind]):
+                continue
+            for reldir, d in k.get("dirs", {}).items():
+                self._dirs[kind][reldir] = {"mtime_ns": d.get("mtime_ns"), "files": set(),
+                                            "subdirs": set(d.get("subdirs", []))}
+                for fname in d.get("files", []):
+                    self._add(kind, _join(reldir, fname))
+
+    def save(self) -> None:
+        """Write the index out if it changed since the last save."""
+        with self._lock:
+            if self._dirty:
+                self._save()
+
+    def _save(self):
+        state = {"format": INDEX_FORMAT, "kinds": {
+            kind: {"folder": str(self.folders[kind]),
+                   "dirs": {reldir: {"mtime_ns": d["mtime_ns"], "files": sorted(d["files"]),
+                                     "subdirs": sorted(d["subdirs"])}
+                            for reldir, d in dirs.items()}}
+            for kind, dirs in self._dirs.items()}}
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.index_path.with_suffix(f".tmp{os.getpid()}")
+        tmp.write_text(json.dumps(state), encoding="utf-8")
+        os.replace(tmp, self.index_path)
+        self._dirty = False
+
+    # -------------------------
+    # Incremental maintenance
+    # -------------------------
+    def _file_keys(self, relpath: str) -> Set[str]:
+        keys = filename_keys(Path(relpath).name)
+        company_id = partition_values(relpath).get("company_id")
+        if company_id:
+            keys.add(normalize(company_id))
+        return keys
+
+    def _add(self, kind: str, relpath: str):
+        reldir, _, fname = relpath.rpartition("/")
+        self._dirs[kind].setdefault(reldir, _empty_dir())["files"].add(fname)
+        path = str(self.folders[kind] / relpath)
+        for key in self._file_keys(relpath):
+            self._keys.setdefault(key, {}).setdefault(kind, set()).add(path)
+
+    def _remove(self, kind: str, relpath: str):
+        reldir, _, fname = relpath.rpartition("/")
+        d = self._dirs[kind].get(reldir)
+        if d:
+            d["files"].discard(fname)
+        path = str(self.folders[kind] / relpath)
+        for key in self._file_keys(relpath):
+            paths = self._keys.get(key, {}).get(kind)
+            if paths:
+                paths.discard(path)
+
+    def _kind_for(self, path: Path) -> Optional[Tuple[str, str]]:
+        """(kind, path relative to its folder) for a file in a folder or one of its partitions."""
+        for kind, folder in self.folders.items():
+            try:
+                rel = path.relative_to(folder)
+            except ValueError:
+                continue
+            if all(parse_partition(part) for part in rel.parts[:-1]):
+                return kind, rel.as_posix()
+        return None
+
+    def _refresh_kind(self, kind: str) -> bool:
+        folder, dirs = self.folders[kind], self._dirs[kind]
+        changed = False
+        seen = set()
+        stack = [""]
+        while stack:
+            reldir = stack.pop()
+            seen.add(reldir)
+            try:
+                mtime = os.stat(folder / reldir).st_mtime_ns
+            except FileNotFoundError:
+                mtime = None
+            d = dirs.setdefault(reldir, _empty_dir())
+            if mtime != d["mtime_ns"]:
+                files, subdirs = set(), set()
+                if mtime is not None:
+                    with os.scandir(folder / reldir) as it:
+                        for entry in it:
+                            if entry.is_dir():
+                                if parse_partition(entry.name):
+                                    subdirs.add(entry.name)
+                            elif entry.name.endswith(".json"):
+                                files.add(entry.name)
+                for fname in files - d["files"]:
+                    self._add(kind, _join(reldir, fname))
+                for fname in d["files"] - files:
+                    self._remove(kind, _join(reldir, fname))
+                d["mtime_ns"], d["subdirs"] = mtime, subdirs
+                changed = True
+            # a file change deep in a partition does not touch its parents' mtime
+            stack.extend(_join(reldir, sub) for sub in d["subdirs"])
+        for reldir in set(dirs) - seen:  # partition directories that were removed
+            for fname in list(dirs[reldir]["files"]):
+                self._remove(kind, _join(reldir, fname))
+            del dirs[reldir]
+            changed = True
+        return changed
+
+    def refresh(self) -> bool:
+        """Re-list only directories whose mtime changed. Returns True if the index changed."""
+        with self._lock:
+            changed = False
+            for kind in self.folders:
+                changed = self._refresh_kind(kind) or changed
+            if changed or self._dirty:
+                self._save()
+            self._refreshed_at = time.monotonic()
+        return changed
+
+    def _maybe_refresh(self) -> None:
+        """refresh() unless the last one is less than refresh_interval seconds old."""
+        at = self._refreshed_at
+        if at is None or time.monotonic() - at >= self.refresh_interval:
+            self.refresh()
+
+    def add_file(self, path, save: bool = True) -> None:
+        found = self._kind_for(Path(path))
+        if found is not None:
+            with self._lock:
+                self._add(*found)
+                self._dirty = True
+                if save:
+                    self._save()
+
+    def remove_file(self, path, save: bool = True) -> None:
+        found = self._kind_for(Path(path))
+        if found is not None:
+            with self._lock:
+                self._remove(*found)
+                self._dirty = True
+                if save:
+                    self._save()
+
+    # -------------------------
+    # Lookups
+    # -------------------------
+    # lookups copy under the lock (refresh/add_file/remove_file mutate the sets from the
+    # watcher thread) and sort outside it; refresh takes the lock itself, so it runs first
+    def files_for_key(self, key: str) -> Dict[str, List[str]]:
+        with self._lock:
+            hits = {kind: list(paths) for kind, paths in self._keys.get(normalize(key), {}).items()}
+        return {kind: sorted(hits.get(kind, ())) for kind in self.folders}
+
+    def files_for_company(self, company_name: str, company_id: str) -> Dict[str, List[str]]:
+        """Union of the files indexed under the normalized company name and id."""
+        self._maybe_refresh()
+        with self._lock:
+            by_name = self._keys.get(normalize(company_name or ""), {})
+            by_id = self._keys.get(normalize(company_id or ""), {})
+            hits = {kind: set(by_name.get(kind, ())) | set(by_id.get(kind, ())) for kind in self.folders}
+        return {kind: sorted(paths) for kind, paths in hits.items()}
+
+    def files(self, kind: str) -> List[str]:
+        """Paths relative to the kind's folder (plain filenames for the flat layout)."""
+        self._maybe_refresh()
+        with self._lock:
+            paths = [_join(reldir, f) for reldir, d in self._dirs[kind].items() for f in d["files"]]
+        return sorted(paths)
+
+_default_index: Optional[FileIndex] = None
+
+def get_file_index() -> FileIndex:
+    """Process-wide index over the reports/news/social folders."""
+    global _default_index
+    if _default_index is None:
+        _default_index = FileIndex()
+    return _default_index
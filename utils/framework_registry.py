@@ -0,0 +1,186 @@
+# utils/framework_registry.py
+"""
+Compiled framework registries (UNSDG, GRI, SASB, local schemes).
+
+A registry JSON is compiled once into a CompiledRegistry: every entry carrying an
+id (sdg_id, target_id, standard_id, metric_id, code, id) becomes a RegistryItem
+with its parent id, lower-cased text and token set, and ids are indexed. Derived
+objects such as the mapping matchers of esg_mapping_utils are attached with
+CompiledRegistry.derived and persisted along with it.
+
+The compiled form is pickled under REGISTRY_CACHE_DIR, tagged with the source
+file's mtime and size, so a new process loads it without parsing the JSON. Within
+a process load_compiled_registry returns the same object until the source file
+changes; a rewrite that leaves the content (and so the version) identical keeps
+the compiled object and its derived matchers.
+"""
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from dataclasses import dataclass, field
+from pathlib import Path
+import json
+import os
+import pickle
+import threading
+
+from .config import FRAMEWORKS_DIR, REGISTRY_CACHE_DIR
+from .text_match import tokenize
+
+REGISTRY_FORMAT = 2  # 2: GRI matchers restricted to top-level standards again
+ID_KEYS = ("sdg_id", "target_id", "indicator_id", "standard_id", "disclosure_id", "metric_id", "code", "id")
+TEXT_KEYS = ("text", "title", "name", "description")
+
+@dataclass
+class RegistryItem:
+    id: str
+    kind: str                  # the id key it was found under, e.g. "target_id"
+    parent: Optional[str]      # id of the enclosing item (target -> SDG)
+    title: str
+    text: str                  # lower-cased
+    tokens: frozenset
+
+@dataclass
+class CompiledRegistry:
+    name: str                  # file stem, e.g. "UNSDG_schema"
+    framework: Optional[str]
+    version: Optional[str]
+    raw: dict                  # the parsed JSON; shared, treat as read-only
+    items: List[RegistryItem]
+    index: Dict[str, int]      # item id -> position in items
+    path: Optional[Path] = None
+    mtime_ns: int = 0
+    size: int = 0
+    _derived: Dict[str, Any] = field(default_factory=dict, repr=False)
+
+    @property
+    def key(self) -> str:
+        """'<framework>@<version>', identifying results computed against this registry."""
+        return f"{self.framework or self.name}@{self.version}"
+
+    def item(self, item_id: str) -> Optional[RegistryItem]:
+        i = self.index.get(item_id)
+        return None if i is None else self.items[i]
+
+    def items_of(self, kind: str) -> List[RegistryItem]:
+        return [it for it in self.items if it.kind == kind]
+
+    def derived(self, name: str, build: Callable[["CompiledRegistry"], Any]) -> Any:
+        """An object built from this registry once (e.g. a matcher), kept in the binary form."""
+        obj = self._derived.get(name)
+        if obj is None:
+            obj = self._derived[name] = build(self)
+            if self.path is not None:
+                _save(self)
+        return obj
+
+    def get(self, key: str, default=None):
+        """dict-style access to the raw registry, for code written against the JSON."""
+        return self.raw.get(key, default)
+
+def _walk(node, parent: Optional[str], out: List[RegistryItem]) -> None:
+    if isinstance(node, list):
+        for x in node:
+            _walk(x, parent, out)
+    elif isinstance(node, dict):
+        kind = next((k for k in ID_KEYS if isinstance(node.get(k), (str, int))), None)
+        if kind is not None:
+            title = next((str(node[k]) for k in TEXT_KEYS if isinstance(node.get(k), str)), "")
+            text = title.lower()
+            out.append(RegistryItem(str(node[kind]), kind, parent, title, text, frozenset(tokenize(text))))
+            parent = str(node[kind])
+        for v in node.values():
+            if isinstance(v, (list, dict)):
+                _walk(v, parent, out)
+
+def compile_registry(raw: dict, name: str = "", path: Path = None,
+                     mtime_ns: int = 0, size: int = 0) -> CompiledRegistry:
+    items: List[RegistryItem] = []
+    _walk({k: v for k, v in raw.items() if k != "metadata"}, None, items)
+    index = {}
+    for i, it in enumerate(items):
+        index.setdefault(it.id, i)
+    version = raw.get("version")
+    return CompiledRegistry(name, raw.get("framework"), None if version is None else str(version),
+                            raw, items, index, path, mtime_ns, size)
+
+def as_compiled(registry) -> CompiledRegistry:
+    """A CompiledRegistry for a compiled registry or a raw registry dict (compiled in memory)."""
+    return registry if isinstance(registry, CompiledRegistry) else compile_registry(registry)
+
+# -------------------------
+# Binary form
+# -------------------------
+def _binary_path(name: str) -> Path:
+    return REGISTRY_CACHE_DIR / f"{name}.registry.pkl"
+
+def _save(reg: CompiledRegistry) -> None:
+    target = _binary_path(reg.name)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_suffix(f".tmp{os.getpid()}")
+    with open(tmp, "wb") as f:
+        pickle.dump((REGISTRY_FORMAT, str(reg.path), reg.mtime_ns, reg.size, reg), f,
+                    protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, target)
+
+def _read_binary(name: str, path: Path, st: os.stat_result) -> Optional[CompiledRegistry]:
+    try:
+        with open(_binary_path(name), "rb") as f:
+            fmt, source, mtime_ns, size, reg = pickle.load(f)
+    except Exception:
+        return None
+    if fmt != REGISTRY_FORMAT or source != str(path) or (mtime_ns, size) != (st.st_mtime_ns, st.st_size):
+        return None
+    return reg
+
+# -------------------------
+# Loading
+# -------------------------
+_lock = threading.Lock()
+_registries: Dict[str, CompiledRegistry] = {}
+_resolved: Dict[str, Tuple[int, Optional[Path]]] = {}  # name -> (FRAMEWORKS_DIR mtime, path)
+
+def resolve_registry_path(name: str) -> Optional[Path]:
+    """
+    FRAMEWORKS_DIR/<name>.json, else the first registry whose stem contains name.
+    Resolutions are remembered until a file is added to or removed from the folder.
+    """
+    try:
+        dir_mtime = os.stat(FRAMEWORKS_DIR).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    cached = _resolved.get(name)
+    if cached is not None and cached[0] == dir_mtime:
+        return cached[1]
+    path = FRAMEWORKS_DIR / f"{name}.json"
+    if not path.exists():
+        path = next((f for f in sorted(FRAMEWORKS_DIR.glob("*.json")) if name.lower() in f.stem.lower()), None)
+    _resolved[name] = (dir_mtime, path)
+    return path
+
+def load_compiled_registry(name: str) -> Optional[CompiledRegistry]:
+    """
+    The compiled registry for a file stem (e.g. 'UNSDG_schema', 'GRI_v2021'), loaded
+    once per process and reloaded only when the source file changes.
+    """
+    path = resolve_registry_path(name)
+    if path is None:
+        return None
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    with _lock:
+        current = _registries.get(path.stem)
+        if current is not None and current.path == path and \
+                (current.mtime_ns, current.size) == (st.st_mtime_ns, st.st_size):
+            return current
+        reg = _read_binary(path.stem, path, st)
+        if reg is None:
+            raw = json.loads(path.read_text(encoding="utf-8"))
+            if current is not None and current.path == path and current.raw == raw:
+                reg = current  # touched but unchanged: keep it and its derived objects
+                reg.mtime_ns, reg.size = st.st_mtime_ns, st.st_size
+            else:
+                reg = compile_registry(raw, path.stem, path, st.st_mtime_ns, st.st_size)
+            _save(reg)
+        _registries[path.stem] = reg
+        return reg
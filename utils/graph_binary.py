@@ -0,0 +1,331 @@
+# utils/graph_binary.py
+"""
+Compact binary form of the graph JSON, memory-mapped read-only.
+
+The graph is stored in the snapshot container (see snapshot.write_container) as
+"graph." sections:
+
+    nodes               string table of every node id (defined nodes and edge
+                        endpoints), sorted, so a name is found by binary search
+    node_order          ids of the defined nodes in their JSON order
+    node_attrs          side table: each node's attribute dict as JSON ("" if none)
+    node_type           categorical code of each node's "type" (-1 if none) + labels
+    out.offsets         CSR over source ids: the edges of node i are
+    out.source/target     out.*[out.offsets[i]:out.offsets[i + 1]]
+    out.type            edge type codes (-1 for an edge without a type) + labels
+    out.order           each edge's position in the JSON edge list
+    edge_attrs          side table: extra edge attributes as JSON ("" if none)
+    in.offsets, in.edge CSR over target ids into the out.* arrays
+    source              (JSON mtime_ns, JSON size, journal size) the file was built from
+
+Opening one is a single mmap and costs the same whatever the graph size; node
+lookups, neighbours and ego networks read the arrays directly, NetworkX graphs are
+built only when asked for, and to_json gives back the JSON shape (edges without a
+source or target are not kept).
+
+load_graph_binary keeps a binary next to each graph JSON (merged_graph.esggraph)
+holding what load_graph_json returns, journal included, and rebuilds it when the
+JSON or its journal changes; save_graph_json writes it along with the JSON.
+"""
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+from bisect import bisect_left
+from pathlib import Path
+import json
+import os
+
+import numpy as np
+
+from .config import MERGED_GRAPH_JSON
+from .graph_store import journal_path
+from .snapshot import MappedContainer, categorical, write_container
+
+PREFIX = "graph."
+SUFFIX = ".esggraph"
+
+def binary_path(graph_path: Path) -> Path:
+    """The binary of a graph file: merged_graph.json -> merged_graph.esggraph."""
+    return Path(graph_path).with_suffix(SUFFIX)
+
+def source_tag(graph_path: Path) -> np.ndarray:
+    """(mtime_ns, size) of a graph JSON and the size of its journal; -1 where missing."""
+    graph_path = Path(graph_path)
+    try:
+        st = os.stat(graph_path)
+        tag = [st.st_mtime_ns, st.st_size]
+    except FileNotFoundError:
+        tag = [-1, -1]
+    try:
+        tag.append(os.stat(journal_path(graph_path)).st_size)
+    except FileNotFoundError:
+        tag.append(-1)
+    return np.asarray(tag, dtype="<i8")
+
+# -------------------------
+# Build
+# -------------------------
+def _node_type(props: Optional[dict]) -> Optional[str]:
+    t = (props or {}).get("type")
+    return t if isinstance(t, str) else None
+
+def graph_sections(graph_data: Dict[str, Any], tag: Sequence[int] = (-1, -1, -1)
+                   ) -> Tuple[Dict[str, np.ndarray], Dict[str, List[str]]]:
+    """(arrays, string tables) of a graph JSON, ready for write_container."""
+    defined = graph_data.get("nodes", {})
+    edges = [e for e in graph_data.get("edges", []) if e.get("source") is not None and e.get("target") is not None]
+    sources, targets = [e["source"] for e in edges], [e["target"] for e in edges]
+    names = sorted(set(defined).union(sources, targets))
+    nid = {n: i for i, n in enumerate(names)}
+    n = len(names)
+
+    src = np.fromiter(map(nid.__getitem__, sources), dtype=np.int64, count=len(edges))
+    dst = np.fromiter(map(nid.__getitem__, targets), dtype=np.int64, count=len(edges))
+    types, type_labels = categorical(e.get("type") for e in edges)
+    order = np.argsort(src, kind="stable")  # CSR order; edges of a node keep their JSON order
+    dst_order = np.argsort(dst[order], kind="stable")
+
+    attrs = [""] * n
+    for key, props in defined.items():
+        attrs[nid[key]] = json.dumps(props, ensure_ascii=False)
+    node_types, node_type_labels = categorical(_node_type(defined.get(name)) for name in names)
+    extras = [""] * len(edges)
+    for p, i in enumerate(order.tolist()):
+        e = edges[i]
+        if len(e) > 2 + ("type" in e):  # anything besides source/target/type
+            extras[p] = json.dumps({k: v for k, v in e.items() if k not in ("source", "target", "type")},
+                                   ensure_ascii=False)
+
+    arrays = {
+        PREFIX + "node_order": np.asarray([nid[k] for k in defined], dtype="<i4"),
+        PREFIX + "node_type": node_types,
+        PREFIX + "out.offsets": np.concatenate(([0], np.cumsum(np.bincount(src, minlength=n)))).astype("<i8"),
+        PREFIX + "out.source": src[order].astype("<i4"),
+        PREFIX + "out.target": dst[order].astype("<i4"),
+        PREFIX + "out.type": types[order],
+        PREFIX + "out.order": order.astype("<i4"),
+        PREFIX + "in.offsets": np.concatenate(([0], np.cumsum(np.bincount(dst, minlength=n)))).astype("<i8"),
+        PREFIX + "in.edge": dst_order.astype("<i4"),
+        PREFIX + "source": np.asarray(tag, dtype="<i8"),
+    }
+    strings = {
+        PREFIX + "nodes": names,
+        PREFIX + "node_attrs": attrs,
+        PREFIX + "node_type_labels": node_type_labels,
+        PREFIX + "type_labels": type_labels,
+        PREFIX + "edge_attrs": extras,
+    }
+    return arrays, strings
+
+def write_graph_binary(graph_data: Dict[str, Any], path: Path, tag: Sequence[int] = (-1, -1, -1)) -> None:
+    write_container(path, *graph_sections(graph_data, tag))
+
+# -------------------------
+# Read
+# -------------------------
+class MappedGraph:
+    def __init__(self, source, path: Path = None):
+        """source: a MappedContainer holding graph.* sections (or the in-memory equivalent)."""
+        self.c = source
+        self.path = path
+        self.names = source.strings(PREFIX + "nodes")
+        self.type_labels = list(source.strings(PREFIX + "type_labels"))
+        self.out_offsets = source.array(PREFIX + "out.offsets")
+        self.out_source = source.array(PREFIX + "out.source")
+        self.out_target = source.array(PREFIX + "out.target")
+        self.out_type = source.array(PREFIX + "out.type")
+        self.in_offsets = source.array(PREFIX + "in.offsets")
+        self.in_edge = source.array(PREFIX + "in.edge")
+        self._nx = None
+
+    @classmethod
+    def open(cls, path: Path) -> "MappedGraph":
+        return cls(MappedContainer(path), Path(path))
+
+    @property
+    def tag(self) -> Tuple[int, ...]:
+        return tuple(self.c.array(PREFIX + "source").tolist())
+
+    def __len__(self) -> int:
+        return len(self.c.array(PREFIX + "node_order"))
+
+    @property
+    def edge_count(self) -> int:
+        return int(self.out_target.size)
+
+    # -------------------------
+    # Nodes
+    # -------------------------
+    def node_id(self, name: str) -> Optional[int]:
+        i = bisect_left(self.names, name, 0, len(self.names))
+        return i if i < len(self.names) and self.names[i] == name else None
+
+    def __contains__(self, name: str) -> bool:
+        i = self.node_id(name)
+        return i is not None and bool(self.c.strings(PREFIX + "node_attrs")[i])
+
+    def nodes(self) -> Iterator[str]:
+        """Defined node names in JSON order."""
+        for i in self.c.array(PREFIX + "node_order").tolist():
+            yield self.names[i]
+
+    def node(self, name: str) -> Optional[dict]:
+        """Attributes of a defined node."""
+        i = self.node_id(name)
+        raw = self.c.strings(PREFIX + "node_attrs")[i] if i is not None else ""
+        return json.loads(raw) if raw else None
+
+    def nodes_of_type(self, node_type: str) -> List[str]:
+        labels = list(self.c.strings(PREFIX + "node_type_labels"))
+        if node_type not in labels:
+            return []
+        ids = np.flatnonzero(self.c.array(PREFIX + "node_type") == labels.index(node_type))
+        return [self.names[int(i)] for i in ids]
+
+    # -------------------------
+    # Edges
+    # -------------------------
+    def _edge(self, p: int) -> dict:
+        e = {"source": self.names[int(self.out_source[p])], "target": self.names[int(self.out_target[p])]}
+        code = int(self.out_type[p])
+        if code >= 0:
+            e["type"] = self.type_labels[code]
+        extra = self.c.strings(PREFIX + "edge_attrs")[p]
+        if extra:
+            e.update(json.loads(extra))
+        return e
+
+    def _out_positions(self, i: int) -> range:
+        return range(int(self.out_offsets[i]), int(self.out_offsets[i + 1]))
+
+    def _in_positions(self, i: int) -> np.ndarray:
+        return self.in_edge[self.in_offsets[i]:self.in_offsets[i + 1]]
+
+    def out_edges(self, name: str) -> List[dict]:
+        """Edges leaving name, in edge order."""
+        i = self.node_id(name)
+        return [] if i is None else [self._edge(p) for p in self._out_positions(i)]
+
+    def in_edges(self, name: str) -> List[dict]:
+        """Edges entering name, in edge order."""
+        i = self.node_id(name)
+        if i is None:
+            return []
+        positions = self._in_positions(i)
+        positions = positions[np.argsort(self.c.array(PREFIX + "out.order")[positions], kind="stable")]
+        return [self._edge(int(p)) for p in positions]
+
+    def successors(self, name: str) -> List[str]:
+        i = self.node_id(name)
+        if i is None:
+            return []
+        ids = self.out_target[self.out_offsets[i]:self.out_offsets[i + 1]]
+        return [self.names[int(j)] for j in dict.fromkeys(ids.tolist())]
+
+    def predecessors(self, name: str) -> List[str]:
+        i = self.node_id(name)
+        if i is None:
+            return []
+        ids = self.out_source[self._in_positions(i)]
+        return [self.names[int(j)] for j in dict.fromkeys(ids.tolist())]
+
+    def degree(self, name: str) -> int:
+        i = self.node_id(name)
+        if i is None:
+            return 0
+        return int(self.out_offsets[i + 1] - self.out_offsets[i] + self.in_offsets[i + 1] - self.in_offsets[i])
+
+    def ego(self, name: str, radius: int = 1, undirected: bool = False) -> Set[str]:
+        """Nodes within radius hops of name following out-edges (both directions if undirected)."""
+        i = self.node_id(name)
+        if i is None:
+            return set()
+        seen = np.zeros(len(self.names), dtype=bool)
+        seen[i] = True
+        frontier = np.asarray([i])
+        for _ in range(radius):
+            if not frontier.size:
+                break
+            near = [self.out_target[self.out_offsets[j]:self.out_offsets[j + 1]] for j in frontier]
+            if undirected:
+                near += [self.out_source[self._in_positions(j)] for j in frontier]
+            near = np.unique(np.concatenate(near)) if near else np.empty(0, np.int32)
+            frontier = near[~seen[near]]
+            seen[frontier] = True
+        return {self.names[int(j)] for j in np.flatnonzero(seen)}
+
+    # -------------------------
+    # Conversion
+    # -------------------------
+    def to_json(self) -> Dict[str, Any]:
+        names = list(self.names)
+        attrs = list(self.c.strings(PREFIX + "node_attrs"))
+        nodes = {names[i]: json.loads(attrs[i]) for i in self.c.array(PREFIX + "node_order").tolist()}
+        extras = list(self.c.strings(PREFIX + "edge_attrs"))
+        order = self.c.array(PREFIX + "out.order")
+        edges: List[Optional[dict]] = [None] * self.edge_count
+        for p, (s, t, k, o) in enumerate(zip(self.out_source.tolist(), self.out_target.tolist(),
+                                             self.out_type.tolist(), order.tolist())):
+            e = {"source": names[s], "target": names[t]}
+            if k >= 0:
+                e["type"] = self.type_labels[k]
+            extra = extras[p]
+            if extra:
+                e.update(json.loads(extra))
+            edges[o] = e
+        return {"nodes": nodes, "edges": edges}
+
+    def to_networkx(self, nodes: Iterable[str] = None):
+        """nx.DiGraph of the whole graph (built once, then reused) or of the subgraph induced by nodes."""
+        import networkx as nx
+        if nodes is None and self._nx is not None:
+            return self._nx
+        attrs = self.c.strings(PREFIX + "node_attrs")
+        if nodes is None:
+            ids = np.arange(len(self.names))
+        else:
+            ids = np.asarray(sorted(i for i in map(self.node_id, nodes) if i is not None), dtype=np.int64)
+        G = nx.DiGraph()
+        for i in ids.tolist():
+            raw = attrs[i]
+            G.add_node(self.names[i], **(json.loads(raw) if raw else {}))
+        keep = np.zeros(len(self.names), dtype=bool)
+        keep[ids] = True
+        mask = keep[self.out_source] & keep[self.out_target]
+        for s, t, k in zip(self.out_source[mask].tolist(), self.out_target[mask].tolist(),
+                           self.out_type[mask].tolist()):
+            G.add_edge(self.names[s], self.names[t], type=self.type_labels[k] if k >= 0 else "related_to")
+        if nodes is None:
+            self._nx = G
+        return G
+
+# -------------------------
+# Loading
+# -------------------------
+_graphs: Dict[Path, MappedGraph] = {}
+
+def load_graph_binary(path: Path = None) -> Optional[MappedGraph]:
+    """
+    The mapped binary of a graph JSON (journal included), rebuilt first if the JSON
+    or its journal changed since it was written; None if there is no graph.
+    """
+    from .graph_utils import load_graph_json
+    path = Path(path or MERGED_GRAPH_JSON)
+    tag = tuple(source_tag(path).tolist())
+    if tag[0] < 0:
+        return None
+    current = _graphs.get(path)
+    if current is not None and current.tag == tag:
+        return current
+    target = binary_path(path)
+    graph = None
+    if target.exists():
+        try:
+            graph = MappedGraph.open(target)
+        except (OSError, ValueError, KeyError):
+            graph = None
+        if graph is not None and graph.tag != tag:
+            graph = None  # unmapped once no array view of it is left
+    if graph is None:
+        write_graph_binary(load_graph_json(path), target, tag)
+        graph = MappedGraph.open(target)
+    _graphs[path] = graph
+    return graph
@@ -0,0 +1,332 @@
+# utils/graph_store.py
+"""
+Indexed in-memory graph store over the {"nodes": {...}, "edges": [...]} graph JSON.
+
+Edges live in an id -> edge dict with, per node, the ids of its outgoing and
+incoming edges, and an edge-key set mapping (source, target, type) to the edge
+holding it. Inserting an edge is a key lookup (duplicates are dropped), and
+merging, removing or listing the neighbours of a node touches only that node's
+edges, so curation stays interactive whatever the size of the graph. Edges keep
+their insertion order on export.
+
+A store opened with a journal appends every mutation to a JSONL file next to
+the graph instead of rewriting the graph. load_graph_json replays the journal
+over the graph, so every reader sees the merges made in the explorer.
+
+compact() folds the journal into the graph file, so readers stop replaying it,
+and moves its operations to the curation log (merged_graph.curation.jsonl). A
+store loaded from a file compacts by itself once its journal passes
+GRAPH_JOURNAL_COMPACT_BYTES. The builders write the graph from the data alone,
+so after a rebuild restore_curation puts the curation log back in front of the
+journal and the curation is re-applied (replaying is idempotent).
+"""
+from typing import Any, Dict, Iterable, Iterator, List, Set, Tuple
+from datetime import datetime
+from pathlib import Path
+import json
+import os
+
+from .config import GRAPH_JOURNAL_COMPACT_BYTES
+
+EdgeKey = Tuple[Any, Any, Any]
+
+def edge_key(e: dict) -> EdgeKey:
+    """Identity of an edge: two edges with the same key are duplicates."""
+    return e.get("source"), e.get("target"), e.get("type")
+
+def journal_path(graph_path: Path) -> Path:
+    """The journal of a graph file: merged_graph.json -> merged_graph.journal.jsonl."""
+    graph_path = Path(graph_path)
+    return graph_path.with_name(f"{graph_path.stem}.journal.jsonl")
+
+def curation_path(graph_path: Path) -> Path:
+    """Operations already folded into a graph file: merged_graph.json -> merged_graph.curation.jsonl."""
+    graph_path = Path(graph_path)
+    return graph_path.with_name(f"{graph_path.stem}.curation.jsonl")
+
+def restore_curation(graph_path: Path) -> bool:
+    """
+    After a builder rewrote graph_path from the data, prepend the folded curation to
+    the journal so readers re-apply it. Returns True if there was any to restore.
+    """
+    folded, journal = curation_path(graph_path), journal_path(graph_path)
+    if not folded.exists():
+        return False
+    data = folded.read_bytes() + (journal.read_bytes() if journal.exists() else b"")
+    tmp = journal.with_suffix(".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, journal)
+    os.remove(folded)
+    return True
+
+class GraphStore:
+    def __init__(self, journal: Path = None):
+        self.nodes: Dict[str, dict] = {}
+        self.edges: Dict[int, dict] = {}            # edge id -> edge, in insertion order
+        self._out: Dict[Any, Dict[int, None]] = {}   # node -> ids of its outgoing edges
+        self._in: Dict[Any, Dict[int, None]] = {}    # node -> ids of its incoming edges
+        self._keys: Dict[EdgeKey, int] = {}          # edge key -> id of the edge holding it
+        self._next = 0
+        self.journal = Path(journal) if journal else None
+        self.path = None                             # graph file, for stores opened with load()
+        self.version = 0                             # bumped by every mutation
+
+    # -------------------------
+    # Construction / export
+    # -------------------------
+    @classmethod
+    def from_json(cls, graph_data: Dict[str, Any], journal: Path = None) -> "GraphStore":
+        store = cls()
+        store.nodes = dict(graph_data.get("nodes", {}))
+        for e in graph_data.get("edges", []):
+            store._insert(e)
+        store.journal = Path(journal) if journal else None
+        return store
+
+    @classmethod
+    def load(cls, path: Path, journal: bool = True) -> "GraphStore":
+        """The graph at path with its journal replayed; journal=True keeps journaling to it."""
+        path = Path(path)
+        data = json.loads(path.read_text(encoding="utf-8")) if path.exists() else {"nodes": {}, "edges": []}
+        store = cls.from_json(data)
+        store.replay(journal_path(path))
+        if journal:
+            store.journal = journal_path(path)
+            store.path = path
+        return store
+
+    def to_json(self) -> Dict[str, Any]:
+        return {"nodes": self.nodes, "edges": list(self.edges.values())}
+
+    def to_networkx(self, nodes: Iterable = None):
+        """nx.DiGraph of the store, or of the subgraph induced by nodes."""
+        import networkx as nx
+        G = nx.DiGraph()
+        if nodes is None:
+            for n, props in self.nodes.items():
+                G.add_node(n, **props)
+            edges = self.edges.values()
+        else:
+            keep = set(nodes)
+            for n in keep:
+                G.add_node(n, **self.nodes.get(n, {}))
+            edges = (self.edges[i] for n in keep for i in self._out.get(n, ())
+                     if self.edges[i].get("target") in keep)
+        for e in edges:
+            if e.get("source") is not None and e.get("target") is not None:
+                G.add_edge(e["source"], e["target"], type=e.get("type", "related_to"))
+        return G
+
+    # -------------------------
+    # Lookups
+    # -------------------------
+    def __contains__(self, node) -> bool:
+        return node in self.nodes
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.edges)
+
+    def node_items(self) -> Iterator[Tuple[Any, dict]]:
+        """(node, properties) of every node, edge endpoints without a node entry included (as {})."""
+        yield from self.nodes.items()
+        for n in dict.fromkeys(list(self._out) + list(self._in)):
+            if n not in self.nodes and self.degree(n):
+                yield n, {}
+
+    def has_edge(self, source, target, type=None) -> bool:
+        return (source, target, type) in self._keys
+
+    def out_edges(self, node) -> List[dict]:
+        """Edges leaving node, in edge order."""
+        return [self.edges[i] for i in sorted(self._out.get(node, ()))]
+
+    def in_edges(self, node) -> List[dict]:
+        """Edges entering node, in edge order."""
+        return [self.edges[i] for i in sorted(self._in.get(node, ()))]
+
+    def successors(self, node) -> Iterator:
+        return iter(dict.fromkeys(self.edges[i]["target"] for i in self._out.get(node, ())))
+
+    def predecessors(self, node) -> Iterator:
+        return iter(dict.fromkeys(self.edges[i]["source"] for i in self._in.get(node, ())))
+
+    def degree(self, node) -> int:
+        return len(self._out.get(node, ())) + len(self._in.get(node, ()))
+
+    def ego(self, node, radius: int = 1, undirected: bool = False) -> Set:
+        """Nodes within radius hops of node following out-edges (both directions if undirected)."""
+        seen, frontier = {node}, [node]
+        for _ in range(radius):
+            nxt = []
+            for n in frontier:
+                near = list(self.successors(n))
+                if undirected:
+                    near.extend(self.predecessors(n))
+                for m in near:
+                    if m not in seen:
+                        seen.add(m)
+                        nxt.append(m)
+            frontier = nxt
+        return seen
+
+    # -------------------------
+    # Mutations
+    # -------------------------
+    def _insert(self, e: dict) -> bool:
+        key = edge_key(e)
+        if key in self._keys:
+            return False
+        i = self._next
+        self._next += 1
+        self.edges[i] = e
+        self._keys[key] = i
+        self._out.setdefault(key[0], {})[i] = None
+        self._in.setdefault(key[1], {})[i] = None
+        return True
+
+    def _drop(self, i: int) -> dict:
+        e = self.edges.pop(i)
+        source, target, _ = key = edge_key(e)
+        if self._keys.get(key) == i:
+            del self._keys[key]
+        self._out[source].pop(i, None)
+        self._in[target].pop(i, None)
+        return e
+
+    def _log(self, op: str, **args) -> None:
+        self.version += 1
+        if self.journal is not None:
+            self.journal.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.journal, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"op": op, "at": datetime.now().isoformat(timespec="seconds"), **args},
+                                   ensure_ascii=False) + "\n")
+            if self.path is not None and self.journal.stat().st_size > GRAPH_JOURNAL_COMPACT_BYTES:
+                self.compact(self.path)
+
+    def add_node(self, key: str, props: dict, replace: bool = False) -> bool:
+        if key in self.nodes and not replace:
+            return False
+        self.nodes[key] = props
+        self._log("add_node", key=key, props=props, replace=replace)
+        return True
+
+    def add_edge(self, source, target, type: str = "related_to", **attrs) -> bool:
+        """Add an edge unless one with the same (source, target, type) exists."""
+        e = {"source": source, "target": target, "type": type, **attrs}
+        if not self._insert(e):
+            return False
+        self._log("add_edge", edge=e)
+        return True
+
+    def remove_edge(self, source, target, type: str = "related_to") -> bool:
+        i = self._keys.get((source, target, type))
+        if i is None:
+            return False
+        self._drop(i)
+        self._log("remove_edge", source=source, target=target, type=type)
+        return True
+
+    def remove_node(self, node) -> bool:
+        """Remove a node and its edges."""
+        if node not in self.nodes:
+            return False
+        for i in list(self._out.get(node, ())) + list(self._in.get(node, ())):
+            if i in self.edges:  # a self-loop is listed twice
+                self._drop(i)
+        self._out.pop(node, None)
+        self._in.pop(node, None)
+        del self.nodes[node]
+        self._log("remove_node", node=node)
+        return True
+
+    def merge_nodes(self, old_node: str, new_node: str) -> bool:
+        """
+        Merge old_node into new_node: old_node's properties win, its domain fills a
+        missing one, its edges are redirected to new_node (an edge that then duplicates
+        one already there collapses into the earlier of the two) and it is removed.
+        """
+        if old_node == new_node or old_node not in self.nodes or new_node not in self.nodes:
+            return False
+        old, new = self.nodes[old_node], self.nodes[new_node]
+        new["properties"] = {**new.get("properties", {}), **old.get("properties", {})}
+        if not new.get("domain") and old.get("domain"):
+            new["domain"] = old.get("domain")
+
+        for i in sorted(set(self._out.get(old_node, ())) | set(self._in.get(old_node, ()))):
+            e = self.edges.get(i)
+            if e is None:
+                continue  # collapsed into an earlier edge of old_node
+            self._keys.pop(edge_key(e), None)
+            self._out[e.get("source")].pop(i, None)
+            self._in[e.get("target")].pop(i, None)
+            if e.get("source") == old_node:
+                e["source"] = new_node
+            if e.get("target") == old_node:
+                e["target"] = new_node
+            key = edge_key(e)
+            other = self._keys.get(key)
+            if other is not None and other < i:
+                del self.edges[i]  # duplicates an earlier edge, which wins
+                continue
+            if other is not None:
+                self._drop(other)
+            self._keys[key] = i
+            self._out.setdefault(key[0], {})[i] = None
+            self._in.setdefault(key[1], {})[i] = None
+        self._out.pop(old_node, None)
+        self._in.pop(old_node, None)
+        del self.nodes[old_node]
+        self._log("merge", old=old_node, new=new_node)
+        return True
+
+    # -------------------------
+    # Journal
+    # -------------------------
+    def replay(self, path: Path) -> int:
+        """Apply the operations recorded in a journal file (without journaling them again)."""
+        path = Path(path)
+        if not path.exists():
+            return 0
+        journal, self.journal = self.journal, None
+        n = 0
+        try:
+            for line in path.read_text(encoding="utf-8").splitlines():
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue  # torn last line of an interrupted append
+                op = rec.get("op")
+                if op == "merge":
+                    self.merge_nodes(rec["old"], rec["new"])
+                elif op == "add_node":
+                    self.add_node(rec["key"], rec["props"], rec.get("replace", False))
+                elif op == "add_edge":
+                    e = dict(rec["edge"])
+                    self.add_edge(e.pop("source"), e.pop("target"), e.pop("type", "related_to"), **e)
+                elif op == "remove_edge":
+                    self.remove_edge(rec["source"], rec["target"], rec.get("type"))
+                elif op == "remove_node":
+                    self.remove_node(rec["node"])
+                else:
+                    continue
+                n += 1
+        finally:
+            self.journal = journal
+        return n
+
+    def compact(self, path: Path) -> None:
+        """Write the whole graph to path and move its journal to the curation log."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.to_json(), indent=2, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, path)
+        journal = journal_path(path)
+        if journal.exists():
+            with open(curation_path(path), "ab") as f:
+                f.write(journal.read_bytes())
+            os.remove(journal)
@@ -1,27 +1,42 @@
 # utils/graph_utils.py
 import json
-from typing import Dict, Any, Tuple, List
+from typing import Dict, Any, Tuple, List, Iterable, Callable, Optional
 from pathlib import Path
 import networkx as nx
 from networkx.readwrite import json_graph
 from .config import MERGED_GRAPH_JSON, KG_DIR
+from .data_loader import load_json_file
+from .stream_loader import iter_news_articles, iter_social_posts, iter_folder_articles, iter_folder_posts
+from .text_match import TokenAutomaton, tokenize, tokenize_cased
+from .graph_store import GraphStore, edge_key, journal_path, restore_curation
+from .graph_binary import binary_path, load_graph_binary, source_tag, write_graph_binary
 from collections import defaultdict
 
 # -------------------------
 # Basic IO
 # -------------------------
-def load_graph_json(path: Path = None) -> Dict[str, Any]:
+def load_graph_json(path: Path = None, journal: bool = True) -> Dict[str, Any]:
+    """The graph at path, with its curation journal (see graph_store) replayed unless journal=False."""
     if path is None:
         path = MERGED_GRAPH_JSON
+    if journal and journal_path(path).exists():
+        return GraphStore.load(path, journal=False).to_json()
     if not path.exists():
         return {"nodes": {}, "edges": []}
     return json.loads(path.read_text(encoding="utf-8"))
 
 def save_graph_json(graph_data: Dict[str, Any], path: Path = None) -> None:
+    """
+    Write a graph built from the data and, unless a journal will change what readers
+    see, its binary form. Curation folded into the previous file is re-journaled.
+    """
     if path is None:
         path = MERGED_GRAPH_JSON
     path.parent.mkdir(parents=True, exist_ok=True)
     path.write_text(json.dumps(graph_data, indent=2, ensure_ascii=False), encoding="utf-8")
+    restore_curation(path)
+    if not journal_path(path).exists():
+        write_graph_binary(graph_data, binary_path(path), source_tag(path))
 
 # -------------------------
 # Convert to NetworkX
@@ -50,29 +65,85 @@ def networkx_to_graph_json(G: nx.Graph) -> Dict[str, Any]:
     return graph_data
 
 # -------------------------
-# Build a simple graph from the ESG data directories
+# Company mention detection
 # -------------------------
-def build_graph_from_data(companies: Dict[str, dict],
-                          reports: Dict[str, dict],
-                          news: Dict[str, dict],
-                          social: Dict[str, dict]) -> Dict[str, Any]:
+def _mention_terms(companies: Dict[str, dict]) -> Tuple[Tuple[str, Tuple[str, ...], Optional[str]], ...]:
+    """(name, aliases, ticker) of every named company, in a stable order."""
+    terms = []
+    for comp in companies.values():
+        name = (comp or {}).get("name")
+        if not name:
+            continue
+        aliases = tuple(a for a in comp.get("aliases") or [] if isinstance(a, str))
+        ticker = (comp.get("identifiers") or {}).get("ticker")
+        terms.append((name, aliases, ticker if isinstance(ticker, str) else None))
+    return tuple(sorted(terms, key=repr))
+
+class CompanyMentionDetector:
     """
-    Lightweight auto-builder. Creates nodes for companies, report topics, news topics,
-    social topics, frameworks (if present) and edges connecting them.
+    Company names, aliases and tickers (identifiers.ticker) compiled into one
+    TokenAutomaton, so a record's texts are scanned once whatever the number of
+    companies, and mentions fall on word boundaries ("Company A" does not match
+    "Company AB"). Names and aliases match case-insensitively; tickers only in their
+    exact case, so a ticker that is also a word ("ON", "ALL") is not matched by the word.
     """
-    graph = {"nodes": {}, "edges": []}
 
-    def add_node(key: str, props: dict):
-        if key not in graph["nodes"]:
-            graph["nodes"][key] = props
+    def __init__(self, companies: Dict[str, dict]):
+        self.signature = _mention_terms(companies)
+        self.automaton = TokenAutomaton()
+        for name, aliases, ticker in self.signature:
+            for alias in (name, *aliases):
+                self.automaton.add(tokenize(alias), (name, None))
+            if ticker and len(ticker) > 1:
+                self.automaton.add(tokenize(ticker), (name, tuple(tokenize_cased(ticker))))
+        self.automaton.build()
 
-    def add_edge(s: str, t: str, rel: str):
-        graph["edges"].append({"source": s, "target": t, "type": rel})
+    def find(self, *texts: Optional[str]) -> List[str]:
+        """Names of the companies mentioned in any of texts, in order of first mention."""
+        cased = []
+        for text in texts:
+            if text:
+                cased.extend(tokenize_cased(text))
+                cased.append("\x00")  # keeps a pattern from spanning two texts
+        found = {}
+        for start, end, (name, ticker) in self.automaton.find([t.lower() for t in cased]):
+            if ticker is None or tuple(cased[start:end]) == ticker:
+                found.setdefault(name, None)
+        return list(found)
 
-    # Companies
-    for fname, comp in companies.items():
+_detector: Optional[CompanyMentionDetector] = None
+
+def company_mention_detector(companies: Dict[str, dict]) -> CompanyMentionDetector:
+    """The detector for a company set, compiled once and reused while the companies are unchanged."""
+    global _detector
+    if _detector is None or _detector.signature != _mention_terms(companies):
+        _detector = CompanyMentionDetector(companies)
+    return _detector
+
+# -------------------------
+# Build a simple graph from the ESG data directories
+# -------------------------
+class _GraphBuilder:
+    """Accumulates nodes/edges record by record (shared by the dict and streaming builders)."""
+
+    def __init__(self, companies: Dict[str, dict]):
+        self.graph = {"nodes": {}, "edges": []}
+        self.edge_keys = set()
+        self.mentions = company_mention_detector(companies)
+
+    def add_node(self, key: str, props: dict):
+        if key not in self.graph["nodes"]:
+            self.graph["nodes"][key] = props
+
+    def add_edge(self, s: str, t: str, rel: str):
+        # the same topic is typically mentioned by many articles: keep one edge per key
+        if (s, t, rel) not in self.edge_keys:
+            self.edge_keys.add((s, t, rel))
+            self.graph["edges"].append({"source": s, "target": t, "type": rel})
+
+    def add_company(self, comp: dict):
         name = comp.get("name")
-        add_node(name, {
+        self.add_node(name, {
             "entity": name,
             "type": "Organization",
             "domain": "Corporate",
@@ -80,51 +151,163 @@ def build_graph_from_data(companies: Dict[str, dict],
             "properties": comp.get("identifiers", {})
         })
 
-    # Reports -> topics/metrics
-    for fname, rpt in reports.items():
+    def add_report(self, fname: str, rpt: dict):
         cname = rpt.get("company") or rpt.get("company_id") or fname.split("_")[0]
         cname = cname if isinstance(cname, str) else str(cname)
         if isinstance(rpt.get("esg_topics"), dict):
             for cat, topics in rpt.get("esg_topics", {}).items():
                 for t in topics:
-                    add_node(t, {"entity": t, "type": "ESG Topic", "domain": cat})
-                    add_edge(cname, t, "reports_on")
+                    self.add_node(t, {"entity": t, "type": "ESG Topic", "domain": cat})
+                    self.add_edge(cname, t, "reports_on")
         # metrics as nodes
         for mkey, mval in rpt.get("metrics", {}).items():
             metric_node = f"{cname}::{mkey}"
-            add_node(metric_node, {"entity": mkey, "type": "Metric", "domain": "Metric", "properties": {"value": mval}})
-            add_edge(cname, metric_node, "reports_metric")
-
-    # News -> topics
-    for fname, newsf in news.items():
-        # for each article, create article node and link to company/topics
-        for src in newsf.get("news_sources", []):
-            for art in src.get("articles", []):
-                art_id = art.get("article_id") or art.get("title")[:60]
-                art_node = f"article::{art_id}"
-                add_node(art_node, {"entity": art.get("title"), "type": "NewsArticle", "domain": src.get("source_type")})
-                # link to topics
-                for t in art.get("analysis", {}).get("esg_topics", []):
-                    add_node(t, {"entity": t, "type": "ESG Topic", "domain": "Environment"})
-                    add_edge(art_node, t, "mentions")
-                # optionally link to company if company name appears in title or content
-                for comp_name in [c.get("name") for c in companies.values()]:
-                    if comp_name and comp_name.lower() in (art.get("content_cleaned","") or "").lower():
-                        add_edge(art_node, comp_name, "mentions_company")
-
-    # Social -> posts linking to topics
-    for fname, socialf in social.items():
-        for platform in socialf.get("platforms", []):
-            for post in platform.get("posts", []):
-                pid = post.get("post_id") or post.get("content_raw","")[:40]
-                post_node = f"post::{pid}"
-                add_node(post_node, {"entity": post.get("content_raw","")[:140], "type": "SocialPost", "domain": platform.get("platform")})
-                for t in post.get("analysis", {}).get("esg_topics", []):
-                    add_node(t, {"entity": t, "type": "ESG Topic", "domain": "Environment"})
-                    add_edge(post_node, t, "mentions")
+            self.add_node(metric_node, {"entity": mkey, "type": "Metric", "domain": "Metric", "properties": {"value": mval}})
+            self.add_edge(cname, metric_node, "reports_metric")
+
+    def add_article(self, meta: dict, art: dict):
+        # create article node and link to company/topics
+        art_id = art.get("article_id") or art.get("title")[:60]
+        art_node = f"article::{art_id}"
+        self.add_node(art_node, {"entity": art.get("title"), "type": "NewsArticle", "domain": meta.get("source_type")})
+        # link to topics
+        for t in art.get("analysis", {}).get("esg_topics", []):
+            self.add_node(t, {"entity": t, "type": "ESG Topic", "domain": "Environment"})
+            self.add_edge(art_node, t, "mentions")
+        # link to every company named in the title or content
+        for comp_name in self.mentions.find(art.get("title"), art.get("content_raw"), art.get("content_cleaned")):
+            self.add_edge(art_node, comp_name, "mentions_company")
+
+    def add_post(self, meta: dict, post: dict):
+        pid = post.get("post_id") or post.get("content_raw","")[:40]
+        post_node = f"post::{pid}"
+        self.add_node(post_node, {"entity": post.get("content_raw","")[:140], "type": "SocialPost", "domain": meta.get("platform")})
+        for t in post.get("analysis", {}).get("esg_topics", []):
+            self.add_node(t, {"entity": t, "type": "ESG Topic", "domain": "Environment"})
+            self.add_edge(post_node, t, "mentions")
+        for comp_name in self.mentions.find(post.get("content_raw"), post.get("content_cleaned")):
+            self.add_edge(post_node, comp_name, "mentions_company")
+
+def build_graph_from_records(companies: Dict[str, dict],
+                             reports: Dict[str, dict],
+                             articles: Iterable[Tuple[dict, dict]],
+                             posts: Iterable[Tuple[dict, dict]]) -> Dict[str, Any]:
+    """
+    Generator-friendly builder: articles/posts are iterables of (meta, record) as
+    produced by utils.stream_loader, so news/social files never need to be held in memory.
+    """
+    b = _GraphBuilder(companies)
+    for fname, comp in companies.items():
+        b.add_company(comp)
+    for fname, rpt in reports.items():
+        b.add_report(fname, rpt)
+    for meta, art in articles:
+        b.add_article(meta, art)
+    for meta, post in posts:
+        b.add_post(meta, post)
+    return b.graph
+
+def build_graph_from_data(companies: Dict[str, dict],
+                          reports: Dict[str, dict],
+                          news: Dict[str, dict],
+                          social: Dict[str, dict]) -> Dict[str, Any]:
+    """
+    Lightweight auto-builder. Creates nodes for companies, report topics, news topics,
+    social topics, frameworks (if present) and edges connecting them.
+    """
+    articles = (rec for newsf in news.values() for rec in iter_news_articles(newsf))
+    posts = (rec for socialf in social.values() for rec in iter_social_posts(socialf))
+    return build_graph_from_records(companies, reports, articles, posts)
+
+def build_graph_from_files(companies: Dict[str, dict],
+                           reports: Dict[str, dict],
+                           news_paths: Iterable,
+                           social_paths: Iterable) -> Dict[str, Any]:
+    """Same graph as build_graph_from_data, streaming news/social files from disk."""
+    return build_graph_from_records(companies, reports,
+                                    iter_folder_articles(news_paths),
+                                    iter_folder_posts(social_paths))
 
+# -------------------------
+# Per-file graph fragments
+# -------------------------
+FRAGMENT_KINDS = ("companies", "reports", "news", "social")
+
+def build_file_fragment(kind: str, path, doc: dict, companies: Dict[str, dict]) -> Dict[str, Any]:
+    """The nodes/edges a single data file contributes to the graph."""
+    b = _GraphBuilder(companies)
+    if kind == "companies":
+        b.add_company(doc)
+    elif kind == "reports":
+        b.add_report(Path(path).name, doc)
+    elif kind == "news":
+        for meta, art in iter_news_articles(doc):
+            b.add_article(meta, art)
+    elif kind == "social":
+        for meta, post in iter_social_posts(doc):
+            b.add_post(meta, post)
+    return b.graph
+
+def merge_fragments(fragments: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Union of fragments; the first fragment to define a node or an edge wins, as in
+    build_graph_from_data.
+    """
+    graph, seen = {"nodes": {}, "edges": []}, set()
+    for frag in fragments:
+        for key, props in frag["nodes"].items():
+            graph["nodes"].setdefault(key, props)
+        for e in frag["edges"]:
+            if edge_key(e) not in seen:
+                seen.add(edge_key(e))
+                graph["edges"].append(e)
     return graph
 
+class GraphFragmentCache:
+    """
+    Keeps each data file's graph fragment so that when files are added, changed or
+    removed only their fragments are rebuilt before re-merging. News and social
+    fragments depend on the company names, aliases and tickers (company mention
+    edges) and are dropped when those change.
+    """
+
+    def __init__(self):
+        self._fragments: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+        self._mention_terms: tuple = ()
+
+    def invalidate(self, path) -> bool:
+        return self._fragments.pop(str(path), None) is not None
+
+    def invalidate_kind(self, kind: str) -> None:
+        for p in [p for p, (k, _) in self._fragments.items() if k == kind]:
+            del self._fragments[p]
+
+    def build(self, files: Dict[str, List[str]], companies: Dict[str, dict],
+              load: Callable[[str], Optional[dict]] = load_json_file) -> Dict[str, Any]:
+        """
+        files maps each of FRAGMENT_KINDS to the paths to include; fragments are
+        merged in that kind order and in the given path order.
+        """
+        terms = company_mention_detector(companies).signature
+        if terms != self._mention_terms:
+            self.invalidate_kind("news")
+            self.invalidate_kind("social")
+            self._mention_terms = terms
+        wanted = {str(p) for kind in FRAGMENT_KINDS for p in files.get(kind, [])}
+        for p in [p for p in self._fragments if p not in wanted]:
+            del self._fragments[p]
+        ordered = []
+        for kind in FRAGMENT_KINDS:
+            for p in files.get(kind, []):
+                p = str(p)
+                if p not in self._fragments:
+                    doc = load(p)
+                    if not doc:
+                        continue
+                    self._fragments[p] = (kind, build_file_fragment(kind, p, doc, companies))
+                ordered.append(self._fragments[p][1])
+        return merge_fragments(ordered)
+
 # -------------------------
 # Structural summary
 # -------------------------
@@ -132,8 +315,8 @@ def structural_summary(graph_path: Path = None) -> dict:
     """
     Quick structural statistics (nodes, edges, degree centrality, communities).
     """
-    d = load_graph_json(graph_path) if graph_path else load_graph_json()
-    G = graph_json_to_networkx(d)
+    graph = load_graph_binary(graph_path)
+    G = graph.to_networkx() if graph is not None else nx.DiGraph()
     summary = {}
     summary["nodes"] = G.number_of_nodes()
     summary["edges"] = G.number_of_edges()
@@ -0,0 +1,194 @@
+# utils/incremental_graph.py
+"""
+Incremental graph builds with per-file provenance.
+
+Every edge of an incrementally built graph carries the data file it came from and
+that file's content fingerprint:
+
+    {"source": ..., "target": ..., "type": ..., "source_file": "news/x.json", "fingerprint": "..."}
+
+A state file next to the other caches records, per data file, its kind, fingerprint
+and the nodes (with properties) its fragment defines. On the next run only files
+whose fingerprint changed, new files and deleted files are touched: their edges and
+node contributions are retracted and the changed/new files' fragments (see
+graph_utils.build_file_fragment) added back. A node survives as long as some file
+still contributes it and takes its properties from the first contributor in build
+order (kind order, then path), as in a full build. Edge order may differ, and an
+edge found in several files is kept once per file so that each can be retracted
+on its own.
+
+Each run writes the delta (files, nodes and edges added/removed/updated) next to
+the graph so downstream consumers can apply it instead of reloading everything.
+"""
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+import hashlib
+import json
+import os
+
+from .config import DATA_DIR, MERGED_GRAPH_JSON, GRAPH_BUILD_STATE_JSON, GRAPH_DELTA_JSON
+from .data_loader import load_json_file
+from .graph_utils import (FRAGMENT_KINDS, build_file_fragment, company_mention_detector,
+                          load_graph_json, save_graph_json)
+from .parse_cache import get_parse_cache
+
+STATE_FORMAT = 1
+
+def source_key(path) -> str:
+    """Provenance key of a data file: its path relative to DATA_DIR (absolute if outside)."""
+    p = Path(path).resolve()
+    try:
+        return p.relative_to(DATA_DIR.resolve()).as_posix()
+    except ValueError:
+        return p.as_posix()
+
+@dataclass
+class GraphDelta:
+    files_added: List[str] = field(default_factory=list)
+    files_changed: List[str] = field(default_factory=list)
+    files_deleted: List[str] = field(default_factory=list)
+    nodes_added: Dict[str, dict] = field(default_factory=dict)
+    nodes_updated: Dict[str, dict] = field(default_factory=dict)
+    nodes_removed: List[str] = field(default_factory=list)
+    edges_added: List[dict] = field(default_factory=list)
+    edges_removed: List[dict] = field(default_factory=list)
+
+    @property
+    def empty(self) -> bool:
+        return not (self.files_added or self.files_changed or self.files_deleted)
+
+    def summary(self) -> str:
+        return (f"{len(self.files_added)} added / {len(self.files_changed)} changed / "
+                f"{len(self.files_deleted)} deleted files; nodes +{len(self.nodes_added)} "
+                f"~{len(self.nodes_updated)} -{len(self.nodes_removed)}; edges "
+                f"+{len(self.edges_added)} -{len(self.edges_removed)}")
+
+    def to_json(self) -> dict:
+        return asdict(self)
+
+class IncrementalGraphBuilder:
+    def __init__(self, graph_path: Path = None, state_path: Path = None, delta_path: Path = None):
+        self.graph_path = Path(graph_path or MERGED_GRAPH_JSON)
+        self.state_path = Path(state_path or GRAPH_BUILD_STATE_JSON)
+        self.delta_path = Path(delta_path or GRAPH_DELTA_JSON)
+        self._load_state()
+
+    # -------------------------
+    # State
+    # -------------------------
+    def _load_state(self) -> None:
+        state = {}
+        try:
+            state = json.loads(self.state_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            pass
+        if state.get("format") != STATE_FORMAT or state.get("graph") != str(self.graph_path) or \
+                state.get("graph_mtime_ns") != self._graph_mtime():
+            state = {}  # no state, or the graph was rewritten by something else: start over
+        # source key -> {"kind", "fingerprint", "nodes": {node: props}}
+        self.files: Dict[str, dict] = state.get("files", {})
+        self.mentions: Optional[str] = state.get("mentions")
+        self.graph = load_graph_json(self.graph_path, journal=False) if self.files else {"nodes": {}, "edges": []}
+
+    def _graph_mtime(self) -> Optional[int]:
+        try:
+            return os.stat(self.graph_path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _save_state(self) -> None:
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.state_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"format": STATE_FORMAT, "graph": str(self.graph_path),
+                                   "graph_mtime_ns": self._graph_mtime(),
+                                   "mentions": self.mentions, "files": self.files},
+                                  ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self.state_path)
+
+    # -------------------------
+    # Update
+    # -------------------------
+    def _order(self, key: str) -> Tuple[int, str]:
+        return FRAGMENT_KINDS.index(self.files[key]["kind"]), key
+
+    def update(self, files: Dict[str, List], companies: Dict[str, dict],
+               load: Callable[[str], Optional[dict]] = load_json_file, save: bool = True) -> GraphDelta:
+        """
+        Bring the graph in line with files (FRAGMENT_KINDS -> paths), re-processing only
+        the files that changed since the last update, and return what changed. files
+        must list the whole corpus: a previously seen file missing from it is retracted.
+        """
+        fp = get_parse_cache()
+        current = {}  # source key -> (kind, path, fingerprint)
+        for kind in FRAGMENT_KINDS:
+            for p in files.get(kind, []):
+                try:
+                    current[source_key(p)] = (kind, str(p), fp.fingerprint(p).digest)
+                except FileNotFoundError:
+                    continue
+        mentions = hashlib.blake2b(repr(company_mention_detector(companies).signature).encode("utf-8"),
+                                   digest_size=16).hexdigest()
+        delta = GraphDelta()
+        for key, (kind, _, digest) in current.items():
+            old = self.files.get(key)
+            if old is None:
+                delta.files_added.append(key)
+            elif old["fingerprint"] != digest or old["kind"] != kind or \
+                    (kind in ("news", "social") and mentions != self.mentions):
+                delta.files_changed.append(key)  # mention edges depend on the company set
+        delta.files_deleted = sorted(k for k in self.files if k not in current)
+        self.mentions = mentions
+        if delta.empty:
+            return delta
+
+        retracted = set(delta.files_changed) | set(delta.files_deleted)
+        touched: Set[str] = {n for key in retracted for n in self.files[key]["nodes"]}
+        kept = []
+        for e in self.graph["edges"]:
+            (delta.edges_removed if e.get("source_file") in retracted else kept).append(e)
+        self.graph["edges"] = kept
+        for key in retracted:
+            del self.files[key]
+
+        for key in delta.files_changed + delta.files_added:
+            kind, path, digest = current[key]
+            doc = load(path)
+            frag = build_file_fragment(kind, path, doc, companies) if doc else {"nodes": {}, "edges": []}
+            self.files[key] = {"kind": kind, "fingerprint": digest, "nodes": frag["nodes"]}
+            touched.update(frag["nodes"])
+            for e in frag["edges"]:
+                e = dict(e, source_file=key, fingerprint=digest)
+                self.graph["edges"].append(e)
+                delta.edges_added.append(e)
+
+        contributors: Dict[str, List[str]] = {}
+        for key, entry in self.files.items():
+            for n in entry["nodes"]:
+                if n in touched:
+                    contributors.setdefault(n, []).append(key)
+        nodes = self.graph["nodes"]
+        for n in touched:
+            keys = contributors.get(n)
+            if not keys:
+                if nodes.pop(n, None) is not None:
+                    delta.nodes_removed.append(n)
+                continue
+            props = self.files[min(keys, key=self._order)]["nodes"][n]
+            if n not in nodes:
+                delta.nodes_added[n] = props
+            elif nodes[n] != props:
+                delta.nodes_updated[n] = props
+            nodes[n] = props
+        delta.nodes_removed.sort()
+        if save:
+            self.save(delta)
+        return delta
+
+    def save(self, delta: GraphDelta = None) -> None:
+        save_graph_json(self.graph, self.graph_path)
+        self._save_state()
+        if delta is not None:
+            self.delta_path.parent.mkdir(parents=True, exist_ok=True)
+            self.delta_path.write_text(json.dumps(delta.to_json(), indent=2, ensure_ascii=False),
+                                       encoding="utf-8")
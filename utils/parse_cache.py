@@ -0,0 +1,245 @@
+# utils/parse_cache.py
+"""
+Disk-backed cache of parsed JSON documents shared by every process on the host
+(Streamlit workers, build_graph.py, ...).
+
+Entries are keyed by file fingerprint (path, size, mtime, content hash). When a
+file's size and mtime still match the last fingerprint recorded for its path the
+stored hash is trusted and the file is not read at all; otherwise the bytes are
+hashed and a changed hash forces a re-parse. Parsed objects are stored pickled in a
+SQLite database (safe for concurrent readers/writers across processes), evicted
+least-recently-used once the total payload size exceeds max_bytes.
+
+A hit only reads: its access time and the hit/miss counters are collected in
+memory and written in one transaction at most every PARSE_CACHE_FLUSH_SECONDS (and
+before eviction, stats() and process exit), so readers do not contend for the
+write lock. Fingerprints of files that no longer exist are dropped by
+prune_missing, run once when the process-wide cache is created.
+"""
+from typing import Any, Callable, Dict, NamedTuple, Optional
+from pathlib import Path
+import atexit
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from .config import PARSE_CACHE_DB, PARSE_CACHE_MAX_BYTES, PARSE_CACHE_FLUSH_SECONDS
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, digest TEXT
+);
+CREATE TABLE IF NOT EXISTS entries (
+    digest TEXT PRIMARY KEY, nbytes INTEGER, last_access REAL, payload BLOB
+);
+CREATE INDEX IF NOT EXISTS entries_lru ON entries(last_access);
+CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER);
+INSERT OR IGNORE INTO counters VALUES ('hits', 0), ('misses', 0), ('evictions', 0);
+"""
+
+class Fingerprint(NamedTuple):
+    path: str
+    size: int
+    mtime_ns: int
+    digest: str
+
+def _default_parse(data: bytes) -> Any:
+    return json.loads(data.decode("utf-8"))
+
+def hash_bytes(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+class ParseCache:
+    def __init__(self, db_path: Path = None, max_bytes: int = None):
+        self.db_path = Path(db_path or PARSE_CACHE_DB)
+        self.max_bytes = PARSE_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self._local = threading.local()
+        self._pending_lock = threading.Lock()
+        self._accessed: Dict[str, float] = {}   # digest -> last access not yet written
+        self._counts: Dict[str, int] = {}       # counter -> increment not yet written
+        self._flushed_at = time.monotonic()
+
+    # -------------------------
+    # Connection handling (one connection per thread)
+    # -------------------------
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def _bump(self, conn: sqlite3.Connection, name: str, n: int = 1):
+        conn.execute("UPDATE counters SET value = value + ? WHERE name = ?", (n, name))
+
+    def _note(self, counter: str, digest: str = None):
+        """Record a hit/miss (and the entry's access time) in memory; flush when due."""
+        with self._pending_lock:
+            self._counts[counter] = self._counts.get(counter, 0) + 1
+            if digest is not None:
+                self._accessed[digest] = time.time()
+            due = time.monotonic() - self._flushed_at >= PARSE_CACHE_FLUSH_SECONDS
+        if due:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write the pending access times and counter increments in one transaction."""
+        with self._pending_lock:
+            accessed, counts = self._accessed, self._counts
+            self._accessed, self._counts = {}, {}
+            self._flushed_at = time.monotonic()
+        if not accessed and not counts:
+            return
+        conn = self._conn()
+        conn.execute("BEGIN")
+        try:
+            conn.executemany("UPDATE entries SET last_access = MAX(last_access, ?) WHERE digest = ?",
+                             [(t, d) for d, t in accessed.items()])
+            for name, n in counts.items():
+                self._bump(conn, name, n)
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+
+    # -------------------------
+    # Fingerprints
+    # -------------------------
+    def fingerprint(self, path, data: bytes = None, st: os.stat_result = None) -> Fingerprint:
+        """
+        Fingerprint a file, reusing the recorded hash when size and mtime are unchanged.
+        Callers passing data pass the stat taken before reading it. The (size, mtime)
+        -> hash mapping is only recorded when the file did not change while it was read,
+        so a concurrent write cannot pair the new size/mtime with the old bytes' hash.
+        """
+        p = str(path)
+        st = st or os.stat(p)
+        if data is None:
+            row = self._conn().execute(
+                "SELECT digest FROM files WHERE path = ? AND size = ? AND mtime_ns = ?",
+                (p, st.st_size, st.st_mtime_ns)).fetchone()
+            if row:
+                return Fingerprint(p, st.st_size, st.st_mtime_ns, row[0])
+            data = Path(p).read_bytes()
+        fp = Fingerprint(p, st.st_size, st.st_mtime_ns, hash_bytes(data))
+        after = os.stat(p)
+        if (after.st_size, after.st_mtime_ns) == (st.st_size, st.st_mtime_ns):
+            self._conn().execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)", fp)
+        return fp
+
+    # -------------------------
+    # Lookup
+    # -------------------------
+    def load(self, path, parse: Callable[[bytes], Any] = None, namespace: str = None) -> Any:
+        """
+        Return the parsed document for path, parsing (and caching) it only on a miss.
+        Callers caching a different derivation of the same bytes (e.g. validated
+        records rather than raw JSON) pass their own namespace so entries do not collide.
+        """
+        parse = parse or _default_parse
+        conn = self._conn()
+        p = str(path)
+        st = os.stat(p)
+        row = conn.execute(
+            "SELECT e.digest, e.payload FROM files f JOIN entries e ON e.digest = "
+            "(CASE WHEN ? IS NULL THEN f.digest ELSE ? || ':' || f.digest END) "
+            "WHERE f.path = ? AND f.size = ? AND f.mtime_ns = ?",
+            (namespace, namespace, p, st.st_size, st.st_mtime_ns)).fetchone()
+        if row is None:
+            data = Path(p).read_bytes()
+            fp = self.fingerprint(p, data, st)
+            key = fp.digest if namespace is None else f"{namespace}:{fp.digest}"
+            row = conn.execute("SELECT digest, payload FROM entries WHERE digest = ?",
+                               (key,)).fetchone()
+            if row is None:
+                obj = parse(data)
+                self._store(conn, key, obj)
+                self._note("misses")
+                return obj
+        self._note("hits", row[0])
+        return pickle.loads(row[1])
+
+    def _store(self, conn: sqlite3.Connection, digest: str, obj: Any):
+        payload = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(payload) > self.max_bytes:
+            return
+        conn.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)",
+                     (digest, len(payload), time.time(), payload))
+        self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection):
+        total = conn.execute("SELECT COALESCE(SUM(nbytes), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        self.flush()  # evict by up-to-date access times
+        evicted = 0
+        for digest, nbytes in conn.execute(
+                "SELECT digest, nbytes FROM entries ORDER BY last_access").fetchall():
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM entries WHERE digest = ?", (digest,))
+            total -= nbytes
+            evicted += 1
+        self._bump(conn, "evictions", evicted)
+
+    # -------------------------
+    # Maintenance
+    # -------------------------
+    def invalidate(self, path) -> None:
+        """Forget the fingerprint recorded for path (its payload ages out via LRU)."""
+        self._conn().execute("DELETE FROM files WHERE path = ?", (str(path),))
+
+    def prune_missing(self) -> int:
+        """Drop the fingerprints of files that no longer exist. Returns how many were dropped."""
+        conn = self._conn()
+        gone = [(p,) for (p,) in conn.execute("SELECT path FROM files").fetchall() if not os.path.exists(p)]
+        if gone:
+            conn.execute("BEGIN")
+            conn.executemany("DELETE FROM files WHERE path = ?", gone)
+            conn.execute("COMMIT")
+        return len(gone)
+
+    def clear(self) -> None:
+        with self._pending_lock:
+            self._accessed, self._counts = {}, {}
+        conn = self._conn()
+        conn.execute("DELETE FROM files")
+        conn.execute("DELETE FROM entries")
+        conn.execute("UPDATE counters SET value = 0")
+
+    def stats(self) -> Dict[str, int]:
+        self.flush()
+        conn = self._conn()
+        out = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+        entries, nbytes = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(nbytes), 0) FROM entries").fetchone()
+        out.update({"entries": entries, "bytes": nbytes, "max_bytes": self.max_bytes})
+        return out
+
+_default_cache: Optional[ParseCache] = None
+
+def get_parse_cache() -> ParseCache:
+    """Process-wide cache instance backed by config.PARSE_CACHE_DB."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ParseCache()
+        try:
+            _default_cache.prune_missing()
+        except sqlite3.Error:
+            pass  # e.g. the database is locked by a long writer: retried by the next process
+        atexit.register(_flush_at_exit, _default_cache)
+    return _default_cache
+
+def _flush_at_exit(cache: ParseCache) -> None:
+    try:
+        cache.flush()
+    except sqlite3.Error:
+        pass
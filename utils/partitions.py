@@ -0,0 +1,79 @@
+# utils/partitions.py
+"""
+Hive-style partitioned data folders, e.g.
+
+    data/news/company_id=CMPA/year=2024/news_2024_companyA.json
+
+Partition directories are `key=value`; files directly in the root folder (the
+original flat layout) are still supported by the loaders, which match them on
+filename tokens instead (see data_loader.iter_json_files). Discovery prunes as
+it descends: a directory whose key has a filter with a different value is never
+listed, so a query for one company and year only touches the matching
+directories.
+"""
+from typing import Dict, List, Optional, Tuple
+from dataclasses import dataclass
+from pathlib import Path
+import os
+
+PARTITION_KEYS = ("company_id", "year")
+
+def parse_partition(dirname: str) -> Optional[Tuple[str, str]]:
+    """'year=2024' -> ('year', '2024'); None for a plain directory name."""
+    key, sep, value = dirname.partition("=")
+    if not sep or not key or not value:
+        return None
+    return key, value
+
+def partition_values(relpath) -> Dict[str, str]:
+    """Partition key/values encoded in the directories of a path relative to a data folder."""
+    out = {}
+    for part in Path(relpath).parts[:-1]:
+        kv = parse_partition(part)
+        if kv:
+            out[kv[0]] = kv[1]
+    return out
+
+@dataclass(frozen=True)
+class Partition:
+    path: Path
+    values: Tuple[Tuple[str, str], ...]
+
+    @property
+    def spec(self) -> Dict[str, str]:
+        return dict(self.values)
+
+def normalize_filters(filters: Dict[str, object]) -> Dict[str, str]:
+    return {k: str(v) for k, v in filters.items() if v is not None}
+
+def discover_partitions(folder: Path, **filters) -> List[Partition]:
+    """
+    Leaf partitions under folder (directories holding files) whose values match the
+    filters, e.g. discover_partitions(NEWS_DIR, company_id="CMPA", year=2024).
+    """
+    wanted = normalize_filters(filters)
+    out = []
+    stack = [(Path(folder), ())]
+    while stack:
+        d, values = stack.pop()
+        has_files = False
+        try:
+            entries = list(os.scandir(d))
+        except FileNotFoundError:
+            continue
+        for entry in entries:
+            if entry.is_dir():
+                kv = parse_partition(entry.name)
+                if kv is None:
+                    continue
+                if kv[0] in wanted and wanted[kv[0]] != kv[1]:
+                    continue  # pruned: never listed
+                stack.append((Path(entry.path), values + (kv,)))
+            elif entry.name.endswith(".json"):
+                has_files = True
+        if values and has_files:
+            spec = dict(values)
+            # keys the layout does not partition on cannot prune; callers filter those files by name
+            if all(spec.get(k, v) == v for k, v in wanted.items()):
+                out.append(Partition(d, values))
+    return sorted(out, key=lambda p: str(p.path))
@@ -0,0 +1,302 @@
+# utils/records.py
+"""
+Validate-once ingest: raw company/report/news/social documents are checked against
+a schema compiled per (kind, metadata.schema_version) and normalized into compact
+slotted dataclasses. Inconsistencies between files (author as "@handle" string or
+{"username"|"name": ...} object, missing comments/analysis blocks, ...) are resolved
+here once, so render code can use plain attribute access.
+"""
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from dataclasses import dataclass, field
+
+DEFAULT_SCHEMA_VERSION = "2.0"
+
+class RecordValidationError(ValueError):
+    def __init__(self, kind: str, errors: List[str]):
+        super().__init__(f"{kind}: " + "; ".join(errors[:5]))
+        self.kind = kind
+        self.errors = errors
+
+# -------------------------
+# Schemas
+# -------------------------
+# A spec is a python type (or tuple of types), a dict of field specs ("name?" marks an
+# optional field, "*" applies to every value of a mapping) or a one-element list
+# holding the spec of each list item.
+NUMBER = (int, float)
+
+_RISK = {"type": str, "severity?": str}
+_ANALYSIS = {"sentiment?": NUMBER, "esg_category?": str, "esg_topics?": [str], "risk_signals?": [_RISK]}
+_AUTHOR = (str, dict)
+
+_COMPANY = {"company_id": str, "name": str, "sector?": str, "industry?": str,
+            "country?": str, "identifiers?": dict}
+_REPORT = {"company": str, "company_id?": str, "year": int, "report_id?": str,
+           "esg_topics?": {"*": [str]}, "metrics?": {"*": NUMBER},
+           "claims?": [{"text": str, "claim_id?": str, "confidence?": NUMBER}],
+           "framework_alignment?": dict, "sentiment_summary?": {"*": NUMBER}}
+_NEWS = {"company?": str, "company_id": str, "year?": int, "aggregated_analysis?": dict,
+         "news_sources": [{"source_name": str, "source_type?": str, "articles": [{
+             "title": str, "article_id?": str, "published_date?": str,
+             "content_cleaned?": str, "content_raw?": str, "analysis?": _ANALYSIS}]}]}
+_SOCIAL = {"company?": str, "company_id": str, "year?": int, "aggregated_analysis?": dict,
+           "platforms": [{"platform": str, "posts": [{
+               "post_id?": str, "timestamp?": str, "content_raw?": str, "author?": _AUTHOR,
+               "analysis?": _ANALYSIS,
+               "comments?": [{"comment_id?": str, "timestamp?": str, "author?": _AUTHOR,
+                              "analysis?": {"sentiment?": NUMBER}}]}]}]}
+
+def _relaxed(spec: dict, *fields: str) -> dict:
+    """Schema 1.0 files predate some required fields: make them optional."""
+    out = dict(spec)
+    for f in fields:
+        out[f + "?"] = out.pop(f)
+    return out
+
+SCHEMAS = {
+    ("companies", "1.0"): _COMPANY,
+    ("companies", "2.0"): _COMPANY,
+    ("reports", "1.0"): _relaxed(_REPORT, "year"),
+    ("reports", "2.0"): _REPORT,
+    ("news", "1.0"): _relaxed(_NEWS, "company_id"),
+    ("news", "2.0"): _NEWS,
+    ("social", "1.0"): _relaxed(_SOCIAL, "company_id"),
+    ("social", "2.0"): _SOCIAL,
+}
+
+Validator = Callable[[Any, str, List[str]], None]
+
+def compile_spec(spec) -> Validator:
+    """Turn a spec into a validator(value, path, errors) closure tree."""
+    if isinstance(spec, list):
+        item = compile_spec(spec[0])
+        def check_list(v, path, errors):
+            if not isinstance(v, list):
+                errors.append(f"{path}: expected list")
+                return
+            for i, x in enumerate(v):
+                item(x, f"{path}[{i}]", errors)
+        return check_list
+    if isinstance(spec, dict):
+        wildcard = compile_spec(spec["*"]) if "*" in spec else None
+        fields = [(k.rstrip("?"), k.endswith("?"), compile_spec(s))
+                  for k, s in spec.items() if k != "*"]
+        def check_map(v, path, errors):
+            if not isinstance(v, dict):
+                errors.append(f"{path}: expected object")
+                return
+            for name, optional, check in fields:
+                if name in v and v[name] is not None:
+                    check(v[name], f"{path}.{name}", errors)
+                elif not optional:
+                    errors.append(f"{path}.{name}: missing")
+            if wildcard is not None:
+                for k, x in v.items():
+                    if x is not None:
+                        wildcard(x, f"{path}.{k}", errors)
+        return check_map
+    types = spec if isinstance(spec, tuple) else (spec,)
+    numeric = float in types
+    def check_type(v, path, errors):
+        if isinstance(v, bool) and bool not in types:
+            errors.append(f"{path}: expected {'/'.join(t.__name__ for t in types)}")
+        elif not isinstance(v, types) and not (numeric and isinstance(v, int)):
+            errors.append(f"{path}: expected {'/'.join(t.__name__ for t in types)}")
+    return check_type
+
+_COMPILED: Dict[Tuple[str, str], Validator] = {key: compile_spec(spec) for key, spec in SCHEMAS.items()}
+
+def schema_version(doc: dict) -> str:
+    return str((doc.get("metadata") or {}).get("schema_version") or DEFAULT_SCHEMA_VERSION)
+
+def validate_document(kind: str, doc: dict) -> List[str]:
+    """Errors for doc under the schema of its declared version (empty list when valid)."""
+    if not isinstance(doc, dict):
+        return ["$: expected object"]
+    version = schema_version(doc)
+    validator = _COMPILED.get((kind, version)) or _COMPILED.get((kind, DEFAULT_SCHEMA_VERSION))
+    if validator is None:
+        return [f"$: no schema for {kind}"]
+    errors: List[str] = []
+    validator(doc, "$", errors)
+    return errors
+
+# -------------------------
+# Normalized records
+# -------------------------
+@dataclass(slots=True)
+class RiskSignal:
+    type: str
+    severity: Optional[str]
+
+@dataclass(slots=True)
+class Comment:
+    comment_id: Optional[str]
+    author: Optional[str]
+    timestamp: Optional[str]
+    content: str
+    sentiment: Optional[float]
+
+@dataclass(slots=True)
+class Post:
+    post_id: str
+    platform: str
+    author: Optional[str]
+    timestamp: Optional[str]
+    content: str
+    sentiment: Optional[float]
+    esg_category: Optional[str]
+    esg_topics: Tuple[str, ...]
+    risk_signals: Tuple[RiskSignal, ...]
+    stance: Optional[str]
+    comments: Tuple[Comment, ...]
+
+@dataclass(slots=True)
+class Article:
+    article_id: str
+    source_name: str
+    source_type: Optional[str]
+    title: str
+    published_date: Optional[str]
+    content: str
+    summary: Optional[str]
+    sentiment: Optional[float]
+    esg_category: Optional[str]
+    esg_topics: Tuple[str, ...]
+    risk_signals: Tuple[RiskSignal, ...]
+    stance: Optional[str]
+
+@dataclass(slots=True)
+class NewsSource:
+    source_name: str
+    source_type: Optional[str]
+    articles: Tuple[Article, ...]
+
+@dataclass(slots=True)
+class NewsFile:
+    company: Optional[str]
+    company_id: str
+    year: Optional[int]
+    sources: Tuple[NewsSource, ...]
+    aggregated: dict = field(default_factory=dict)
+
+@dataclass(slots=True)
+class SocialPlatform:
+    platform: str
+    posts: Tuple[Post, ...]
+
+@dataclass(slots=True)
+class SocialFile:
+    company: Optional[str]
+    company_id: str
+    year: Optional[int]
+    platforms: Tuple[SocialPlatform, ...]
+    aggregated: dict = field(default_factory=dict)
+
+@dataclass(slots=True)
+class Claim:
+    claim_id: Optional[str]
+    text: str
+    section: Optional[str]
+    confidence: Optional[float]
+
+@dataclass(slots=True)
+class Report:
+    company: str
+    company_id: Optional[str]
+    year: Optional[int]
+    report_id: Optional[str]
+    overall_summary: str
+    esg_topics: Dict[str, Tuple[str, ...]]
+    metrics: Dict[str, Any]
+    claims: Tuple[Claim, ...]
+    framework_alignment: dict
+    sentiment_summary: Dict[str, float]
+
+@dataclass(slots=True)
+class Company:
+    company_id: str
+    name: str
+    sector: Optional[str]
+    industry: Optional[str]
+    country: Optional[str]
+    headquarters: Optional[str]
+    identifiers: dict
+
+def _author(a) -> Optional[str]:
+    if isinstance(a, dict):
+        return a.get("username") or a.get("name") or a.get("handle")
+    return a
+
+def _sentiment(analysis: dict) -> Optional[float]:
+    s = (analysis or {}).get("sentiment")
+    return float(s) if isinstance(s, (int, float)) and not isinstance(s, bool) else None
+
+def _risks(analysis: dict) -> Tuple[RiskSignal, ...]:
+    return tuple(RiskSignal(r["type"], r.get("severity")) for r in (analysis or {}).get("risk_signals", []))
+
+def _normalize_company(doc: dict) -> Company:
+    return Company(doc["company_id"], doc["name"], doc.get("sector"), doc.get("industry"),
+                   doc.get("country"), doc.get("headquarters"), doc.get("identifiers") or {})
+
+def _normalize_report(doc: dict) -> Report:
+    return Report(
+        doc["company"], doc.get("company_id"), doc.get("year"), doc.get("report_id"),
+        doc.get("overall_summary") or "",
+        {cat: tuple(ts) for cat, ts in (doc.get("esg_topics") or {}).items()},
+        dict(doc.get("metrics") or {}),
+        tuple(Claim(c.get("claim_id"), c["text"], c.get("section"), c.get("confidence"))
+              for c in doc.get("claims") or []),
+        doc.get("framework_alignment") or {},
+        dict(doc.get("sentiment_summary") or {}),
+    )
+
+def _normalize_article(src: dict, art: dict) -> Article:
+    an = art.get("analysis") or {}
+    return Article(
+        art.get("article_id") or art["title"][:60], src["source_name"], src.get("source_type"),
+        art["title"], art.get("published_date"),
+        art.get("content_cleaned") or art.get("content_raw") or "", an.get("summary"),
+        _sentiment(an), an.get("esg_category"), tuple(an.get("esg_topics") or ()),
+        _risks(an), an.get("stance"))
+
+def _normalize_news(doc: dict) -> NewsFile:
+    return NewsFile(
+        doc.get("company"), doc.get("company_id") or doc.get("company"), doc.get("year"),
+        tuple(NewsSource(src["source_name"], src.get("source_type"),
+                         tuple(_normalize_article(src, a) for a in src.get("articles") or []))
+              for src in doc.get("news_sources") or []),
+        doc.get("aggregated_analysis") or {})
+
+def _normalize_post(platform: str, post: dict) -> Post:
+    an = post.get("analysis") or {}
+    content = post.get("content_raw") or ""
+    return Post(
+        post.get("post_id") or content[:40], platform, _author(post.get("author")),
+        post.get("timestamp"), content, _sentiment(an), an.get("esg_category"),
+        tuple(an.get("esg_topics") or ()), _risks(an), an.get("stance"),
+        tuple(Comment(c.get("comment_id"), _author(c.get("author")), c.get("timestamp"),
+                      c.get("content_raw") or "", _sentiment(c.get("analysis")))
+              for c in post.get("comments") or []))
+
+def _normalize_social(doc: dict) -> SocialFile:
+    return SocialFile(
+        doc.get("company"), doc.get("company_id") or doc.get("company"), doc.get("year"),
+        tuple(SocialPlatform(p["platform"], tuple(_normalize_post(p["platform"], post)
+                                                  for post in p.get("posts") or []))
+              for p in doc.get("platforms") or []),
+        doc.get("aggregated_analysis") or {})
+
+NORMALIZERS = {
+    "companies": _normalize_company,
+    "reports": _normalize_report,
+    "news": _normalize_news,
+    "social": _normalize_social,
+}
+
+def ingest_document(kind: str, doc: dict):
+    """Validate doc once against its versioned schema and return its normalized record."""
+    errors = validate_document(kind, doc)
+    if errors:
+        raise RecordValidationError(kind, errors)
+    return NORMALIZERS[kind](doc)
@@ -0,0 +1,209 @@
+# utils/risk_index.py
+"""
+Indexed store of the risk signals found in news and social `analysis` blocks.
+
+Signals are stored column-wise in flat numpy arrays sorted by day (article
+published_date / post timestamp, -1 when unknown). Company, type and severity are
+dictionary-encoded and each has a CSR posting index: for every code, the sorted
+row numbers holding it. Because rows are sorted by day, the slice of a posting list
+inside a date range is two binary searches, so a query such as
+
+    index.query(type="regulatory_investigation", severity="high", last_days=30)
+
+touches only the rows of the most selective filter's posting slice, which are
+then checked against the remaining filters; nothing else is scanned. Like the rollup cube, the arrays can live in the corpus snapshot
+container ("risk." sections) and be mapped read-only.
+"""
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+import datetime as dt
+
+import numpy as np
+import pandas as pd
+
+from .aggregations import day_numbers
+from .event_store import SEVERITY_LEVELS
+from .rollup import _Arrays, from_day, to_day
+from .stream_loader import iter_news_articles, iter_social_posts
+
+PREFIX = "risk."
+INDEXED = ("company", "type", "severity")
+COLUMNS = ("company", "channel", "source", "type", "severity")
+
+Filter = Union[None, str, Sequence[str]]
+
+# -------------------------
+# Build
+# -------------------------
+def risk_rows(news_docs: Iterable = (), social_docs: Iterable = (),
+              company_id: Optional[str] = None) -> Dict[str, list]:
+    """
+    Column lists of every risk signal in news/social documents (dicts or paths).
+    company_id, when given, overrides the company named in the documents.
+    """
+    cols = {c: [] for c in ("company", "channel", "source", "type", "severity", "record_id", "timestamp")}
+
+    def add(meta, channel, source, record_id, stamp, analysis):
+        for r in (analysis or {}).get("risk_signals") or []:
+            cols["company"].append(company_id or str(meta.get("company_id") or meta.get("company") or ""))
+            cols["channel"].append(channel)
+            cols["source"].append(str(source or ""))
+            cols["type"].append(str(r.get("type") or ""))
+            cols["severity"].append(str(r.get("severity") or ""))
+            cols["record_id"].append(record_id)
+            cols["timestamp"].append(stamp)
+
+    for doc in news_docs:
+        for meta, art in iter_news_articles(doc):
+            add(meta, "news", meta.get("source_name"), art.get("article_id") or (art.get("title") or "")[:60],
+                art.get("published_date"), art.get("analysis"))
+    for doc in social_docs:
+        for meta, post in iter_social_posts(doc):
+            add(meta, "social", meta.get("platform"), post.get("post_id") or (post.get("content_raw") or "")[:40],
+                post.get("timestamp"), post.get("analysis"))
+    return cols
+
+def risk_rows_from_tables(tables: Dict[str, pd.DataFrame]) -> Dict[str, list]:
+    """Same columns from the event store's risk_signals table (source joined from its record)."""
+    rs = tables["risk_signals"]
+    sources = pd.concat([
+        tables["articles"].set_index("article_id")["source_name"].astype(object),
+        tables["posts"].set_index("post_id")["platform"].astype(object),
+    ])
+    sources = sources[~sources.index.duplicated()]
+    return {
+        "company": rs["company_id"].astype(object).fillna("").tolist(),
+        "channel": rs["record_table"].astype(object).map({"articles": "news", "posts": "social"}).fillna("").tolist(),
+        "source": rs["record_id"].map(sources).fillna("").tolist(),
+        "type": rs["type"].astype(object).fillna("").tolist(),
+        "severity": rs["severity"].astype(object).fillna("").tolist(),
+        "record_id": rs["record_id"].astype(object).tolist(),
+        "timestamp": rs["timestamp"].tolist(),
+    }
+
+def _labels_for(dim: str, values: List[str]) -> List[str]:
+    present = sorted(set(values))
+    if dim == "severity":  # keep the severity order so codes compare like severities
+        return [s for s in SEVERITY_LEVELS] + [s for s in present if s not in SEVERITY_LEVELS]
+    return present
+
+def build_risk_index(rows: Dict[str, list]) -> Tuple[Dict[str, np.ndarray], Dict[str, List[str]]]:
+    """(arrays, string tables) of the index, ready for write_container."""
+    day = day_numbers(rows["timestamp"]).astype(np.int64)
+    order = np.argsort(day, kind="stable")
+    arrays = {PREFIX + "day": day[order].astype(np.int32)}
+    strings = {PREFIX + "record_id": [str(rows["record_id"][i] or "") for i in order]}
+    for dim in COLUMNS:
+        labels = _labels_for(dim, rows[dim])
+        index = {v: i for i, v in enumerate(labels)}
+        codes = np.asarray([index[v] for v in rows[dim]], dtype=np.int32)[order]
+        arrays[f"{PREFIX}{dim}"] = codes
+        strings[f"{PREFIX}{dim}.labels"] = labels
+        if dim in INDEXED:
+            # CSR postings: rows of code c are postings[offsets[c]:offsets[c + 1]], ascending
+            arrays[f"{PREFIX}{dim}.postings"] = np.argsort(codes, kind="stable").astype(np.int32)
+            arrays[f"{PREFIX}{dim}.offsets"] = np.concatenate(
+                ([0], np.cumsum(np.bincount(codes, minlength=len(labels))))).astype(np.int64)
+    return arrays, strings
+
+# -------------------------
+# Query
+# -------------------------
+class RiskIndex:
+    def __init__(self, source):
+        """source: a MappedContainer holding risk.* sections (or the in-memory equivalent)."""
+        self.c = source
+        self.labels = {dim: list(source.strings(f"{PREFIX}{dim}.labels")) for dim in COLUMNS}
+        self.codes = {dim: {v: i for i, v in enumerate(labels)} for dim, labels in self.labels.items()}
+        self.day = source.array(PREFIX + "day")
+
+    @classmethod
+    def from_rows(cls, rows: Dict[str, list]) -> "RiskIndex":
+        return cls(_Arrays(*build_risk_index(rows)))
+
+    def __len__(self) -> int:
+        return int(self.day.size)
+
+    def latest(self) -> Optional[dt.date]:
+        """Date of the most recent dated signal."""
+        return from_day(self.day[-1]) if self.day.size and self.day[-1] >= 0 else None
+
+    def _range(self, start, end) -> Tuple[int, int]:
+        # needles are cast to the array's dtype: a mismatched one makes numpy copy the haystack
+        lo = 0 if start is None else int(self.day.searchsorted(np.int32(max(to_day(start), 0)), "left"))
+        hi = self.day.size if end is None else int(self.day.searchsorted(np.int32(to_day(end)), "right"))
+        return lo, hi
+
+    def _runs(self, dim: str, codes: List[int], lo: int, hi: int) -> List[np.ndarray]:
+        """Per code, its ascending posting rows within [lo, hi); two binary searches each."""
+        postings = self.c.array(f"{PREFIX}{dim}.postings")
+        offsets = self.c.array(f"{PREFIX}{dim}.offsets")
+        lo, hi, runs = np.int32(lo), np.int32(hi), []
+        for code in codes:
+            run = postings[offsets[code]:offsets[code + 1]]
+            runs.append(run[run.searchsorted(lo):run.searchsorted(hi)])
+        return runs
+
+    def _codes(self, dim: str, values: Filter) -> Optional[List[int]]:
+        if values is None:
+            return None
+        if isinstance(values, str):
+            values = [values]
+        return [self.codes[dim][v] for v in values if v in self.codes[dim]]
+
+    def rows(self, company_id: Filter = None, type: Filter = None, severity: Filter = None,
+             min_severity: str = None, start=None, end=None, last_days: int = None,
+             as_of=None) -> np.ndarray:
+        """
+        Ascending row numbers of the signals matching every given filter. Filters take
+        one value or a list; min_severity keeps that severity and the ones above it;
+        last_days counts back from as_of (default today), inclusive.
+        """
+        if last_days is not None:
+            end = as_of or end or dt.date.today()
+            start = from_day(to_day(end) - last_days + 1)
+        lo, hi = self._range(start, end)
+        if min_severity is not None:
+            at_least = SEVERITY_LEVELS[SEVERITY_LEVELS.index(min_severity):]
+            if severity is None:
+                severity = at_least
+            else:
+                severity = [s for s in ([severity] if isinstance(severity, str) else severity) if s in at_least]
+        filters = [(dim, codes) for dim, codes in
+                   (("company", self._codes("company", company_id)), ("type", self._codes("type", type)),
+                    ("severity", self._codes("severity", severity))) if codes is not None]
+        if not filters:
+            return np.arange(lo, hi, dtype=np.int32)
+        # materialize the most selective filter's posting runs, then check the other
+        # filters on those candidate rows only
+        runs = {dim: self._runs(dim, codes, lo, hi) for dim, codes in filters}
+        driver = min(runs, key=lambda dim: sum(r.size for r in runs[dim]))
+        parts = runs[driver]
+        out = parts[0] if len(parts) == 1 else np.sort(np.concatenate(parts or [np.empty(0, np.int32)]))
+        for dim, codes in filters:
+            if dim != driver and out.size:
+                out = out[np.isin(self.c.array(PREFIX + dim)[out], codes)]
+        return out
+
+    def frame(self, rows: np.ndarray) -> pd.DataFrame:
+        """Decoded signals for row numbers."""
+        day = self.day[rows]
+        dates = day.astype("datetime64[D]")
+        dates[day < 0] = np.datetime64("NaT")
+        data = {"date": dates}
+        for dim in COLUMNS:
+            labels = np.asarray(self.labels[dim], dtype=object)
+            data[dim if dim != "company" else "company_id"] = labels[self.c.array(f"{PREFIX}{dim}")[rows]]
+        ids = self.c.strings(PREFIX + "record_id")
+        data["record_id"] = [ids[int(i)] for i in rows]
+        return pd.DataFrame(data)
+
+    def query(self, **filters) -> pd.DataFrame:
+        """rows(**filters) decoded into a DataFrame (date, company_id, channel, source, type, severity, record_id)."""
+        return self.frame(self.rows(**filters))
+
+    def counts(self, by: Sequence[str] = ("type", "severity"), **filters) -> pd.DataFrame:
+        """Signal counts of the matching rows grouped by any of company/channel/source/type/severity."""
+        rows = self.rows(**filters)
+        frame = pd.DataFrame({dim: np.asarray(self.labels[dim], dtype=object)[self.c.array(f"{PREFIX}{dim}")[rows]]
+                              for dim in by})
+        return frame.value_counts().rename("signals").reset_index()
@@ -0,0 +1,200 @@
+# utils/rollup.py
+"""
+Time-bucketed sentiment rollup cube.
+
+Cells are (company, channel, source, esg_category, period) with sentiment count,
+sum and sum of squares plus topic mention counts, precomputed at three levels:
+day, week (starting Monday) and month. Article dates come from published_date,
+post and comment dates from timestamp; records without a usable date are kept in
+period -1 so totals still add up.
+
+Each level is a set of flat numpy arrays sorted by period, so a range query is a
+binary search plus a vectorized filter over the cells in range, and a month-level
+chart over a multi-year history touches a few hundred cells instead of every
+post. The arrays are stored in the corpus snapshot container (see
+utils/snapshot.py) under the "rollup." prefix and mapped read-only from there;
+build_rollup also returns them for in-memory use.
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+import datetime as dt
+
+import numpy as np
+import pandas as pd
+
+from .aggregations import SentimentColumns
+
+LEVELS = ("day", "week", "month")
+PREFIX = "rollup."
+DIMENSIONS = ("company", "channel", "source", "category")
+LABELS = {"company": "companies", "channel": "channels", "source": "sources",
+          "category": "categories"}
+
+# -------------------------
+# Periods (days since 1970-01-01)
+# -------------------------
+def week_start(days: np.ndarray) -> np.ndarray:
+    """Monday of each day's week; 1970-01-01 was a Thursday."""
+    days = np.asarray(days, dtype=np.int64)
+    return np.where(days < 0, -1, days - (days + 3) % 7)
+
+def month_start(days: np.ndarray) -> np.ndarray:
+    days = np.asarray(days, dtype=np.int64)
+    months = days.astype("datetime64[D]").astype("datetime64[M]").astype("datetime64[D]").astype(np.int64)
+    return np.where(days < 0, -1, months)
+
+PERIOD = {"day": lambda d: np.asarray(d, dtype=np.int64), "week": week_start, "month": month_start}
+
+def to_day(value) -> Optional[int]:
+    """Date-like (date, datetime, ISO string) -> days since 1970-01-01."""
+    if value is None:
+        return None
+    return int((pd.Timestamp(value).normalize().tz_localize(None) - pd.Timestamp(0)).days)
+
+def from_day(day: int) -> dt.date:
+    return dt.date(1970, 1, 1) + dt.timedelta(days=int(day))
+
+# -------------------------
+# Build
+# -------------------------
+def _encode(values: np.ndarray) -> Tuple[np.ndarray, List[str]]:
+    labels, codes = np.unique(values.astype(str), return_inverse=True)
+    return codes.reshape(-1).astype(np.int32), labels.tolist()
+
+def build_rollup(cols: SentimentColumns) -> Tuple[Dict[str, np.ndarray], Dict[str, List[str]]]:
+    """(arrays, string tables) of the cube for every level, ready for write_container."""
+    n = len(cols)
+    dims, strings = {}, {}
+    for dim, values in (("company", cols.company_id), ("channel", cols.channel),
+                        ("source", cols.source),
+                        ("category", cols.category if cols.category is not None else np.full(n, "", object))):
+        dims[dim], strings[PREFIX + LABELS[dim]] = _encode(values)
+    strings[PREFIX + "topics"] = list(cols.topic_names)
+    day = cols.day if cols.day is not None else np.full(n, -1, dtype=np.int32)
+    sizes = [max(len(strings[PREFIX + LABELS[d]]), 1) for d in DIMENSIONS]
+    scored = ~np.isnan(cols.sentiment)
+    values = np.where(scored, cols.sentiment, 0.0)
+
+    arrays = {}
+    for level in LEVELS:
+        period = PERIOD[level](day)
+        # rows -> cells: sort by (period, dims) and number the distinct runs
+        key = np.ravel_multi_index([dims[d] for d in DIMENSIONS], sizes)
+        order = np.lexsort((key, period))
+        p_sorted, k_sorted = period[order], key[order]
+        new_cell = np.ones(n, dtype=bool)
+        new_cell[1:] = (p_sorted[1:] != p_sorted[:-1]) | (k_sorted[1:] != k_sorted[:-1])
+        starts = np.flatnonzero(new_cell)
+        cell = np.empty(n, dtype=np.int64)
+        cell[order] = np.cumsum(new_cell) - 1
+        k = starts.size
+        w = scored.astype(np.float64)
+        pre = PREFIX + level + "."
+        for d, codes in zip(DIMENSIONS, np.unravel_index(k_sorted[starts], sizes)):
+            arrays[pre + d] = codes.astype(np.int32)
+        arrays[pre + "period"] = p_sorted[starts].astype(np.int32)
+        arrays[pre + "count"] = np.bincount(cell, weights=w, minlength=k).astype(np.int32)
+        arrays[pre + "total"] = np.bincount(cell, weights=values, minlength=k)
+        arrays[pre + "sumsq"] = np.bincount(cell, weights=values * values, minlength=k)
+        # topic mentions per cell, as (cell, topic, count) sorted by cell
+        nt = max(len(cols.topic_names), 1)
+        pairs, counts = np.unique(cell[cols.topic_rows] * nt + cols.topic_ids, return_counts=True)
+        arrays[pre + "topic_cell"] = (pairs // nt).astype(np.int32)
+        arrays[pre + "topic_id"] = (pairs % nt).astype(np.int32)
+        arrays[pre + "topic_count"] = counts.astype(np.int32)
+    return arrays, strings
+
+# -------------------------
+# Query
+# -------------------------
+class _Arrays:
+    """In-memory stand-in for MappedContainer."""
+
+    def __init__(self, arrays: Dict[str, np.ndarray], strings: Dict[str, Sequence[str]]):
+        self._arrays, self._strings = arrays, strings
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._arrays or name in self._strings
+
+    def array(self, name: str) -> np.ndarray:
+        return self._arrays[name]
+
+    def strings(self, name: str) -> Sequence[str]:
+        return self._strings[name]
+
+class RollupCube:
+    def __init__(self, source):
+        """source: a MappedContainer holding rollup.* sections (or the in-memory equivalent)."""
+        self.c = source
+        self.labels = {d: {v: i for i, v in enumerate(source.strings(PREFIX + LABELS[d]))}
+                       for d in DIMENSIONS}
+
+    @classmethod
+    def from_columns(cls, cols: SentimentColumns) -> "RollupCube":
+        return cls(_Arrays(*build_rollup(cols)))
+
+    def _cells(self, level: str, start=None, end=None, **filters) -> Tuple[str, np.ndarray]:
+        """Prefix and indices of the cells of level within [start, end] matching the dimension filters."""
+        if level not in LEVELS:
+            raise ValueError(f"level must be one of {LEVELS}")
+        pre = f"{PREFIX}{level}."
+        period = self.c.array(pre + "period")
+        lo = 0 if start is None else np.searchsorted(period, PERIOD[level]([to_day(start)])[0], "left")
+        hi = period.size if end is None else np.searchsorted(period, to_day(end), "right")
+        if start is not None:  # undated cells (period -1) sort first; keep them out of ranges
+            lo = max(lo, np.searchsorted(period, 0, "left"))
+        mask = np.ones(max(hi - lo, 0), dtype=bool)
+        for dim, value in filters.items():
+            if value is None:
+                continue
+            code = self.labels[dim].get(value)
+            if code is None:
+                return pre, np.empty(0, dtype=np.int64)
+            mask &= self.c.array(pre + dim)[lo:hi] == code
+        return pre, lo + np.flatnonzero(mask)
+
+    def series(self, level: str = "day", start=None, end=None, company_id: str = None,
+               channel: str = None, source: str = None, category: str = None,
+               include_undated: bool = False) -> pd.DataFrame:
+        """Per-period sentiment count/mean/std (columns: date, count, mean, std) for the filtered cells."""
+        pre, idx = self._cells(level, start, end, company=company_id, channel=channel,
+                               source=source, category=category)
+        period = self.c.array(pre + "period")[idx].astype(np.int64)
+        if not include_undated:
+            keep = period >= 0
+            idx, period = idx[keep], period[keep]
+        periods, inv = np.unique(period, return_inverse=True)
+        count = np.bincount(inv, weights=self.c.array(pre + "count")[idx], minlength=periods.size)
+        total = np.bincount(inv, weights=self.c.array(pre + "total")[idx], minlength=periods.size)
+        sumsq = np.bincount(inv, weights=self.c.array(pre + "sumsq")[idx], minlength=periods.size)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = total / count
+            std = np.sqrt(np.maximum(sumsq / count - mean * mean, 0.0))
+        keep = count > 0
+        return pd.DataFrame({
+            "date": periods[keep].astype("datetime64[D]"),
+            "count": count[keep].astype(np.int64),
+            "mean": mean[keep],
+            "std": std[keep],
+        })
+
+    def topics(self, level: str = "month", start=None, end=None, company_id: str = None,
+               channel: str = None, source: str = None, category: str = None,
+               top_n: Optional[int] = None) -> List[Tuple[str, int]]:
+        """Topic mention counts over the filtered cells, most mentioned first."""
+        pre, idx = self._cells(level, start, end, company=company_id, channel=channel,
+                               source=source, category=category)
+        names = self.c.strings(PREFIX + "topics")
+        topic_cell = self.c.array(pre + "topic_cell")
+        rows = np.empty(0, dtype=np.int64)
+        if idx.size:
+            # topic rows are sorted by cell: take the run spanning the selected cells, then mask
+            a = np.searchsorted(topic_cell, idx[0], "left")
+            b = np.searchsorted(topic_cell, idx[-1], "right")
+            selected = np.zeros(idx[-1] - idx[0] + 1, dtype=bool)
+            selected[idx - idx[0]] = True
+            rows = a + np.flatnonzero(selected[topic_cell[a:b] - idx[0]])
+        counts = np.bincount(self.c.array(pre + "topic_id")[rows],
+                             weights=self.c.array(pre + "topic_count")[rows], minlength=len(names))
+        order = np.argsort(-counts, kind="stable")
+        out = [(names[t], int(counts[t])) for t in order if counts[t] > 0]
+        return out[:top_n] if top_n else out
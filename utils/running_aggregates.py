@@ -0,0 +1,377 @@
+# utils/running_aggregates.py
+"""
+Running sentiment/topic aggregates maintained on append.
+
+State is kept per shard (a news/social file, or any named stream of records pushed
+with append) and per group (company_id, channel, source): running count, sum, sum of
+squares, min/max, positive/neutral/negative buckets and a bounded topic sketch
+(aggregations.TopicSketch, RUNNING_TOPIC_CAPACITY topics per group). The numeric
+pieces are plain sums or extrema and merge exactly; topic sketches merge within
+their stated error bound. The totals are the merge of all shards.
+
+A file shard remembers where its last consumed record ends: the byte offset, a hash
+of the bytes before it and the enclosing meta (see stream_loader.scan_records).
+update_file hashes that prefix and, when it is unchanged, parses only the bytes
+after it, so an append costs O(new records) of parsing and aggregation work; when
+the prefix changed (a consumed record was edited or removed, or a record was
+inserted before the last consumed one) that one file's shard is rebuilt. Totals are
+updated with the same delta.
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+from dataclasses import dataclass
+from pathlib import Path
+import hashlib
+import json
+import math
+import os
+import threading
+
+from .config import NEWS_DIR, SOCIAL_DIR, RUNNING_AGGREGATES_JSON, RUNNING_TOPIC_CAPACITY
+from .aggregations import NEUTRAL_BAND, TopicSketch
+from .stream_loader import scan_news_articles, scan_social_posts
+
+GroupKey = Tuple[str, str, str]  # (company_id, channel, source)
+
+@dataclass(slots=True)
+class RunningStats:
+    count: int = 0
+    total: float = 0.0
+    sumsq: float = 0.0
+    min: float = math.inf
+    max: float = -math.inf
+    positive: int = 0
+    neutral: int = 0
+    negative: int = 0
+
+    def add(self, x: float) -> None:
+        self.count += 1
+        self.total += x
+        self.sumsq += x * x
+        self.min = min(self.min, x)
+        self.max = max(self.max, x)
+        if x > NEUTRAL_BAND:
+            self.positive += 1
+        elif x < -NEUTRAL_BAND:
+            self.negative += 1
+        else:
+            self.neutral += 1
+
+    def merge(self, other: "RunningStats") -> "RunningStats":
+        self.count += other.count
+        self.total += other.total
+        self.sumsq += other.sumsq
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.positive += other.positive
+        self.neutral += other.neutral
+        self.negative += other.negative
+        return self
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+    @property
+    def std(self) -> Optional[float]:
+        if not self.count:
+            return None
+        m = self.total / self.count
+        return math.sqrt(max(self.sumsq / self.count - m * m, 0.0))
+
+    def to_list(self) -> list:
+        return [self.count, self.total, self.sumsq, self.min if self.count else None,
+                self.max if self.count else None, self.positive, self.neutral, self.negative]
+
+    @classmethod
+    def from_list(cls, v: list) -> "RunningStats":
+        count, total, sumsq, lo, hi, pos, neu, neg = v
+        return cls(count, total, sumsq, math.inf if lo is None else lo,
+                   -math.inf if hi is None else hi, pos, neu, neg)
+
+def _score(v) -> Optional[float]:
+    return float(v) if isinstance(v, (int, float)) and not isinstance(v, bool) else None
+
+class Shard:
+    """Aggregates of one file (or stream) plus how far into it they have consumed."""
+    __slots__ = ("fingerprint", "resume", "stats", "topics")
+
+    def __init__(self):
+        self.fingerprint: Optional[Tuple[int, int]] = None
+        # {"offset": end of the last consumed record, "digest": hash of the bytes before it,
+        #  "context": its scan context}; None until a record was consumed
+        self.resume: Optional[dict] = None
+        self.stats: Dict[GroupKey, RunningStats] = {}
+        self.topics: Dict[GroupKey, TopicSketch] = {}
+
+    def add(self, key: GroupKey, stats: "RunningStats", topics: List[str]):
+        self.stats.setdefault(key, RunningStats()).merge(stats)
+        if topics:
+            self.topics.setdefault(key, TopicSketch(RUNNING_TOPIC_CAPACITY)).update(topics)
+
+    def merge(self, other: "Shard") -> "Shard":
+        for key, s in other.stats.items():
+            self.stats.setdefault(key, RunningStats()).merge(s)
+        for key, sk in other.topics.items():
+            self.topics.setdefault(key, TopicSketch(sk.capacity)).merge(sk)
+        return self
+
+    def to_json(self) -> dict:
+        return {"fingerprint": self.fingerprint, "resume": self.resume,
+                "stats": [[*k, *s.to_list()] for k, s in self.stats.items()],
+                "topics": [[*k, sk.to_dict()] for k, sk in self.topics.items()]}
+
+    @classmethod
+    def from_json(cls, d: dict) -> "Shard":
+        sh = cls()
+        sh.fingerprint = tuple(d["fingerprint"]) if d.get("fingerprint") else None
+        sh.resume = d.get("resume")
+        sh.stats = {tuple(v[:3]): RunningStats.from_list(v[3:]) for v in d.get("stats", [])}
+        sh.topics = {tuple(v[:3]): TopicSketch.from_dict(v[3]) for v in d.get("topics", [])}
+        return sh
+
+def _record_delta(rec: dict, include_comments: bool) -> Tuple[RunningStats, List[str]]:
+    """The record's sentiment stats (plus its comments') and topics."""
+    an = rec.get("analysis") or {}
+    values = [_score(an.get("sentiment"))]
+    if include_comments:
+        values += [_score((c.get("analysis") or {}).get("sentiment")) for c in rec.get("comments") or []]
+    stats = RunningStats()
+    for v in values:
+        if v is not None:
+            stats.add(v)
+    return stats, list(an.get("esg_topics") or [])
+
+def _prefix_hash():
+    return hashlib.blake2b(digest_size=16)
+
+# kind -> (folder, record scanner, container field, count comments)
+FILE_KINDS = {"news": (NEWS_DIR, scan_news_articles, "source_name", False),
+              "social": (SOCIAL_DIR, scan_social_posts, "platform", True)}
+
+def _kind_of(path: Path) -> Optional[str]:
+    for kind, spec in FILE_KINDS.items():
+        try:
+            path.relative_to(spec[0])
+            return kind
+        except ValueError:
+            continue
+    return None
+
+class RunningAggregates:
+    def __init__(self, path: Path = None):
+        self.path = Path(path or RUNNING_AGGREGATES_JSON)
+        self._lock = threading.RLock()
+        self.shards: Dict[str, Shard] = {}
+        self._totals = Shard()
+        self._dirty = False
+        self._load()
+
+    # -------------------------
+    # Persistence
+    # -------------------------
+    def _load(self):
+        if not self.path.exists():
+            return
+        try:
+            state = json.loads(self.path.read_text(encoding="utf-8"))
+            shards = {name: Shard.from_json(d) for name, d in state.get("shards", {}).items()}
+        except Exception:
+            return  # unreadable or older layout: rebuilt by the next sync
+        self.shards = shards
+        self._rebuild_totals()
+
+    def save(self) -> None:
+        with self._lock:
+            state = {"shards": {name: sh.to_json() for name, sh in self.shards.items()}}
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(f".tmp{os.getpid()}")
+            tmp.write_text(json.dumps(state), encoding="utf-8")
+            os.replace(tmp, self.path)
+            self._dirty = False
+
+    def _rebuild_totals(self):
+        self._totals = Shard()
+        for sh in self.shards.values():
+            self._totals.merge(sh)
+
+    # -------------------------
+    # Updates
+    # -------------------------
+    def _apply(self, shard: Shard, key: GroupKey, delta: Tuple[RunningStats, List[str]]):
+        shard.add(key, *delta)
+        self._totals.add(key, *delta)
+
+    def append(self, shard: str, company_id: str, channel: str, source: str,
+               records: Iterable[dict], include_comments: bool = None) -> int:
+        """Aggregate new records (articles or posts) into a named shard. Returns the record count."""
+        if include_comments is None:
+            include_comments = channel == "social"
+        key = (company_id, channel, source)
+        n = 0
+        with self._lock:
+            sh = self.shards.setdefault(shard, Shard())
+            for rec in records:
+                self._apply(sh, key, _record_delta(rec, include_comments))
+                n += 1
+            self._dirty = self._dirty or n > 0
+        return n
+
+    def update_file(self, path, save: bool = True) -> int:
+        """
+        Bring the shard of a news/social file up to date. Returns the number of
+        records aggregated (0 when the file is unchanged).
+        """
+        path = Path(path)
+        kind = _kind_of(path)
+        if kind is None:
+            return 0
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            self.remove_file(path, save=save)
+            return 0
+        name = str(path)
+        fingerprint = (st.st_size, st.st_mtime_ns)
+        with self._lock:
+            sh = self.shards.get(name)
+            if sh is not None and sh.fingerprint == fingerprint:
+                return 0
+            added = self._consume(path, kind, sh) if sh is not None and sh.resume is not None else None
+            if added is None:  # new file, or not a pure append: rebuild this file only
+                if sh is not None:
+                    del self.shards[name]
+                    self._rebuild_totals()
+                sh = self.shards[name] = Shard()
+                added = self._consume(path, kind, sh)
+            sh.fingerprint = fingerprint
+            self._dirty = True
+            if save:
+                self.save()
+            return added
+
+    def _consume(self, path: Path, kind: str, sh: Shard) -> Optional[int]:
+        """Aggregate the records past sh.resume; None if the bytes before it changed."""
+        _, scan, container_key, include_comments = FILE_KINDS[kind]
+        resume, digest = sh.resume, _prefix_hash()
+        with open(path, "rb") as f:
+            if resume is not None:
+                remaining = resume["offset"]
+                while remaining:
+                    chunk = f.read(min(remaining, 1 << 20))
+                    if not chunk:
+                        return None  # truncated
+                    digest.update(chunk)
+                    remaining -= len(chunk)
+                if digest.hexdigest() != resume["digest"]:
+                    return None
+            data = f.read()
+        pending: List[Tuple[GroupKey, tuple]] = []
+        last = None
+        try:
+            text = data.decode("utf-8")
+            records = scan(text, resume=None if resume is None else tuple(resume["context"]))
+            for meta, rec, end, context in records:
+                container = str(meta.get(container_key) or "")
+                key = (str(meta.get("company_id") or meta.get("company") or ""), kind, container)
+                pending.append((key, _record_delta(rec, include_comments)))
+                last = (end, context)
+        except ValueError:
+            if resume is None:
+                raise
+            return None  # the tail is not the rest of the document any more
+        for key, delta in pending:
+            self._apply(sh, key, delta)
+        if last is not None:
+            end = len(text[:last[0]].encode("utf-8"))
+            digest.update(data[:end])
+            sh.resume = {"offset": (resume["offset"] if resume else 0) + end,
+                         "digest": digest.hexdigest(), "context": list(last[1])}
+        return len(pending)
+
+    def remove_file(self, path, save: bool = True) -> None:
+        with self._lock:
+            if self.shards.pop(str(path), None) is not None:
+                self._rebuild_totals()
+                self._dirty = True
+                if save:
+                    self.save()
+
+    def sync(self, folders: Iterable[Path] = (NEWS_DIR, SOCIAL_DIR)) -> int:
+        """Update every news/social file shard and drop shards of vanished files."""
+        from .data_loader import iter_json_files
+
+        added, present = 0, set()
+        with self._lock:
+            for folder in folders:
+                for _, p in iter_json_files(folder):
+                    present.add(str(p))
+                    added += self.update_file(p, save=False)
+            for name in [n for n, sh in self.shards.items()
+                         if sh.fingerprint is not None and n not in present]:
+                self.remove_file(name, save=False)
+            if self._dirty:
+                self.save()
+        return added
+
+    def merge(self, other: "RunningAggregates") -> "RunningAggregates":
+        """
+        Fold in the shards of another instance (e.g. built on another machine). Named
+        stream shards are summed; a file shard describes the whole file, so it is
+        copied (fingerprint and resume point included) when this instance lacks
+        it or holds an older version of the file, and otherwise left alone.
+        """
+        with self._lock:
+            for name, sh in other.shards.items():
+                mine = self.shards.get(name)
+                if sh.fingerprint is None and (mine is None or mine.fingerprint is None):
+                    self.shards.setdefault(name, Shard()).merge(sh)
+                elif mine is None or mine.fingerprint is None or (
+                        sh.fingerprint is not None and sh.fingerprint[1] > mine.fingerprint[1]):
+                    self.shards[name] = Shard.from_json(json.loads(json.dumps(sh.to_json())))
+            self._rebuild_totals()
+            self._dirty = True
+        return self
+
+    # -------------------------
+    # Queries
+    # -------------------------
+    @staticmethod
+    def _matching(company_id, channel, source):
+        want = (company_id, channel, source)
+        return lambda key: all(w is None or w == k for w, k in zip(want, key))
+
+    def stats(self, company_id: str = None, channel: str = None, source: str = None) -> RunningStats:
+        """Merged stats of every group matching the given (company_id, channel, source) filters."""
+        match = self._matching(company_id, channel, source)
+        out = RunningStats()
+        with self._lock:
+            for key, s in self._totals.stats.items():
+                if match(key):
+                    out.merge(s)
+        return out
+
+    def groups(self, company_id: str = None, channel: str = None) -> Dict[GroupKey, RunningStats]:
+        match = self._matching(company_id, channel, None)
+        with self._lock:
+            return {k: RunningStats().merge(s) for k, s in self._totals.stats.items() if match(k)}
+
+    def topics(self, company_id: str = None, channel: str = None, source: str = None) -> TopicSketch:
+        """Merged topic sketch of the matching groups; use .most_common(n) for the top topics."""
+        match = self._matching(company_id, channel, source)
+        out = TopicSketch(RUNNING_TOPIC_CAPACITY)
+        with self._lock:
+            for key, sk in self._totals.topics.items():
+                if match(key):
+                    out.merge(sk)
+        return out
+
+_running: Optional[RunningAggregates] = None
+_running_lock = threading.Lock()
+
+def get_running_aggregates() -> RunningAggregates:
+    """Process-wide running aggregates over the news/social folders."""
+    global _running
+    with _running_lock:
+        if _running is None:
+            _running = RunningAggregates()
+        return _running
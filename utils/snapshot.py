@@ -0,0 +1,326 @@
+# utils/snapshot.py
+"""
+Single-file binary snapshot of the corpus, memory-mapped read-only at startup.
+
+Container layout (little-endian):
+    b"ESGSNAP1" | u32 section count | section table | aligned section data
+    section table entry: name (48 bytes, utf-8, NUL padded), dtype (8 bytes, numpy
+    dtype string), offset u64, count u64
+
+Every section is a flat numpy array read zero-copy from the mapping, so opening a
+snapshot costs the same regardless of corpus size and several server processes
+mapping the same file share its pages through the OS page cache. Strings are
+stored as string tables (<name>.offsets int64[n+1] + <name>.data uint8) and
+repeated strings as categorical codes into a string table.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from pathlib import Path
+import json
+import mmap
+import os
+import struct
+
+import numpy as np
+
+from .config import SNAPSHOT_FILE
+from .aggregations import SentimentColumns, sentiment_overview, sentiment_columns_from_tables
+from .rollup import RollupCube, build_rollup, PREFIX as ROLLUP_PREFIX
+from .risk_index import RiskIndex, build_risk_index, risk_rows_from_tables, PREFIX as RISK_PREFIX
+
+MAGIC = b"ESGSNAP1"
+_ENTRY = struct.Struct("<48s8sQQ")
+_ALIGN = 8
+
+# -------------------------
+# Container IO
+# -------------------------
+def string_table(strings: Sequence[Optional[str]]) -> Tuple[np.ndarray, np.ndarray]:
+    """(offsets int64[n+1], utf-8 blob uint8) for a list of strings (None stored as "")."""
+    encoded = [(s or "").encode("utf-8") for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype="<i8")
+    if encoded:
+        offsets[1:] = np.cumsum([len(b) for b in encoded])
+    return offsets, np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+def categorical(values: Iterable[Optional[str]]) -> Tuple[np.ndarray, List[str]]:
+    """(int32 codes, labels); None becomes code -1."""
+    labels: Dict[str, int] = {}
+    codes = []
+    for v in values:
+        if v is None:
+            codes.append(-1)
+        else:
+            codes.append(labels.setdefault(v, len(labels)))
+    return np.asarray(codes, dtype="<i4"), list(labels)
+
+def write_container(path: Path, arrays: Dict[str, np.ndarray],
+                    strings: Dict[str, Sequence[Optional[str]]] = None) -> None:
+    """Write numeric arrays and string tables into one container file (atomically)."""
+    sections = {name: np.ascontiguousarray(a) for name, a in arrays.items()}
+    for name, values in (strings or {}).items():
+        sections[f"{name}.offsets"], sections[f"{name}.data"] = string_table(values)
+    header_len = len(MAGIC) + 4 + _ENTRY.size * len(sections)
+    offset = -(-header_len // _ALIGN) * _ALIGN
+    table, layout = [], []
+    for name, a in sections.items():
+        dt = a.dtype.newbyteorder("<") if a.dtype.byteorder == ">" else a.dtype
+        table.append(_ENTRY.pack(name.encode("utf-8"), dt.str.encode("ascii"), offset, a.size))
+        layout.append((offset, a.astype(dt, copy=False)))
+        offset += -(-a.nbytes // _ALIGN) * _ALIGN
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + f".tmp{os.getpid()}")
+    with open(tmp, "wb") as f:
+        f.write(MAGIC + struct.pack("<I", len(sections)) + b"".join(table))
+        for off, a in layout:
+            f.seek(off)
+            f.write(a.tobytes())
+        f.truncate(max(offset, header_len))
+    os.replace(tmp, path)
+
+class StringTable:
+    """Lazy view over a string table section; entries are decoded on access."""
+
+    def __init__(self, offsets: np.ndarray, data: np.ndarray):
+        self.offsets = offsets
+        self.data = data
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        return bytes(self.data[self.offsets[i]:self.offsets[i + 1]]).decode("utf-8")
+
+    def __iter__(self):
+        return iter(self.tolist())
+
+    def tolist(self) -> List[str]:
+        # one copy of the blob and slicing bytes is much cheaper than a numpy slice per entry
+        blob, bounds = self.data.tobytes(), self.offsets.tolist()
+        return [blob[a:b].decode("utf-8") for a, b in zip(bounds[:-1], bounds[1:])]
+
+class MappedContainer:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{self.path} is not an ESG snapshot container")
+        (count,) = struct.unpack_from("<I", self._mm, len(MAGIC))
+        self.sections: Dict[str, Tuple[str, int, int]] = {}
+        pos = len(MAGIC) + 4
+        for _ in range(count):
+            name, dt, off, n = _ENTRY.unpack_from(self._mm, pos)
+            self.sections[name.rstrip(b"\0").decode("utf-8")] = (dt.rstrip(b"\0").decode("ascii"), off, n)
+            pos += _ENTRY.size
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.sections or f"{name}.offsets" in self.sections
+
+    def array(self, name: str) -> np.ndarray:
+        dt, off, n = self.sections[name]
+        return np.frombuffer(self._mm, dtype=np.dtype(dt), count=n, offset=off)
+
+    def strings(self, name: str) -> StringTable:
+        return StringTable(self.array(f"{name}.offsets"), self.array(f"{name}.data"))
+
+    def close(self) -> None:
+        self._mm.close()
+
+# -------------------------
+# Corpus snapshot
+# -------------------------
+def _days(ts) -> np.ndarray:
+    """Datetime series -> int32 days since epoch, -1 for missing."""
+    vals = ts.to_numpy(dtype="datetime64[D]", na_value=np.datetime64("NaT"))
+    out = vals.astype("int64")
+    out[np.isnat(vals)] = -1
+    return out.astype("<i4")
+
+def build_snapshot(path: Path = None) -> Dict[str, int]:
+    """
+    Compile companies, reports, articles, posts, comments, topics, the sentiment
+    rollup cube, the risk-signal index and the merged graph into one file.
+    """
+    from .data_loader import load_companies, load_reports, load_news, load_social_media, corpus_version
+    from .event_store import build_event_tables
+    from .graph_utils import load_graph_json
+    from .graph_binary import graph_sections
+
+    path = Path(path or SNAPSHOT_FILE)
+    version = corpus_version()  # taken first: a file changed during the build makes the snapshot stale
+    companies = load_companies()
+    reports = load_reports()
+    tables = build_event_tables(companies, reports, load_news(), load_social_media())
+    comps = sorted(companies.values(), key=lambda c: c.get("company_id") or "")
+    cids = [c.get("company_id") for c in comps]
+    cidx = {cid: i for i, cid in enumerate(cids)}
+
+    def company_codes(df) -> np.ndarray:
+        return np.asarray([cidx.get(c, -1) for c in df["company_id"].astype(object)], dtype="<i4")
+
+    arrays: Dict[str, np.ndarray] = {}
+    strings: Dict[str, Sequence[Optional[str]]] = {}
+    for col in ("company_id", "name", "sector", "industry", "country"):
+        strings[f"companies.{col}"] = [c.get(col) for c in comps]
+    strings["companies.json"] = [json.dumps(c, ensure_ascii=False) for c in comps]
+    strings["corpus_version"] = [version]
+
+    def by_company(name: str, df):
+        """
+        df with each company's rows contiguous (unmatched rows last) and their codes;
+        <name>.company_offsets holds the runs: company c is rows offsets[c]:offsets[c + 1].
+        """
+        codes = company_codes(df)
+        key = np.where(codes < 0, len(cids), codes)
+        order = np.argsort(key, kind="stable")
+        arrays[f"{name}.company_offsets"] = np.concatenate(
+            ([0], np.cumsum(np.bincount(key, minlength=len(cids) + 1))[:len(cids)])).astype("<i8")
+        return df.iloc[order].reset_index(drop=True), codes[order]
+
+    rpts = [r for _, r in sorted(reports.items()) if r]
+    arrays["reports.company"] = np.asarray([cidx.get(r.get("company_id"), -1) for r in rpts], dtype="<i4")
+    arrays["reports.year"] = np.asarray([r.get("year") or -1 for r in rpts], dtype="<i4")
+    strings["reports.report_id"] = [r.get("report_id") for r in rpts]
+    strings["reports.summary"] = [r.get("overall_summary") for r in rpts]
+
+    m = tables["metrics"]
+    arrays["metrics.company"] = company_codes(m)
+    arrays["metrics.year"] = m["year"].fillna(-1).to_numpy(dtype="<i4")
+    arrays["metrics.metric"], strings["metrics.metric_labels"] = categorical(m["metric"].astype(object))
+    arrays["metrics.value"] = m["value"].to_numpy(dtype="<f8", na_value=np.nan)
+
+    rows = {}  # table -> {(company code, record id): row}, for the topic mentions
+    for name, cat_col in (("articles", "source_name"), ("posts", "platform"), ("comments", "platform")):
+        df, codes = by_company(name, tables[name])
+        arrays[f"{name}.company"] = codes
+        if name in ("articles", "posts"):
+            ids = df["article_id" if name == "articles" else "post_id"].astype(object)
+            rows[name] = {key: i for i, key in enumerate(zip(codes.tolist(), ids))}
+        arrays[f"{name}.day"] = _days(df["timestamp"])
+        arrays[f"{name}.sentiment"] = df["sentiment"].to_numpy(dtype="<f8", na_value=np.nan)
+        arrays[f"{name}.{cat_col}"], strings[f"{name}.{cat_col}_labels"] = categorical(
+            df[cat_col].astype(object).where(df[cat_col].notna(), None))
+        if name == "articles":
+            strings["articles.title"] = df["title"].astype(object).where(df["title"].notna(), None).tolist()
+
+    tm, codes = by_company("topic_mentions", tables["topic_mentions"])
+    arrays["topic_mentions.company"] = codes
+    # row of the mentioning article/post in its (company-grouped) table, -1 when not found
+    arrays["topic_mentions.row"] = np.asarray(
+        [rows.get(t, {}).get((c, r), -1) for c, t, r in
+         zip(codes.tolist(), tm["record_table"].astype(object), tm["record_id"].astype(object))], dtype="<i8")
+    arrays["topic_mentions.topic"] = tm["topic_id"].to_numpy(dtype="<i4")
+    arrays["topic_mentions.table"], strings["topic_mentions.table_labels"] = categorical(
+        tm["record_table"].astype(object))
+    strings["topics"] = tables["topics"].sort_values("topic_id")["topic"].astype(object).tolist()
+
+    cube_arrays, cube_strings = build_rollup(sentiment_columns_from_tables(tables))
+    arrays.update(cube_arrays)
+    strings.update(cube_strings)
+    risk_arrays, risk_strings = build_risk_index(risk_rows_from_tables(tables))
+    arrays.update(risk_arrays)
+    strings.update(risk_strings)
+
+    graph_arrays, graph_strings = graph_sections(load_graph_json())
+    arrays.update(graph_arrays)
+    strings.update(graph_strings)
+
+    write_container(path, arrays, strings)
+    return {"companies": len(comps), "reports": len(rpts), "articles": len(tables["articles"]),
+            "posts": len(tables["posts"]), "comments": len(tables["comments"]),
+            "risk_signals": len(tables["risk_signals"]),
+            "nodes": len(graph_arrays["graph.node_order"]), "edges": len(graph_arrays["graph.out.target"]),
+            "bytes": path.stat().st_size}
+
+class CorpusSnapshot:
+    """Read-only accessors over a mapped corpus snapshot."""
+
+    def __init__(self, path: Path = None):
+        self.path = Path(path or SNAPSHOT_FILE)
+        self.c = MappedContainer(self.path)
+        self.built_at_ns = os.stat(self.path).st_mtime_ns
+        # data_loader.corpus_version() of the files it was built from (None for older snapshots)
+        self.corpus_version = self.c.strings("corpus_version")[0] if "corpus_version" in self.c else None
+        ids = self.c.strings("companies.company_id")
+        self.company_index = {ids[i]: i for i in range(len(ids))}
+        self._topics: Optional[List[str]] = None
+
+    def companies(self) -> Dict[str, dict]:
+        docs = self.c.strings("companies.json")
+        return {cid: json.loads(docs[i]) for cid, i in self.company_index.items()}
+
+    def _topic_names(self) -> List[str]:
+        if self._topics is None:
+            self._topics = self.c.strings("topics").tolist()
+        return self._topics
+
+    def _sentiment_columns(self, company_id: str, company: int) -> SentimentColumns:
+        """The company's articles, posts and comments, with their topic mentions, as SentimentColumns."""
+        channels, sources, values, base, n = [], [], [], {}, 0
+        for table, ch, cat_col in (("articles", "news", "source_name"), ("posts", "social", "platform"),
+                                   ("comments", "social", "platform")):
+            offsets = self.c.array(f"{table}.company_offsets")
+            lo, hi = int(offsets[company]), int(offsets[company + 1])
+            labels = np.asarray(self.c.strings(f"{table}.{cat_col}_labels").tolist() + [""], dtype=object)
+            sources.append(labels[self.c.array(f"{table}.{cat_col}")[lo:hi]])  # code -1 -> ""
+            values.append(self.c.array(f"{table}.sentiment")[lo:hi])
+            channels.append(np.full(hi - lo, ch, dtype=object))
+            base[table] = n - lo  # table row -> row of the company's columns
+            n += hi - lo
+        # topic mentions of the company's articles and posts, re-pointed at its rows
+        offsets = self.c.array("topic_mentions.company_offsets")
+        lo, hi = int(offsets[company]), int(offsets[company + 1])
+        table = self.c.array("topic_mentions.table")[lo:hi]
+        row = self.c.array("topic_mentions.row")[lo:hi]
+        labels = self.c.strings("topic_mentions.table_labels").tolist()
+        shift = np.asarray([base.get(t, 0) for t in labels], dtype=np.int64)
+        keep = np.isin(table, [labels.index(t) for t in ("articles", "posts") if t in labels]) & (row >= 0)
+        channel = np.concatenate(channels)
+        return SentimentColumns(np.full(channel.size, company_id, dtype=object), channel,
+                                np.concatenate(sources), np.concatenate(values).astype(np.float64),
+                                row[keep] + shift[table[keep]],
+                                self.c.array("topic_mentions.topic")[lo:hi][keep].astype(np.int64),
+                                self._topic_names())
+
+    def aggregates(self, company_id: str, top_n: int = 10) -> Optional[dict]:
+        """
+        Same shape as ESGDataStore.aggregates, computed from the company's slice of the
+        mapped columns (None for snapshots built before the company offsets existed).
+        """
+        i = self.company_index.get(company_id)
+        if i is None or "topic_mentions.company_offsets" not in self.c:
+            return None
+        return sentiment_overview(self._sentiment_columns(company_id, i), top_n=top_n)
+
+    def rollup(self) -> Optional[RollupCube]:
+        """The corpus-wide sentiment rollup cube (None for snapshots built before it existed)."""
+        if f"{ROLLUP_PREFIX}companies" not in self.c:
+            return None
+        return RollupCube(self.c)
+
+    def risk_index(self) -> Optional[RiskIndex]:
+        """The corpus-wide risk-signal index (None for snapshots built before it existed)."""
+        if f"{RISK_PREFIX}day" not in self.c:
+            return None
+        return RiskIndex(self.c)
+
+    def graph(self):
+        """The merged graph as a MappedGraph (see graph_binary)."""
+        from .graph_binary import MappedGraph
+        return MappedGraph(self.c, self.path)
+
+    def graph_json(self) -> Dict[str, Any]:
+        return self.graph().to_json()
+
+_snapshot: Optional[CorpusSnapshot] = None
+
+def load_snapshot(path: Path = None) -> Optional[CorpusSnapshot]:
+    """Process-wide mapped snapshot, re-opened if the file was rebuilt; None if absent."""
+    global _snapshot
+    path = Path(path or SNAPSHOT_FILE)
+    if not path.exists():
+        return None
+    if _snapshot is None or _snapshot.path != path or _snapshot.built_at_ns != os.stat(path).st_mtime_ns:
+        _snapshot = CorpusSnapshot(path)
+    return _snapshot
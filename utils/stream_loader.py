@@ -0,0 +1,188 @@
+# utils/stream_loader.py
+"""
+Record-at-a-time readers for news and social files.
+
+Given a path, records are parsed incrementally with ijson so peak memory is one
+article/post rather than the whole document. Given an already-parsed dict, the same
+generators simply walk it, so callers can use one code path for both.
+
+Each generator yields (meta, record) tuples. meta carries the enclosing context:
+top-level company / company_id / year (when they appear before the record list in
+the file, as in all files written by our collectors) plus the source or platform
+fields of the enclosing news source / platform.
+
+scan_records reads the same records from a document's text and also reports where
+each one ends, so a reader can later resume after the last record it consumed and
+parse only the bytes appended since (see utils.running_aggregates).
+"""
+from typing import Dict, Any, Iterator, Optional, Tuple, Union
+from pathlib import Path
+import json
+import re
+
+try:
+    import ijson
+except ImportError:  # fall back to whole-document parsing
+    ijson = None
+
+TOP_LEVEL_KEYS = ("company", "company_id", "year")
+
+Source = Union[str, Path, dict]
+
+# -------------------------
+# Incremental parsing
+# -------------------------
+def _stream_records(path: Path, list_key: str, child_key: str) -> Iterator[Tuple[dict, dict]]:
+    """
+    Yield (meta, record) for every object at `<list_key>.item.<child_key>.item`.
+    Scalar fields of the enclosing `<list_key>.item` object and of the document root
+    are collected into meta as they stream past.
+    """
+    parent_prefix = f"{list_key}.item"
+    record_prefix = f"{parent_prefix}.{child_key}.item"
+    top: Dict[str, Any] = {}
+    parent: Dict[str, Any] = {}
+    builder = None
+    with open(path, "rb") as f:
+        for prefix, event, value in ijson.parse(f, use_float=True):
+            if builder is not None:
+                builder.event(event, value)
+                if prefix == record_prefix and event == "end_map":
+                    yield {**top, **parent}, builder.value
+                    builder = None
+                continue
+            if prefix == record_prefix and event == "start_map":
+                builder = ijson.ObjectBuilder()
+                builder.event(event, value)
+            elif prefix == parent_prefix and event == "start_map":
+                parent = {}
+            elif event in ("string", "number", "boolean", "null"):
+                head, _, key = prefix.rpartition(".")
+                if head == "" and key in TOP_LEVEL_KEYS:
+                    top[key] = value
+                elif head == parent_prefix:
+                    parent[key] = value
+
+def _load_document(source: Source) -> dict:
+    if isinstance(source, dict):
+        return source
+    return json.loads(Path(source).read_text(encoding="utf-8"))
+
+def _walk_records(doc: dict, list_key: str, child_key: str) -> Iterator[Tuple[dict, dict]]:
+    top = {k: doc[k] for k in TOP_LEVEL_KEYS if k in doc}
+    for item in doc.get(list_key, []):
+        parent = {k: v for k, v in item.items() if not isinstance(v, (dict, list))}
+        for rec in item.get(child_key, []):
+            yield {**top, **parent}, rec
+
+def _iter(source: Source, list_key: str, child_key: str) -> Iterator[Tuple[dict, dict]]:
+    if isinstance(source, dict):
+        return _walk_records(source, list_key, child_key)
+    if ijson is None:
+        return _walk_records(_load_document(source), list_key, child_key)
+    return _stream_records(Path(source), list_key, child_key)
+
+# -------------------------
+# Positional scanning
+# -------------------------
+# (top-level meta, enclosing list item meta) in effect after a record
+ScanContext = Tuple[Dict[str, Any], Dict[str, Any]]
+
+_decoder = json.JSONDecoder()
+_WS = re.compile(r"[ \t\n\r]*")
+
+def _skip(text: str, pos: int) -> int:
+    return _WS.match(text, pos).end()
+
+def _expect(text: str, pos: int, ch: str) -> int:
+    pos = _skip(text, pos)
+    if text[pos:pos + 1] != ch:
+        raise ValueError(f"expected {ch!r} at offset {pos}")
+    return pos + 1
+
+def _scan_items(text: str, pos: int, close: str, first: bool, item):
+    """Walk the items of an array/object from pos (just after its opener or an item); returns pos after close."""
+    while True:
+        pos = _skip(text, pos)
+        if text.startswith(close, pos):
+            return pos + 1
+        if not first:
+            pos = _skip(text, _expect(text, pos, ","))
+        first = False
+        pos = yield from item(pos)
+
+def scan_records(text: str, list_key: str, child_key: str, pos: int = 0,
+                 resume: Optional[ScanContext] = None) -> Iterator[Tuple[dict, dict, int, ScanContext]]:
+    """
+    Yield (meta, record, end, context) for every object at `<list_key>[].<child_key>[]`
+    of a document's text, where end is the offset just past the record. With resume
+    (the context yielded with an earlier record), pos must be that record's end and
+    scanning continues from there, so text may be just the tail of the document.
+    Raises ValueError on text that is not such a document.
+    """
+    top, parent = ({}, {}) if resume is None else (dict(resume[0]), dict(resume[1]))
+
+    def record(pos):
+        rec, pos = _decoder.raw_decode(text, _skip(text, pos))
+        yield {**top, **parent}, rec, pos, (dict(top), dict(parent))
+        return pos
+
+    def member(meta, nested):
+        def item(pos):
+            key, pos = _decoder.raw_decode(text, _skip(text, pos))
+            pos = _expect(text, pos, ":")
+            if key == nested[0]:
+                return (yield from _scan_items(text, _expect(text, pos, "["), "]", True, nested[1]))
+            value, pos = _decoder.raw_decode(text, _skip(text, pos))
+            if not isinstance(value, (dict, list)) and (meta is parent or key in TOP_LEVEL_KEYS):
+                meta[key] = value
+            return pos
+        return item
+
+    parent_member = member(parent, (child_key, record))
+
+    def list_item(pos):
+        parent.clear()
+        return (yield from _scan_items(text, _expect(text, pos, "{"), "}", True, parent_member))
+
+    root_member = member(top, (list_key, list_item))
+    if resume is None:
+        yield from _scan_items(text, _expect(text, pos, "{"), "}", True, root_member)
+        return
+    pos = yield from _scan_items(text, pos, "]", False, record)
+    pos = yield from _scan_items(text, pos, "}", False, parent_member)
+    pos = yield from _scan_items(text, pos, "]", False, list_item)
+    yield from _scan_items(text, pos, "}", False, root_member)
+
+def scan_news_articles(text: str, pos: int = 0, resume: Optional[ScanContext] = None):
+    """scan_records over news_sources[].articles[]."""
+    return scan_records(text, "news_sources", "articles", pos, resume)
+
+def scan_social_posts(text: str, pos: int = 0, resume: Optional[ScanContext] = None):
+    """scan_records over platforms[].posts[]."""
+    return scan_records(text, "platforms", "posts", pos, resume)
+
+# -------------------------
+# Public generators
+# -------------------------
+def iter_news_articles(source: Source) -> Iterator[Tuple[dict, dict]]:
+    """Yield (meta, article) from news_sources[].articles[]. meta includes source_name/source_type."""
+    return _iter(source, "news_sources", "articles")
+
+def iter_social_posts(source: Source) -> Iterator[Tuple[dict, dict]]:
+    """Yield (meta, post) from platforms[].posts[]. The post keeps its own comments list."""
+    return _iter(source, "platforms", "posts")
+
+def iter_social_comments(source: Source) -> Iterator[Tuple[dict, dict]]:
+    """Yield (meta, comment) for every comment; meta additionally carries post_id."""
+    for meta, post in iter_social_posts(source):
+        for c in post.get("comments", []):
+            yield {**meta, "post_id": post.get("post_id")}, c
+
+def iter_folder_articles(paths) -> Iterator[Tuple[dict, dict]]:
+    for p in paths:
+        yield from iter_news_articles(p)
+
+def iter_folder_posts(paths) -> Iterator[Tuple[dict, dict]]:
+    for p in paths:
+        yield from iter_social_posts(p)
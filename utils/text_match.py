@@ -0,0 +1,81 @@
+# utils/text_match.py
+"""
+Multi-pattern matching over word tokens.
+
+TokenAutomaton is an Aho-Corasick automaton whose alphabet is whole tokens rather
+than characters: patterns are token sequences and a text is scanned once, token by
+token, reporting every pattern occurrence whatever the number of patterns. Because
+both sides are tokenized the same way, matches always start and end on word
+boundaries ("m3" never matches inside "m30", "water" never inside "wastewater").
+"""
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple, Union
+from collections import deque
+import re
+
+TOKEN_RE = re.compile(r"[^\W_]+")
+
+def tokenize_cased(text: str) -> List[str]:
+    """Runs of letters and digits (any script); underscores, hyphens and punctuation separate tokens."""
+    return TOKEN_RE.findall(text or "")
+
+def tokenize(text: str) -> List[str]:
+    """tokenize_cased, lower-cased."""
+    return TOKEN_RE.findall((text or "").lower())
+
+class TokenAutomaton:
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, Any]]] = [[]]  # state -> [(pattern length, value)]
+        self._built = False
+
+    def add(self, pattern: Union[str, Sequence[str]], value: Any) -> None:
+        """Register a pattern (a string, tokenized, or a token sequence) reporting value when found."""
+        tokens = tokenize(pattern) if isinstance(pattern, str) else list(pattern)
+        if not tokens:
+            return
+        state = 0
+        for tok in tokens:
+            nxt = self._goto[state].get(tok)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][tok] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append((len(tokens), value))
+        self._built = False
+
+    def build(self) -> "TokenAutomaton":
+        """Compute failure links (breadth first) and merge the outputs they lead to."""
+        queue = deque(self._goto[0].values())
+        for s in queue:
+            self._fail[s] = 0
+        while queue:
+            state = queue.popleft()
+            for tok, nxt in self._goto[state].items():
+                f = self._fail[state]
+                while f and tok not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(tok, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+                queue.append(nxt)
+        self._built = True
+        return self
+
+    def find(self, tokens: Iterable[str]) -> Iterator[Tuple[int, int, Any]]:
+        """(start, end, value) of every occurrence in a token sequence; end is exclusive."""
+        if not self._built:
+            self.build()
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for i, tok in enumerate(tokens):
+            while state and tok not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(tok, 0)
+            for length, value in out[state]:
+                yield i + 1 - length, i + 1, value
+
+    def find_text(self, text: str) -> Iterator[Tuple[int, int, Any]]:
+        return self.find(tokenize(text))
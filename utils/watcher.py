@@ -0,0 +1,146 @@
+# utils/watcher.py
+"""
+Polling watcher for the data tree.
+
+Every poll stats the *.json files under DATA_DIR (recursively, skipping hidden
+folders and WATCH_EXCLUDE) and diffs (size, mtime) against the previous poll to
+produce added / changed / removed events. Subscribers receive the list of changes
+and invalidate only what those files affect; the default handlers keep the parse
+cache, filename index, running aggregates and shared ESGDataStore in sync.
+"""
+from typing import Callable, Dict, List, Optional, Tuple
+from dataclasses import dataclass
+from pathlib import Path
+import os
+import threading
+
+from .config import DATA_DIR, WATCH_INTERVAL_SECONDS
+
+# derived artefacts under DATA_DIR that are not source data
+WATCH_EXCLUDE = {"kg_exports", "event_store"}
+
+ADDED, CHANGED, REMOVED = "added", "changed", "removed"
+
+@dataclass(frozen=True)
+class FileChange:
+    event: str
+    path: str
+
+Handler = Callable[[List[FileChange]], None]
+
+def scan_tree(root: Path, exclude=WATCH_EXCLUDE) -> Dict[str, Tuple[int, int]]:
+    """path -> (size, mtime_ns) for every *.json under root."""
+    out = {}
+    stack = [str(root)]
+    while stack:
+        d = stack.pop()
+        try:
+            it = os.scandir(d)
+        except FileNotFoundError:
+            continue
+        with it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    if not entry.name.startswith(".") and entry.name not in exclude:
+                        stack.append(entry.path)
+                elif entry.name.endswith(".json"):
+                    try:
+                        st = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    out[entry.path] = (st.st_size, st.st_mtime_ns)
+    return out
+
+class DataWatcher:
+    def __init__(self, root: Path = None, interval: float = None):
+        self.root = Path(root or DATA_DIR)
+        self.interval = WATCH_INTERVAL_SECONDS if interval is None else interval
+        self._state: Optional[Dict[str, Tuple[int, int]]] = None
+        self._handlers: List[Handler] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def subscribe(self, handler: Handler) -> None:
+        self._handlers.append(handler)
+
+    def poll(self) -> List[FileChange]:
+        """Diff the tree against the previous poll and notify subscribers. The first poll only records a baseline."""
+        current = scan_tree(self.root)
+        previous, self._state = self._state, current
+        if previous is None:
+            return []
+        changes = []
+        for p, sig in current.items():
+            old = previous.get(p)
+            if old is None:
+                changes.append(FileChange(ADDED, p))
+            elif old != sig:
+                changes.append(FileChange(CHANGED, p))
+        for p in previous.keys() - current.keys():
+            changes.append(FileChange(REMOVED, p))
+        if changes:
+            for h in self._handlers:
+                h(changes)
+        return changes
+
+    # -------------------------
+    # Background polling
+    # -------------------------
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+            except Exception:
+                # a failed poll (e.g. a file vanishing mid-scan) is retried next interval
+                continue
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self.poll()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="esg-data-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+# -------------------------
+# Default invalidation handlers
+# -------------------------
+def invalidate_shared_caches(changes: List[FileChange]) -> None:
+    """Keep the parse cache, filename index, running aggregates and ESGDataStore in sync with the changed files."""
+    from .parse_cache import get_parse_cache
+    from .file_index import get_file_index
+    from .datastore import get_datastore
+    from .running_aggregates import get_running_aggregates
+
+    index, cache, store = get_file_index(), get_parse_cache(), get_datastore()
+    running = get_running_aggregates()
+    for ch in changes:
+        if ch.event == REMOVED:
+            index.remove_file(ch.path, save=False)
+            cache.invalidate(ch.path)
+            running.remove_file(ch.path, save=False)
+        else:
+            if ch.event == ADDED:
+                index.add_file(ch.path, save=False)
+            running.update_file(ch.path, save=False)
+        store.invalidate(ch.path)
+    index.save()
+    running.save()
+
+_watcher: Optional[DataWatcher] = None
+_watcher_lock = threading.Lock()
+
+def start_default_watcher() -> DataWatcher:
+    """Start (once per process) a background watcher wired to the shared caches."""
+    global _watcher
+    with _watcher_lock:
+        if _watcher is None:
+            _watcher = DataWatcher()
+            _watcher.subscribe(invalidate_shared_caches)
+            _watcher.start()
+        return _watcher